@@ -4,83 +4,142 @@ Library yang digunakan:
 - pandas: Untuk manipulasi data
 - numpy: Untuk operasi numerik
 - scikit-learn: Untuk clustering dan classification
-- mlxtend: Untuk association rules (apriori)
-- base64: Untuk encode image
-- io: Untuk BytesIO
+- clustering: Untuk matriks fitur yang di-cache dan sweep k secara paralel
+- itemsets: Untuk frequent itemset mining (Eclat) dan association rules
+- renderer: Untuk render chart di worker process
+- charts: Untuk menyimpan gambar chart (PNG/SVG/WebP) yang disajikan lewat URL
+- aggregation: Untuk density raster cluster plot pada dataset besar
+- sampling: Untuk clustering dari sampel berstrata pada dataset besar
 """
-from flask import request, jsonify
-import pandas as pd
+from flask import request, jsonify, Response, stream_with_context
 import numpy as np
 import json
-import base64
-from io import BytesIO
-import matplotlib
-matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.cluster import KMeans, DBSCAN
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score
-from utils import get_dataframe, clean_dict
+import itertools
+from utils import get_dataframe, get_snapshot, clean_dict, reads_dataset
+from metrics import cache_lookup
+from clustering import (get_scaled_matrix, make_kmeans, sweep_k, recommend_k, silhouette,
+                        get_neighbor_index, k_distance_curve, estimate_eps, dbscan,
+                        save_model, cluster_models, assign_chunks, encode_mixed, kprototypes,
+                        ASSIGN_CHUNK_SIZE,
+                        SILHOUETTE_SAMPLE_SIZE, SILHOUETTE_MODES)
+from charts import parse_formats, store_chart
+from aggregation import use_density, grid_shape, label_grid
+from itemsets import select_item_columns, TransactionSet, eclat, generate_rules, DEFAULT_MAX_ITEMSET_LEN
+import renderer
+import sampling
+from lazy import lazy_module
+
+pd = lazy_module('pandas')
+
+def _resolve_columns(df, columns, allow_categorical=False):
+    """Kolom untuk clustering: dari request atau auto-select, return (columns, error)
+
+    Tanpa allow_categorical semua kolom harus numerik; dengan allow_categorical (k-prototypes)
+    kolom kategorikal berkardinalitas rendah ikut dipilih otomatis.
+    """
+    if not columns:
+        # Auto-select numeric columns
+        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        if not allow_categorical:
+            if len(numeric_cols) < 2:
+                return None, "Minimal 2 kolom numerik diperlukan untuk clustering"
+            return numeric_cols[:5], None  # Maksimal 5 kolom
+        categorical_cols = [col for col in df.select_dtypes(exclude=[np.number]).columns
+                            if col in select_item_columns(df[[col]])]
+        columns = numeric_cols[:5] + categorical_cols[:10]
+        if len(columns) < 2:
+            return None, "Minimal 2 kolom diperlukan untuk clustering"
+        return columns, None
+    
+    # Validasi kolom
+    for col in columns:
+        if col not in df.columns:
+            return None, f"Kolom {col} tidak ditemukan"
+        if not allow_categorical and not pd.api.types.is_numeric_dtype(df[col]):
+            return None, f"Kolom {col} harus numerik"
+    return columns, None
 
 def register_routes(app):
     """Register routes untuk analisis lanjutan"""
     
     @app.route('/api/clustering', methods=['POST'])
+    @reads_dataset
     def perform_clustering():
-        """Melakukan clustering menggunakan K-Means atau DBSCAN"""
+        """Melakukan clustering menggunakan K-Means, DBSCAN atau K-Prototypes (data campuran)"""
         try:
             data = request.get_json()
             filename = data.get('filename')
-            method = data.get('method', 'kmeans')  # 'kmeans' or 'dbscan'
+            method = data.get('method', 'kmeans')  # 'kmeans', 'dbscan' atau 'kprototypes'
             n_clusters = data.get('n_clusters', 3)
             columns = data.get('columns', [])
             
             if not filename:
                 return jsonify({"error": "Filename is required"}), 400
             
-            df = get_dataframe(filename, app.config['UPLOAD_FOLDER'])
+            render_mode = data.get('render_mode', 'auto')  # 'auto', 'points' atau 'density'
             
-            # Pilih kolom untuk clustering
-            if not columns:
-                # Auto-select numeric columns
-                numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-                if len(numeric_cols) < 2:
-                    return jsonify({"error": "Minimal 2 kolom numerik diperlukan untuk clustering"}), 400
-                columns = numeric_cols[:5]  # Maksimal 5 kolom
+            silhouette_mode = data.get('silhouette_mode', 'auto')  # 'auto', 'exact' atau 'sample'
             
-            # Validasi kolom
-            for col in columns:
-                if col not in df.columns:
-                    return jsonify({"error": f"Kolom {col} tidak ditemukan"}), 400
-                if not pd.api.types.is_numeric_dtype(df[col]):
-                    return jsonify({"error": f"Kolom {col} harus numerik"}), 400
+            try:
+                formats = parse_formats(data.get('formats'))
+                use_density(0, render_mode)
+                if silhouette_mode not in SILHOUETTE_MODES:
+                    raise ValueError(f"silhouette_mode harus salah satu dari: {', '.join(SILHOUETTE_MODES)}")
+            except ValueError as ve:
+                return jsonify({"error": str(ve)}), 400
+            
+            df, version = get_snapshot(filename, app.config['UPLOAD_FOLDER'])
+            try:
+                sample, refined = sampling.resolve(filename, version, df, data)
+            except ValueError as ve:
+                return jsonify({"error": str(ve)}), 400
+            if refined is not None:
+                return refined
+            # Dataset besar: model di-fit dari sampel berstrata (matriks/index di-cache terpisah dari data penuh)
+            matrix_version = version
+            if sample is not None:
+                df, matrix_version = sample.df, (version, 'sample')
             
-            # Prepare data
-            X = df[columns].dropna()
+            columns, error = _resolve_columns(df, columns, allow_categorical=(method == 'kprototypes'))
+            if error:
+                return jsonify({"error": error}), 400
+            
+            numeric_columns = [col for col in columns if pd.api.types.is_numeric_dtype(df[col])]
+            if method == 'kprototypes':
+                # Data campuran: numerik dinormalisasi rentang, kategorikal menjadi integer code
+                X = df[columns].dropna()
+                row_index = X.index.to_numpy()
+                categorical_columns = [col for col in columns if col not in numeric_columns]
+                X_num, X_cat, encoding = encode_mixed(X, numeric_columns, categorical_columns)
+            else:
+                # Matriks hasil scaling dipakai ulang selama versi dataset dan kolom sama
+                scaled = get_scaled_matrix(filename, matrix_version, df, columns)
+                X_scaled, scaler, row_index = scaled["X"], scaled["scaler"], scaled["index"]
+                X = df.loc[row_index, columns]
             
             if len(X) < n_clusters:
                 return jsonify({"error": f"Data terlalu sedikit untuk {n_clusters} cluster"}), 400
             
-            # Normalisasi data
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
-            
             # Perform clustering
             if method == 'kmeans':
                 if n_clusters > len(X):
                     n_clusters = len(X)
-                model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+                model = make_kmeans(n_clusters, len(X))
                 labels = model.fit_predict(X_scaled)
                 centers = scaler.inverse_transform(model.cluster_centers_)
                 
-                # Calculate silhouette score
-                silhouette = silhouette_score(X_scaled, labels) if len(np.unique(labels)) > 1 else 0
+                # Silhouette per blok (exact) atau estimasi sampel berstrata untuk data besar
+                silhouette_report = silhouette(X_scaled, labels, silhouette_mode)
+                silhouette_value = silhouette_report["score"] if silhouette_report else 0
+                
+                fitted = save_model(filename, version, 'kmeans', columns, scaler, centers=model.cluster_centers_)
                 
                 result = {
                     "method": "K-Means",
+                    "algorithm": type(model).__name__,
                     "n_clusters": int(n_clusters),
-                    "silhouette_score": float(silhouette),
+                    "silhouette_score": float(silhouette_value),
+                    "silhouette": silhouette_report,
                     "inertia": float(model.inertia_),
                     "cluster_labels": labels.tolist(),
                     "cluster_centers": centers.tolist(),
@@ -89,82 +148,126 @@ def register_routes(app):
                 }
                 
             elif method == 'dbscan':
-                eps = data.get('eps', 0.5)
-                min_samples = data.get('min_samples', 5)
+                eps = data.get('eps', 'auto')  # angka atau 'auto' (estimasi dari kurva k-distance)
+                min_samples = int(data.get('min_samples', 5))
                 
-                model = DBSCAN(eps=eps, min_samples=min_samples)
-                labels = model.fit_predict(X_scaled)
+                # Index KD/ball-tree dibangun sekali per versi dataset dan kolom
+                tree = get_neighbor_index(filename, matrix_version, columns, X_scaled)
+                k_distances = None
+                if eps in (None, 'auto'):
+                    k_distances = k_distance_curve(tree, X_scaled, min_samples)
+                    eps = estimate_eps(k_distances)
+                eps = float(eps)
+                if eps <= 0:
+                    return jsonify({"error": "eps harus lebih dari 0"}), 400
+                
+                labels, core_mask = dbscan(tree, X_scaled, eps, min_samples)
                 
                 n_clusters_found = len(set(labels)) - (1 if -1 in labels else 0)
                 n_noise = int(np.sum(labels == -1))
                 
                 # Calculate silhouette score (skip noise points)
-                if n_clusters_found > 1:
-                    mask = labels != -1
-                    if np.sum(mask) > 1:
-                        silhouette = silhouette_score(X_scaled[mask], labels[mask])
-                    else:
-                        silhouette = -1
-                else:
-                    silhouette = -1
+                mask = labels != -1
+                silhouette_report = None
+                if n_clusters_found > 1 and np.sum(mask) > 1:
+                    silhouette_report = silhouette(X_scaled[mask], labels[mask], silhouette_mode)
+                
+                fitted = save_model(filename, version, 'dbscan', columns, scaler, eps=eps,
+                                    core_points=X_scaled[core_mask], core_labels=labels[core_mask])
                 
                 result = {
                     "method": "DBSCAN",
                     "n_clusters_found": int(n_clusters_found),
                     "n_noise": int(n_noise),
-                    "silhouette_score": float(silhouette) if silhouette != -1 else None,
-                    "eps": float(eps),
-                    "min_samples": int(min_samples),
+                    "silhouette_score": silhouette_report["score"] if silhouette_report else None,
+                    "silhouette": silhouette_report,
+                    "eps": eps,
+                    "eps_estimated": k_distances is not None,
+                    "min_samples": min_samples,
+                    "n_core_points": int(core_mask.sum()),
                     "cluster_labels": labels.tolist(),
                     "cluster_counts": {int(i): int(np.sum(labels == i)) for i in set(labels)},
                     "columns_used": columns
                 }
+                if k_distances is not None:
+                    # Kurva k-distance (diringkas ke 100 titik) untuk ditampilkan di UI
+                    positions = np.linspace(0, len(k_distances) - 1, min(100, len(k_distances))).astype(int)
+                    result["k_distance_curve"] = k_distances[positions].tolist()
+            elif method == 'kprototypes':
+                if n_clusters > len(X):
+                    n_clusters = len(X)
+                labels, proto_num, proto_cat, cost, n_iter = kprototypes(X_num, X_cat, n_clusters)
+                fitted = save_model(filename, version, 'kprototypes', columns, None, encoding=encoding,
+                                    numeric_columns=numeric_columns, categorical_columns=categorical_columns,
+                                    proto_num=proto_num, proto_cat=proto_cat)
+                
+                # Prototype dalam satuan asli: numerik dikembalikan dari rentang [0, 1]
+                centers = proto_num * encoding["range"] + encoding["min"]
+                prototypes = []
+                for c in range(n_clusters):
+                    prototype = {col: float(centers[c, j]) for j, col in enumerate(numeric_columns)}
+                    for j, col in enumerate(categorical_columns):
+                        value = encoding["categories"][j][proto_cat[c, j]]
+                        prototype[col] = value.item() if hasattr(value, 'item') else value
+                    prototypes.append(prototype)
+                
+                result = {
+                    "method": "K-Prototypes",
+                    "distance": "gower",
+                    "n_clusters": int(n_clusters),
+                    "cost": cost,
+                    "n_iter": int(n_iter),
+                    "cluster_labels": labels.tolist(),
+                    "prototypes": prototypes,
+                    "cluster_counts": {int(i): int(np.sum(labels == i)) for i in range(n_clusters)},
+                    "columns_used": columns,
+                    "numeric_columns": numeric_columns,
+                    "categorical_columns": categorical_columns
+                }
             else:
-                return jsonify({"error": f"Method {method} tidak didukung. Gunakan 'kmeans' atau 'dbscan'"}), 400
+                return jsonify({"error": f"Method {method} tidak didukung. Gunakan 'kmeans', 'dbscan' atau 'kprototypes'"}), 400
             
-            # Add cluster labels to original dataframe
-            df_with_clusters = df.copy()
-            df_with_clusters['Cluster'] = -1
-            df_with_clusters.loc[X.index, 'Cluster'] = labels
+            # Model disimpan untuk assignment data baru lewat /api/clustering/assign
+            result["model_version"] = fitted["version"]
             
-            # Generate visualization
-            if len(columns) >= 2:
-                fig, axes = plt.subplots(1, 2, figsize=(15, 6))
-                
-                # Scatter plot
-                if method == 'kmeans':
-                    scatter = axes[0].scatter(X[columns[0]], X[columns[1]], c=labels, cmap='viridis', alpha=0.6)
-                    axes[0].scatter(centers[:, 0], centers[:, 1], c='red', marker='x', s=200, linewidths=3, label='Centroids')
-                    axes[0].legend()
+            if sample is not None:
+                # Label dan cluster_counts untuk baris sampel; estimasi ukuran cluster di data penuh
+                assigned = pd.Series(labels, index=row_index).reindex(df.index).to_numpy()
+                bounds = {"cluster_counts": {int(c): sample.total(assigned == c) for c in result["cluster_counts"]}}
+                result["sampling"] = sampling.report(sample, filename, version, data, bounds)
+            
+            # Generate visualization (dua kolom numerik pertama)
+            if len(numeric_columns) >= 2:
+                x_col, y_col = numeric_columns[0], numeric_columns[1]
+                spec = {
+                    "kind": "cluster",
+                    "figsize": (15, 6),
+                    "method": result["method"],
+                    "x_col": x_col,
+                    "y_col": y_col,
+                    "centers": centers[:, :2] if method in ('kmeans', 'kprototypes') else None,
+                    "cluster_counts": result.get('cluster_counts', {})
+                }
+                if use_density(len(X), render_mode):
+                    # Dataset besar: raster cluster mayoritas per bin, bukan satu marker per baris
+                    codes, counts, x_edges, y_edges, cluster_ids = label_grid(X[x_col], X[y_col], labels,
+                                                                               grid_shape((7.5, 6), 100))
+                    majority = np.full(codes.shape, np.nan)
+                    filled = ~np.isnan(codes)
+                    majority[filled] = cluster_ids[codes[filled].astype(int)]
+                    spec.update(mode='density', majority=majority, x_edges=x_edges, y_edges=y_edges)
                 else:
-                    scatter = axes[0].scatter(X[columns[0]], X[columns[1]], c=labels, cmap='viridis', alpha=0.6)
-                
-                axes[0].set_xlabel(columns[0])
-                axes[0].set_ylabel(columns[1])
-                axes[0].set_title(f'{result["method"]} Clustering')
-                plt.colorbar(scatter, ax=axes[0])
+                    spec.update(mode='points', x=X[x_col].to_numpy(), y=X[y_col].to_numpy(), labels=labels)
                 
-                # Cluster distribution
-                cluster_counts = result.get('cluster_counts', {})
-                axes[1].bar(cluster_counts.keys(), cluster_counts.values(), color='skyblue', edgecolor='black')
-                axes[1].set_xlabel('Cluster')
-                axes[1].set_ylabel('Jumlah Data')
-                axes[1].set_title('Distribusi Cluster')
-                axes[1].grid(axis='y', alpha=0.3)
+                # Render di worker process, response hanya berisi URL gambar
+                image_urls = store_chart(renderer.render(spec, formats, bbox_inches='tight', dpi=100))
                 
-                plt.tight_layout()
-                
-                # Convert to base64
-                img_buffer = BytesIO()
-                plt.savefig(img_buffer, format='png', bbox_inches='tight', dpi=100)
-                img_buffer.seek(0)
-                img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-                plt.close()
-                
-                result["visualization"] = f"data:image/png;base64,{img_base64}"
+                result["visualization"] = image_urls['png']
+                result["visualization_images"] = image_urls
             
-            # Preview data with clusters
-            preview_df = df_with_clusters[columns + ['Cluster']].head(20)
+            # Preview data with clusters (baris dengan NaN tidak ikut clustering: Cluster = -1)
+            preview_df = df[columns].head(20).copy()
+            preview_df['Cluster'] = pd.Series(labels, index=row_index).reindex(preview_df.index).fillna(-1).astype(int)
             result["preview"] = preview_df.where(pd.notnull(preview_df), None).to_dict(orient='records')
             
             return jsonify({
@@ -176,112 +279,225 @@ def register_routes(app):
             import traceback
             return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
     
+    @app.route('/api/clustering/k-sweep', methods=['POST'])
+    @reads_dataset
+    def sweep_clusters():
+        """Evaluasi beberapa nilai k sekaligus (inertia/elbow dan silhouette) dan rekomendasi k"""
+        try:
+            data = request.get_json()
+            filename = data.get('filename')
+            columns = data.get('columns', [])
+            
+            if not filename:
+                return jsonify({"error": "Filename is required"}), 400
+            try:
+                k_min = int(data.get('k_min', 2))
+                k_max = int(data.get('k_max', 10))
+            except (TypeError, ValueError):
+                return jsonify({"error": "k_min dan k_max harus berupa angka"}), 400
+            if k_min < 2 or k_max < k_min:
+                return jsonify({"error": "Rentang k tidak valid (k_min >= 2 dan k_max >= k_min)"}), 400
+            
+            df, version = get_snapshot(filename, app.config['UPLOAD_FOLDER'])
+            
+            columns, error = _resolve_columns(df, columns)
+            if error:
+                return jsonify({"error": error}), 400
+            
+            X_scaled = get_scaled_matrix(filename, version, df, columns)["X"]
+            k_values = list(range(k_min, min(k_max, len(X_scaled) - 1) + 1))
+            if not k_values:
+                return jsonify({"error": f"Data terlalu sedikit untuk {k_min} cluster"}), 400
+            
+            # Semua kandidat k dievaluasi paralel dari matriks yang sama
+            results = sweep_k(X_scaled, k_values, share_key=(filename, version, tuple(columns)))
+            recommended, elbow, best_silhouette = recommend_k(results)
+            
+            result = {
+                "algorithm": type(make_kmeans(2, len(X_scaled))).__name__,
+                "n_rows": int(len(X_scaled)),
+                "columns_used": columns,
+                "k_values": k_values,
+                "inertia": [r["inertia"] for r in results],
+                "silhouette": [r["silhouette"] for r in results],
+                "silhouette_sample_size": int(min(len(X_scaled), SILHOUETTE_SAMPLE_SIZE)),
+                "elbow_k": elbow,
+                "best_silhouette_k": best_silhouette,
+                "recommended_k": recommended
+            }
+            
+            return jsonify({
+                "message": "K sweep berhasil",
+                "data": clean_dict(result)
+            })
+            
+        except Exception as e:
+            import traceback
+            return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
+    
+    @app.route('/api/clustering/assign', methods=['POST'])
+    def assign_segments():
+        """Assign data customer baru ke cluster dari model clustering terakhir (output streaming)
+
+        Input: file CSV (multipart, field 'file') atau JSON {"rows": [...]}. Output CSV (default)
+        atau NDJSON (format='ndjson'), satu baris per customer dengan kolom Cluster.
+        """
+        try:
+            if request.files:
+                params = request.form
+                upload = request.files.get('file')
+                if upload is None or upload.filename == '':
+                    return jsonify({"error": "No selected file"}), 400
+                chunks = pd.read_csv(upload.stream, chunksize=ASSIGN_CHUNK_SIZE)
+            else:
+                params = request.get_json() or {}
+                rows = params.get('rows')
+                if not rows:
+                    return jsonify({"error": "rows atau file diperlukan"}), 400
+                frame = pd.DataFrame(rows)
+                chunks = (frame.iloc[i:i + ASSIGN_CHUNK_SIZE] for i in range(0, len(frame), ASSIGN_CHUNK_SIZE))
+            
+            filename = params.get('filename')
+            output_format = params.get('format', 'csv')
+            id_column = params.get('id_column')
+            
+            if not filename:
+                return jsonify({"error": "Filename is required"}), 400
+            cache_lookup('cluster_model', filename in cluster_models)
+            if filename not in cluster_models:
+                return jsonify({"error": "Model clustering belum dibuat. Jalankan clustering terlebih dahulu."}), 400
+            if output_format not in ('csv', 'ndjson'):
+                return jsonify({"error": "format harus 'csv' atau 'ndjson'"}), 400
+            
+            model = cluster_models[filename]
+            
+            # Validasi kolom dari chunk pertama sebelum response streaming dimulai
+            chunks = iter(chunks)
+            first = next(chunks, None)
+            if first is None:
+                return jsonify({"error": "Tidak ada data untuk di-assign"}), 400
+            missing = [col for col in model["columns"] if col not in first.columns]
+            if missing:
+                return jsonify({"error": f"Kolom tidak ditemukan pada data: {', '.join(missing)}"}), 400
+            
+            def generate():
+                offset = 0
+                for chunk, labels in assign_chunks(model, itertools.chain([first], chunks)):
+                    out = pd.DataFrame({"row": np.arange(offset, offset + len(chunk))})
+                    if id_column and id_column in chunk.columns:
+                        out[id_column] = chunk[id_column].to_numpy()
+                    out["Cluster"] = labels
+                    if output_format == 'csv':
+                        yield out.to_csv(index=False, header=(offset == 0))
+                    else:
+                        yield out.to_json(orient='records', lines=True)
+                    offset += len(chunk)
+            
+            mimetype = 'text/csv' if output_format == 'csv' else 'application/x-ndjson'
+            response = Response(stream_with_context(generate()), mimetype=mimetype)
+            response.headers['X-Model-Version'] = str(model["version"])
+            return response
+            
+        except Exception as e:
+            import traceback
+            return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
+    
     @app.route('/api/association-rules', methods=['POST'])
+    @reads_dataset
     def perform_association_rules():
-        """Melakukan analisis Association Rules menggunakan Apriori algorithm"""
+        """Melakukan analisis Association Rules (frequent k-itemset dengan Eclat)"""
         try:
             data = request.get_json()
             filename = data.get('filename')
-            min_support = data.get('min_support', 0.1)
-            min_confidence = data.get('min_confidence', 0.5)
             categorical_columns = data.get('columns', [])
             
             if not filename:
                 return jsonify({"error": "Filename is required"}), 400
             
-            if min_support <= 0 or min_support >= 1:
+            try:
+                min_support = float(data.get('min_support', 0.1))
+                min_confidence = float(data.get('min_confidence', 0.5))
+                max_len = int(data.get('max_len') or DEFAULT_MAX_ITEMSET_LEN)
+                top_n = int(data.get('top_n', 20))
+            except (TypeError, ValueError):
+                return jsonify({"error": "min_support, min_confidence, max_len dan top_n harus berupa angka"}), 400
+            
+            if not 0 < min_support < 1:
                 return jsonify({"error": "min_support harus antara 0 dan 1"}), 400
             
-            if min_confidence <= 0 or min_confidence >= 1:
+            if not 0 < min_confidence < 1:
                 return jsonify({"error": "min_confidence harus antara 0 dan 1"}), 400
             
-            df = get_dataframe(filename, app.config['UPLOAD_FOLDER'])
+            if max_len < 1:
+                return jsonify({"error": "max_len minimal 1"}), 400
+            
+            if top_n < 1:
+                return jsonify({"error": "top_n minimal 1"}), 400
+            
+            df = get_dataframe(filename, app.config['UPLOAD_FOLDER'], copy=False)
             
-            # Pilih kolom kategorikal
+            # Pilih kolom kategorikal (semua kolom kategorikal, tanpa batas jumlah kolom)
             if not categorical_columns:
-                categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
-                if len(categorical_cols) == 0:
-                    # Jika tidak ada kolom object, coba kolom dengan sedikit nilai unik
-                    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-                    categorical_cols = [col for col in numeric_cols if df[col].nunique() <= 10]
-                    if len(categorical_cols) == 0:
-                        return jsonify({"error": "Tidak ada kolom kategorikal yang cocok untuk association rules"}), 400
-                categorical_columns = categorical_cols[:5]  # Maksimal 5 kolom
+                categorical_columns = select_item_columns(df)
+                if len(categorical_columns) == 0:
+                    return jsonify({"error": "Tidak ada kolom kategorikal yang cocok untuk association rules"}), 400
             
             # Validasi kolom
             for col in categorical_columns:
                 if col not in df.columns:
                     return jsonify({"error": f"Kolom {col} tidak ditemukan"}), 400
             
-            # Prepare data untuk apriori (binerisasi)
-            df_subset = df[categorical_columns].copy()
+            # Binerisasi: setiap nilai kolom menjadi item dengan tidset sendiri
+            transactions = TransactionSet(df, categorical_columns)
+            n_transactions = transactions.n_transactions
             
-            # Binerisasi: setiap nilai menjadi kolom terpisah
-            encoded_df = pd.get_dummies(df_subset)
-            
-            if len(encoded_df.columns) == 0:
+            if len(transactions.items) == 0 or n_transactions == 0:
                 return jsonify({"error": "Tidak ada data untuk dianalisis"}), 400
             
-            # Hitung support untuk setiap itemset
-            support = encoded_df.mean()
-            
-            # Filter berdasarkan min_support
-            frequent_items = support[support >= min_support]
+            # Frequent itemsets (k-itemset) dengan Eclat, lalu rules dari itemset tersebut
+            itemsets = eclat(transactions, min_support, max_len)
             
-            if len(frequent_items) == 0:
+            if len(itemsets) == 0:
                 return jsonify({
                     "message": "Tidak ada itemset yang memenuhi min_support",
                     "data": {
                         "rules": [],
                         "frequent_itemsets": [],
-                        "total_itemsets": len(support),
+                        "total_itemsets": len(transactions.items),
                         "frequent_count": 0
                     }
                 })
             
-            # Generate rules (simplified version)
-            rules = []
-            frequent_itemsets = []
+            # Hanya top_n rule terbaik (confidence, lalu lift) yang disimpan selama generate
+            rules, rules_count = generate_rules(itemsets, n_transactions, min_confidence, top_n)
+            top_itemsets = sorted(itemsets.items(), key=lambda x: (-x[1], len(x[0])))[:top_n]
             
-            for item in frequent_items.index:
-                item_support = float(frequent_items[item])
-                frequent_itemsets.append({
-                    "itemset": [item],
-                    "support": item_support,
-                    "count": int(item_support * len(encoded_df))
-                })
-                
-                # Generate rules untuk item ini (dengan item lain)
-                for other_item in frequent_items.index:
-                    if item != other_item:
-                        # Calculate confidence: P(other_item | item)
-                        item_and_other = (encoded_df[item] & encoded_df[other_item]).sum() / len(encoded_df)
-                        if item_support > 0:
-                            confidence = item_and_other / item_support
-                            if confidence >= min_confidence:
-                                other_support = float(frequent_items[other_item])
-                                lift = confidence / other_support if other_support > 0 else 0
-                                
-                                rules.append({
-                                    "antecedent": item,
-                                    "consequent": other_item,
-                                    "support": float(item_and_other),
-                                    "confidence": float(confidence),
-                                    "lift": float(lift)
-                                })
-            
-            # Sort rules by confidence
-            rules.sort(key=lambda x: x['confidence'], reverse=True)
+            def item_names(indices):
+                return [transactions.items[i] for i in indices]
             
             result = {
-                "total_itemsets": len(support),
-                "frequent_itemsets_count": len(frequent_items),
-                "rules_count": len(rules),
+                "total_itemsets": len(transactions.items),
+                "frequent_itemsets_count": len(itemsets),
+                "max_itemset_length": max(len(k) for k in itemsets),
+                "rules_count": rules_count,
+                "max_len": max_len,
                 "min_support": float(min_support),
                 "min_confidence": float(min_confidence),
                 "columns_used": categorical_columns,
-                "top_frequent_itemsets": frequent_itemsets[:10],
-                "top_rules": rules[:20]  # Top 20 rules
+                "top_frequent_itemsets": [
+                    {"itemset": item_names(k), "support": count / n_transactions, "count": count}
+                    for k, count in top_itemsets
+                ],
+                "top_rules": [
+                    {
+                        **rule,
+                        "antecedent": ", ".join(item_names(rule["antecedent"])),
+                        "consequent": ", ".join(item_names(rule["consequent"])),
+                        "antecedent_items": item_names(rule["antecedent"]),
+                        "consequent_items": item_names(rule["consequent"])
+                    }
+                    for rule in rules
+                ]
             }
             
             return jsonify({
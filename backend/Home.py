@@ -17,6 +17,13 @@ if not os.path.exists(UPLOAD_FOLDER):
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
+# Artefak model terlatih (untuk scoring batch lewat score_batch.py)
+MODEL_FOLDER = 'models'
+if not os.path.exists(MODEL_FOLDER):
+    os.makedirs(MODEL_FOLDER)
+
+app.config['MODEL_FOLDER'] = MODEL_FOLDER
+
 @app.route('/')
 def home():
     return jsonify({"message": "Welcome to CSV Data Processor API with Python Libraries"})
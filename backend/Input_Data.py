@@ -5,14 +5,20 @@ Library yang digunakan:
 - os: Untuk operasi file system
 """
 from flask import request, jsonify
-import pandas as pd
 import os
-from utils import get_dataframe, dataframes
+from utils import get_dataframe, set_dataframe, get_dataset_version, writes_dataset
+from cube import build_cube
+from scoring import reset_schema
+from sampling import build_sample
+from lazy import lazy_module
+
+pd = lazy_module('pandas')
 
 def register_routes(app):
     """Register routes untuk input data"""
     
     @app.route('/api/upload', methods=['POST'])
+    @writes_dataset
     def upload_file():
         """Upload dan baca file CSV menggunakan pandas"""
         if 'file' not in request.files:
@@ -31,8 +37,14 @@ def register_routes(app):
                 # Baca file CSV menggunakan pandas
                 df = pd.read_csv(filepath)
                 
-                # Simpan ke memory
-                dataframes[file.filename] = df
+                # Simpan ke memory (sebagai versi dataset baru)
+                set_dataframe(file.filename, df)
+                # Schema preprocessing dimulai ulang dari data mentah
+                reset_schema(file.filename)
+                # Aggregation cube untuk chart/ringkasan per grup dihitung sekali saat upload
+                build_cube(file.filename, get_dataset_version(file.filename), df)
+                # Dataset besar: sampel berstrata untuk eksplorasi cepat juga dibangun sekali saat upload
+                build_sample(file.filename, get_dataset_version(file.filename), df)
                 
                 # Konversi nilai NaN menjadi None (null) untuk JSON
                 df = df.where(pd.notnull(df), None)
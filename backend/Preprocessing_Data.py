@@ -6,15 +6,19 @@ Library yang digunakan:
 - scikit-learn: Untuk preprocessing (StandardScaler, LabelEncoder, MinMaxScaler)
 """
 from flask import request, jsonify
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler, LabelEncoder, MinMaxScaler
-from utils import get_dataframe, clean_dict
+from utils import get_dataframe, set_dataframe, clean_dict, reads_dataset, writes_dataset
+from scoring import record_step
+from lazy import lazy_module
+
+pd = lazy_module('pandas')
+sklearn_preprocessing = lazy_module('sklearn.preprocessing', 'preprocessing')
 
 def register_routes(app):
     """Register routes untuk preprocessing data"""
     
     @app.route('/api/preprocess', methods=['POST'])
+    @writes_dataset
     def preprocess_data():
         """Preprocessing data: handle missing values, encoding, scaling"""
         try:
@@ -28,41 +32,58 @@ def register_routes(app):
             df = get_dataframe(filename, app.config['UPLOAD_FOLDER'])
             df_processed = df.copy()
             
+            # Langkah yang dijalankan dicatat sebagai schema (dipakai ulang saat scoring data baru)
+            steps = []
+            
             # Handle missing values
             if options.get('handle_missing') == 'drop':
+                steps.append({"type": "dropna", "columns": df_processed.columns.tolist()})
                 df_processed = df_processed.dropna()
             elif options.get('handle_missing') == 'mean':
                 numeric_cols = df_processed.select_dtypes(include=[np.number]).columns
-                df_processed[numeric_cols] = df_processed[numeric_cols].fillna(df_processed[numeric_cols].mean())
+                fill_values = df_processed[numeric_cols].mean()
+                df_processed[numeric_cols] = df_processed[numeric_cols].fillna(fill_values)
+                steps.append({"type": "fillna", "values": fill_values.dropna().to_dict()})
             elif options.get('handle_missing') == 'median':
                 numeric_cols = df_processed.select_dtypes(include=[np.number]).columns
-                df_processed[numeric_cols] = df_processed[numeric_cols].fillna(df_processed[numeric_cols].median())
+                fill_values = df_processed[numeric_cols].median()
+                df_processed[numeric_cols] = df_processed[numeric_cols].fillna(fill_values)
+                steps.append({"type": "fillna", "values": fill_values.dropna().to_dict()})
             elif options.get('handle_missing') == 'mode':
+                fill_values = {}
                 for col in df_processed.columns:
-                    df_processed[col] = df_processed[col].fillna(df_processed[col].mode()[0] if not df_processed[col].mode().empty else None)
+                    mode = df_processed[col].mode()
+                    if not mode.empty:
+                        fill_values[col] = mode[0]
+                    df_processed[col] = df_processed[col].fillna(mode[0] if not mode.empty else None)
+                steps.append({"type": "fillna", "values": fill_values})
             
             # Label encoding untuk categorical
             if options.get('label_encode'):
-                le = LabelEncoder()
+                le = sklearn_preprocessing.LabelEncoder()
                 categorical_cols = df_processed.select_dtypes(include=['object']).columns
+                classes = {}
                 for col in categorical_cols:
                     df_processed[col] = le.fit_transform(df_processed[col].astype(str))
+                    classes[col] = le.classes_.tolist()
+                steps.append({"type": "label_encode", "classes": classes})
             
             # Scaling - DISABLED untuk menghindari masalah dengan target column
             # Scaling hanya boleh diterapkan pada feature columns, bukan target column
             # Untuk sementara dinonaktifkan karena sulit untuk membedakan target column saat preprocessing
             # if options.get('scale') == 'standard':
-            #     scaler = StandardScaler()
+            #     scaler = sklearn_preprocessing.StandardScaler()
             #     numeric_cols = df_processed.select_dtypes(include=[np.number]).columns
             #     df_processed[numeric_cols] = scaler.fit_transform(df_processed[numeric_cols])
             # elif options.get('scale') == 'minmax':
-            #     scaler = MinMaxScaler()
+            #     scaler = sklearn_preprocessing.MinMaxScaler()
             #     numeric_cols = df_processed.select_dtypes(include=[np.number]).columns
             #     df_processed[numeric_cols] = scaler.fit_transform(df_processed[numeric_cols])
             
-            # Update dataframe in memory dengan data yang sudah diproses
-            from utils import dataframes
-            dataframes[filename] = df_processed
+            # Update dataframe in memory dengan data yang sudah diproses (versi baru)
+            set_dataframe(filename, df_processed)
+            for step in steps:
+                record_step(filename, step)
             
             # Convert NaN to None for JSON (hanya untuk preview/respons, bukan untuk update memory)
             df_processed_for_json = df_processed.where(pd.notnull(df_processed), None)
@@ -81,6 +102,7 @@ def register_routes(app):
             return jsonify({"error": str(e)}), 500
     
     @app.route('/api/detect-outliers', methods=['POST'])
+    @reads_dataset
     def detect_outliers():
         """Deteksi outliers menggunakan IQR method"""
         try:
@@ -134,6 +156,7 @@ def register_routes(app):
             return jsonify({"error": str(e)}), 500
     
     @app.route('/api/drop-columns', methods=['POST'])
+    @writes_dataset
     def drop_columns():
         """Hapus kolom dari dataframe"""
         try:
@@ -157,9 +180,9 @@ def register_routes(app):
             # Drop columns
             df_dropped = df.drop(columns=columns_to_drop)
             
-            # Update in memory
-            from utils import dataframes
-            dataframes[filename] = df_dropped
+            # Update in memory (versi baru)
+            set_dataframe(filename, df_dropped, change={"type": "drop_columns", "columns": columns_to_drop})
+            record_step(filename, {"type": "drop_columns", "columns": list(columns_to_drop)})
             
             # Convert NaN to None
             df_dropped = df_dropped.where(pd.notnull(df_dropped), None)
@@ -179,6 +202,7 @@ def register_routes(app):
             return jsonify({"error": str(e)}), 500
     
     @app.route('/api/identify-features', methods=['POST'])
+    @reads_dataset
     def identify_features():
         """Identifikasi fitur numeric dan categorical berdasarkan unique values"""
         try:
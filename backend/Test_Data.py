@@ -4,30 +4,42 @@ Library yang digunakan:
 - pandas: Untuk manipulasi data
 - scikit-learn: Untuk train_test_split, LogisticRegression, metrics
 - numpy: Untuk operasi numerik
+- scikit-learn.inspection: Untuk permutation importance (paralel dengan n_jobs)
+- renderer: Untuk render confusion matrix di worker process
+- scoring: Untuk menyimpan artefak model + schema preprocessing (joblib) untuk score_batch.py
 """
 from flask import request, jsonify
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, confusion_matrix, classification_report, roc_auc_score
-from sklearn.preprocessing import StandardScaler
-from utils import get_dataframe, clean_dict
-import matplotlib
-matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
-import base64
-from io import BytesIO
+from utils import get_dataframe, get_dataset_version, clean_dict, reads_dataset
+from metrics import cache_lookup, stage
+from charts import parse_formats, store_chart
+import renderer
+import scoring
+import itertools
+from lazy import lazy_module
+
+# scikit-learn di-import saat training/evaluasi pertama, bukan saat registrasi route
+pd = lazy_module('pandas')
+sklearn_model_selection = lazy_module('sklearn.model_selection', 'model')
+sklearn_linear_model = lazy_module('sklearn.linear_model', 'model')
+sklearn_metrics = lazy_module('sklearn.metrics', 'model')
+sklearn_preprocessing = lazy_module('sklearn.preprocessing', 'preprocessing')
+sklearn_inspection = lazy_module('sklearn.inspection', 'model')
 
 # Store trained models and split data in memory
 trained_models = {}
 split_data_store = {}
 
+# Cache hasil explain per (filename, model_version, ...) agar tidak dihitung ulang
+explanation_cache = {}
+MAX_EXPLAIN_ROWS = 1000
+_model_versions = itertools.count(1)
+
 def register_routes(app):
     """Register routes untuk split data, training, dan prediction"""
     
     @app.route('/api/split', methods=['POST'])
+    @reads_dataset
     def split_data():
         """Split data menjadi train dan test set menggunakan scikit-learn"""
         try:
@@ -46,7 +58,7 @@ def register_routes(app):
             if target_column and target_column in df.columns:
                 X = df.drop(columns=[target_column])
                 y = df[target_column]
-                X_train, X_test, y_train, y_test = train_test_split(
+                X_train, X_test, y_train, y_test = sklearn_model_selection.train_test_split(
                     X, y, test_size=test_size, random_state=random_state
                 )
                 
@@ -80,7 +92,7 @@ def register_routes(app):
                 }
             else:
                 # Split tanpa target (hanya X)
-                train_df, test_df = train_test_split(
+                train_df, test_df = sklearn_model_selection.train_test_split(
                     df, test_size=test_size, random_state=random_state
                 )
                 
@@ -108,6 +120,7 @@ def register_routes(app):
             return jsonify({"error": str(e)}), 500
     
     @app.route('/api/train-model', methods=['POST'])
+    @reads_dataset
     def train_model():
         """Train Logistic Regression model"""
         try:
@@ -118,6 +131,11 @@ def register_routes(app):
             if not filename:
                 return jsonify({"error": "Filename is required"}), 400
             
+            try:
+                formats = parse_formats(data.get('formats'))
+            except ValueError as ve:
+                return jsonify({"error": str(ve)}), 400
+            
             # Cek apakah split data sudah ada
             if filename not in split_data_store:
                 # Jika belum ada split data, coba load langsung dari file dan split otomatis
@@ -142,7 +160,7 @@ def register_routes(app):
                     # Split data otomatis
                     X = df.drop(columns=[target_column])
                     y = df[target_column]
-                    X_train, X_test, y_train, y_test = train_test_split(
+                    X_train, X_test, y_train, y_test = sklearn_model_selection.train_test_split(
                         X, y, test_size=0.2, random_state=42
                     )
                     
@@ -254,18 +272,11 @@ def register_routes(app):
                     f"3. JANGAN pilih kolom numerik kontinyu atau kolom dengan banyak nilai berbeda"
                 }), 400
             
-            # Update split data dengan y yang sudah di-convert
-            split_data['y_train'] = y_train
-            split_data['y_test'] = y_test
-            
             # Scale data untuk membantu konvergensi
-            scaler = StandardScaler()
+            scaler = sklearn_preprocessing.StandardScaler()
             X_train_scaled = scaler.fit_transform(X_train)
             X_test_scaled = scaler.transform(X_test)
             
-            # Simpan scaler untuk prediction nanti
-            split_data['scaler'] = scaler
-            
             # Training model dengan max_iter yang lebih tinggi dan solver yang lebih robust
             try:
                 # Gunakan solver 'liblinear' untuk dataset kecil/medium, atau 'lbfgs' dengan max_iter lebih tinggi
@@ -273,13 +284,14 @@ def register_routes(app):
                 solver = 'liblinear' if len(X_train) < 10000 else 'lbfgs'
                 max_iterations = 5000 if solver == 'lbfgs' else 1000
                 
-                model = LogisticRegression(
+                model = sklearn_linear_model.LogisticRegression(
                     max_iter=max_iterations, 
                     random_state=42,
                     solver=solver,
                     n_jobs=-1 if solver == 'lbfgs' else 1  # Parallel processing untuk lbfgs
                 )
-                model.fit(X_train_scaled, y_train)
+                with stage('train'):
+                    model.fit(X_train_scaled, y_train)
             except ValueError as ve:
                 # Tangkap error dari scikit-learn tentang continuous target
                 if "continuous" in str(ve).lower() or "Unknown label type" in str(ve):
@@ -304,55 +316,57 @@ def register_routes(app):
                 pass
             
             # Hitung metrics
-            accuracy = float(accuracy_score(y_test, y_pred))
+            accuracy = float(sklearn_metrics.accuracy_score(y_test, y_pred))
             
             # Confusion matrix
-            cm = confusion_matrix(y_test, y_pred).tolist()
+            cm = sklearn_metrics.confusion_matrix(y_test, y_pred).tolist()
             
             # ROC AUC Score (jika binary classification)
             roc_auc = None
             if y_prob is not None and len(model.classes_) == 2:
                 try:
-                    roc_auc = float(roc_auc_score(y_test, y_prob))
+                    roc_auc = float(sklearn_metrics.roc_auc_score(y_test, y_prob))
                 except:
                     pass
             
             # Classification report
-            report = classification_report(y_test, y_pred, output_dict=True)
+            report = sklearn_metrics.classification_report(y_test, y_pred, output_dict=True)
             
             # Simpan model dan scaler
+            # X_test_scaled ikut disimpan supaya /api/explain tidak perlu scaling ulang
             trained_models[filename] = {
                 'model': model,
                 'scaler': scaler,
                 'feature_columns': split_data['feature_columns'],
-                'target_column': split_data['target_column']
+                'target_column': split_data['target_column'],
+                'X_test_scaled': X_test_scaled,
+                'y_test': y_test.to_numpy(),
+                'version': next(_model_versions)
             }
             
+            # Simpan artefak model + schema preprocessing ke disk untuk scoring batch (score_batch.py)
+            model_path = None
+            try:
+                artifact = scoring.build_artifact(trained_models[filename], scoring.get_schema(filename),
+                                                  filename, get_dataset_version(filename))
+                model_path = scoring.save_artifact(
+                    scoring.artifact_path(app.config['MODEL_FOLDER'], filename), artifact)
+            except Exception as e:
+                print(f"Error saving model artifact: {e}")
+            
             # Generate confusion matrix visualization
             cm_image = None
+            cm_images = None
             try:
-                fig, ax = plt.subplots(figsize=(8, 6))
-                sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', ax=ax, 
-                           cbar_kws={'label': 'Count'}, linewidths=0.5, linecolor='gray')
-                ax.set_xlabel('Predicted', fontsize=12, fontweight='bold')
-                ax.set_ylabel('Actual', fontsize=12, fontweight='bold')
-                ax.set_title('Confusion Matrix', fontsize=14, fontweight='bold', pad=20)
-                
-                # Set labels for classes
-                class_labels = [str(int(c)) for c in model.classes_]
-                ax.set_xticklabels(class_labels, rotation=0)
-                ax.set_yticklabels(class_labels, rotation=0)
-                
-                plt.tight_layout()
-                
-                # Convert to base64
-                img_buffer = BytesIO()
-                plt.savefig(img_buffer, format='png', bbox_inches='tight', dpi=100, facecolor='white')
-                img_buffer.seek(0)
-                img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-                cm_image = f"data:image/png;base64,{img_base64}"
-                plt.close()
-                plt.clf()
+                spec = {
+                    "kind": "confusion_matrix",
+                    "figsize": (8, 6),
+                    "matrix": cm,
+                    "class_labels": [str(int(c)) for c in model.classes_]
+                }
+                # Render di worker process, response hanya berisi URL gambar
+                cm_images = store_chart(renderer.render(spec, formats, bbox_inches='tight', dpi=100, facecolor='white'))
+                cm_image = cm_images['png']
             except Exception as e:
                 print(f"Error generating confusion matrix visualization: {e}")
                 # Continue without visualization
@@ -362,8 +376,10 @@ def register_routes(app):
                 "roc_auc": roc_auc,
                 "confusion_matrix": cm,
                 "confusion_matrix_image": cm_image,
+                "confusion_matrix_images": cm_images,
                 "classification_report": clean_dict(report),
-                "algorithm": "Logistic Regression"
+                "algorithm": "Logistic Regression",
+                "model_path": model_path
             }
             
             return jsonify({"message": "Model trained successfully", "data": result})
@@ -387,6 +403,7 @@ def register_routes(app):
             if not filename:
                 return jsonify({"error": "Filename is required"}), 400
             
+            cache_lookup('model', filename in trained_models)
             if filename not in trained_models:
                 return jsonify({"error": "Model belum dilatih. Silakan latih model terlebih dahulu."}), 400
             
@@ -430,4 +447,109 @@ def register_routes(app):
             
         except Exception as e:
             return jsonify({"error": str(e)}), 500
+    
+    @app.route('/api/explain', methods=['POST'])
+    def explain_model():
+        """Feature importance (permutation) dan kontribusi per customer untuk model yang sudah dilatih"""
+        try:
+            data = request.get_json()
+            filename = data.get('filename')
+            
+            if not filename:
+                return jsonify({"error": "Filename is required"}), 400
+            
+            try:
+                n_repeats = int(data.get('n_repeats', 5))
+                offset = int(data.get('offset', 0))
+                limit = int(data.get('limit', 100))
+            except (TypeError, ValueError):
+                return jsonify({"error": "n_repeats, offset dan limit harus berupa angka"}), 400
+            if offset < 0 or not 1 <= limit <= MAX_EXPLAIN_ROWS:
+                return jsonify({"error": f"offset minimal 0 dan limit antara 1 dan {MAX_EXPLAIN_ROWS}"}), 400
+            
+            cache_lookup('model', filename in trained_models)
+            if filename not in trained_models:
+                return jsonify({"error": "Model belum dilatih. Silakan latih model terlebih dahulu."}), 400
+            
+            if n_repeats < 1:
+                return jsonify({"error": "n_repeats minimal 1"}), 400
+            
+            model_info = trained_models[filename]
+            model = model_info['model']
+            feature_columns = model_info['feature_columns']
+            X_test_scaled = model_info['X_test_scaled']
+            y_test = model_info['y_test']
+            cache_key = (filename, model_info['version'], n_repeats)
+            
+            cached = explanation_cache.get(cache_key)
+            cache_lookup('explanation', cached is not None)
+            if cached is None:
+                # Buang cache dari versi model lama untuk file yang sama
+                for key in [k for k in list(explanation_cache)
+                            if k[0] == filename and k[1] != model_info['version']]:
+                    explanation_cache.pop(key, None)
+                
+                # Permutation importance: setiap fitur di-permute di worker process terpisah
+                with stage('permutation_importance'):
+                    importance = sklearn_inspection.permutation_importance(
+                        model, X_test_scaled, y_test,
+                        n_repeats=n_repeats, random_state=42, n_jobs=-1
+                    )
+                order = np.argsort(importance.importances_mean)[::-1]
+                feature_importance = [
+                    {
+                        "feature": feature_columns[i],
+                        "importance_mean": float(importance.importances_mean[i]),
+                        "importance_std": float(importance.importances_std[i])
+                    }
+                    for i in order
+                ]
+                
+                # Kontribusi linear (koefisien x nilai scaled) untuk semua baris sekaligus
+                contributions = None
+                logits = None
+                intercept = None
+                if hasattr(model, 'coef_'):
+                    # Binary: satu baris koefisien untuk kelas positif
+                    # Multiclass: kontribusi terhadap kelas yang diprediksi
+                    coef = model.coef_
+                    if coef.shape[0] == 1:
+                        contributions = X_test_scaled * coef[0]
+                        intercept = np.full(len(X_test_scaled), float(model.intercept_[0]))
+                    else:
+                        predicted = np.argmax(X_test_scaled @ coef.T + model.intercept_, axis=1)
+                        contributions = X_test_scaled * coef[predicted]
+                        intercept = model.intercept_[predicted]
+                    logits = contributions.sum(axis=1) + intercept
+                
+                cached = {
+                    "feature_importance": feature_importance,
+                    "contributions": contributions,
+                    "intercept": intercept,
+                    "logits": logits
+                }
+                explanation_cache[cache_key] = cached
+            
+            result = {
+                "model_version": model_info['version'],
+                "n_repeats": n_repeats,
+                "feature_columns": feature_columns,
+                "feature_importance": cached['feature_importance'],
+                "contributions": None
+            }
+            
+            if cached['contributions'] is not None:
+                end = min(offset + limit, len(cached['contributions']))
+                result["contributions"] = {
+                    "offset": offset,
+                    "total_rows": int(len(cached['contributions'])),
+                    "intercept": cached['intercept'][offset:end].tolist(),
+                    "logits": cached['logits'][offset:end].tolist(),
+                    "values": cached['contributions'][offset:end].tolist()
+                }
+            
+            return jsonify({"message": "Model explained successfully", "data": clean_dict(result)})
+            
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
 
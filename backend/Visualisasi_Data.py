@@ -3,31 +3,384 @@ Visualisasi Data - Generate visualizations
 Library yang digunakan:
 - pandas: Untuk manipulasi data
 - numpy: Untuk operasi numerik
-- matplotlib: Untuk static visualizations
-- seaborn: Untuk statistical visualizations
+- renderer: Untuk static visualizations (matplotlib/seaborn di worker process)
 - plotly: Untuk interactive visualizations
-- base64: Untuk encode image
-- io: Untuk BytesIO
 - json: Untuk JSON serialization
+- base64: Untuk typed-array encoding pada payload Plotly
+- cache: Untuk LRU cache hasil render (per versi dataset)
+- charts: Untuk menyimpan dan menyajikan gambar chart (PNG/SVG/WebP)
+- aggregation: Untuk density raster dan downsampling pada dataset besar
+- correlation: Untuk korelasi/asosiasi dari statistik yang di-cache per versi dataset
+- cube: Untuk agregasi per grup dari aggregation cube
+- sampling: Untuk sampel berstrata dan error bound pada dataset besar
 """
-from flask import request, jsonify
-import pandas as pd
+from flask import request, jsonify, Response
 import numpy as np
 import json
 import base64
-from io import BytesIO
-import matplotlib
-matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.graph_objects as go
-import plotly.express as px
-from utils import get_dataframe
+from utils import (get_snapshot, get_dataset_version, on_dataset_change, detect_target_column,
+                   reads_dataset, clean_dict)
+from cache import LRUCache
+from charts import parse_formats, store_chart
+from aggregation import use_density, grid_shape, density_grid, label_grid, downsample_line, box_stats
+from correlation import get_engine, CorrelationEngine
+from cube import get_cube
+from metrics import register_cache, stage
+import renderer
+import sampling
+from lazy import lazy_module
+
+pd = lazy_module('pandas')
+go = lazy_module('plotly.graph_objects', 'plotly')
+px = lazy_module('plotly.express', 'plotly')
+plotly_utils = lazy_module('plotly.utils', 'plotly')
+
+# Cache gambar hasil render ({format: bytes}),
+# key: (filename, versi dataset, plot_type, columns, hue_column, dpi, formats, render_mode, downsample)
+render_cache = register_cache('render', LRUCache(max_bytes=64 * 1024 * 1024,
+                                                 sizeof=lambda images: sum(len(b) for b in images.values())))
+
+# Rentang dpi yang diterima (dpi besar membuat render dan ukuran gambar membengkak)
+MIN_DPI = 20
+MAX_DPI = 300
+
+# Batas titik yang dikirim ke renderer untuk stripplot (lebih dari ini tidak terbaca di gambar)
+STRIPPLOT_MAX_POINTS = 5000
+
+@on_dataset_change
+def _invalidate_render_cache(filename, change):
+    """Buang semua hasil render dari versi dataset lama"""
+    render_cache.invalidate(lambda key: key[0] == filename)
+
+def _target_labels(series):
+    """Target numerik 0/1 ditampilkan sebagai No/Yes"""
+    if series.dtype == 'int64' or series.dtype == 'float64':
+        return series.map({0: 'No', 1: 'Yes'})
+    return series
+
+def encode_typed_arrays(obj):
+    """Ganti array numpy numerik dengan typed array plotly.js ({"dtype", "bdata"}) secara rekursif"""
+    if isinstance(obj, dict):
+        return {k: encode_typed_arrays(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [encode_typed_arrays(v) for v in obj]
+    if isinstance(obj, np.ndarray) and obj.dtype.kind in 'biuf':
+        arr = obj
+        if arr.dtype.kind in 'biu':
+            # plotly.js tidak mendukung int64, pakai tipe integer terkecil yang muat
+            lo, hi = (int(arr.min()), int(arr.max())) if arr.size else (0, 0)
+            for code in ('i1', 'u1', 'i2', 'u2', 'i4', 'u4'):
+                info = np.iinfo(np.dtype(code))
+                if info.min <= lo and hi <= info.max:
+                    arr = arr.astype(code)
+                    break
+            else:
+                arr = arr.astype('f8')
+        else:
+            arr = arr.astype('f8')
+        arr = arr.astype(arr.dtype.newbyteorder('<'), copy=False)
+        encoded = {"dtype": arr.dtype.str.lstrip('<|'),
+                   "bdata": base64.b64encode(arr.tobytes()).decode('ascii')}
+        if arr.ndim > 1:
+            encoded["shape"] = ','.join(str(n) for n in arr.shape)
+        return encoded
+    return obj
+
+class SharedAggregates:
+    """Agregasi per grup yang dipakai bersama oleh beberapa chart dalam satu request
+
+    Setiap kombinasi kolom grup hanya di-groupby sekali: countplot memakai ukuran grup (crosstab),
+    bar/line memakai sum/count measure pada grup yang sama. Jika filename/version diberikan dan
+    semua kolom grup berkardinalitas rendah, statistik diambil dari aggregation cube tanpa menyentuh baris.
+    """
+    
+    def __init__(self, df, filename=None, version=None):
+        self.df = df
+        self.filename = filename
+        self.version = version
+        self.target_col = detect_target_column(df)
+        self._measures = {}
+        self._stats = {}
+        self._box = {}
+    
+    def require(self, keys, measure=None):
+        """Daftarkan kebutuhan agregasi sebelum dihitung (planning)"""
+        needed = self._measures.setdefault(tuple(keys), set())
+        if measure and measure not in needed:
+            needed.add(measure)
+            self._stats.pop(tuple(keys), None)
+    
+    def plan(self, plot_type, columns, hue_column=None, render_mode='auto'):
+        """Daftarkan agregasi yang dibutuhkan satu chart"""
+        if hue_column and hue_column not in self.df.columns:
+            hue_column = None
+        if plot_type == 'bar' and len(columns) >= 2:
+            self.require([columns[0], hue_column] if hue_column else [columns[0]], columns[1])
+        elif plot_type == 'line' and len(columns) >= 2 and use_density(len(self.df), render_mode):
+            self.require([columns[0], hue_column] if hue_column else [columns[0]], columns[1])
+        elif plot_type == 'countplot':
+            for col in columns:
+                if col in self.df.columns:
+                    self.require([col, self.target_col] if self.target_col else [col])
+    
+    def group_stats(self, keys):
+        """DataFrame per grup berisi size, <measure>_count dan <measure>_sum"""
+        keys = tuple(keys)
+        if keys not in self._stats:
+            measures = sorted(self._measures.setdefault(keys, set()))
+            cube = get_cube(self.filename, self.version, self.df) if self.filename and self.version else None
+            if cube is not None and cube.covers(keys, measures):
+                columns = ['size'] + [f'{m}_{stat}' for m in measures for stat in ('count', 'sum')]
+                self._stats[keys] = cube.cuboid(keys)[columns]
+                return self._stats[keys]
+            grouped = self.df.groupby(list(keys))
+            stats = grouped.size().to_frame('size')
+            if measures:
+                agg = grouped[measures].agg(['count', 'sum'])
+                agg.columns = [f'{m}_{stat}' for m, stat in agg.columns]
+                stats = stats.join(agg)
+            self._stats[keys] = stats
+        return self._stats[keys]
+    
+    def mean(self, keys, measure):
+        """Mean measure per grup (dari sum/count yang sudah dihitung)"""
+        self.require(keys, measure)
+        stats = self.group_stats(keys)
+        return (stats[f'{measure}_sum'] / stats[f'{measure}_count']).rename(measure)
+    
+    def crosstab(self, col):
+        """Tabel frekuensi kolom x target (atau frekuensi kolom saja jika tidak ada target)"""
+        if not self.target_col:
+            return self.group_stats([col])['size'].sort_index().to_frame('count')
+        self.require([col, self.target_col])
+        table = self.group_stats([col, self.target_col])['size'].unstack(fill_value=0)
+        table.columns = _target_labels(pd.Series(table.columns, dtype=self.df[self.target_col].dtype)).tolist()
+        table.columns.name = self.target_col
+        return table
+    
+    def box_stats_by(self, cat_col, num_col):
+        """Statistik boxplot num_col per kategori cat_col"""
+        key = (cat_col, num_col)
+        if key not in self._box:
+            self._box[key] = [box_stats(group, str(name)) for name, group in self.df.groupby(cat_col)[num_col]]
+        return self._box[key]
+    
+    def correlation(self):
+        """Engine korelasi, dipakai ulang antar request selama versi dataset sama"""
+        if self.filename and self.version:
+            return get_engine(self.filename, self.version, self.df)
+        return CorrelationEngine(self.df)
+
+def build_visualization_spec(df, plot_type, columns, hue_column=None, dpi_value=75,
+                             render_mode='auto', downsample='lttb', aggregates=None):
+    """Agregasi data untuk satu chart dan return spec ringkas untuk renderer
+
+    aggregates (SharedAggregates) dipakai ulang jika beberapa chart dibuat dari data yang sama.
+    Raise ValueError jika kombinasi plot_type/kolom tidak valid.
+    """
+    if aggregates is None:
+        aggregates = SharedAggregates(df)
+    if hue_column and hue_column not in df.columns:
+        hue_column = None
+    
+    if plot_type == 'histogram':
+        if not columns:
+            columns = df.select_dtypes(include=[np.number]).columns.tolist()[:1]
+        if not columns:
+            raise ValueError("Tidak ada kolom numerik untuk histogram")
+        if not pd.api.types.is_numeric_dtype(df[columns[0]]) or pd.api.types.is_bool_dtype(df[columns[0]]):
+            raise ValueError(f"Kolom '{columns[0]}' harus numerik untuk histogram")
+        values = df[columns[0]].dropna().to_numpy()
+        counts, edges = np.histogram(values, bins=30)
+        return {"kind": "histogram", "column": columns[0], "counts": counts, "edges": edges}
+    
+    if plot_type == 'boxplot':
+        if not columns:
+            columns = df.select_dtypes(include=[np.number]).columns.tolist()[:1]
+        if not columns:
+            raise ValueError("Tidak ada kolom numerik untuk boxplot")
+        return {"kind": "boxplot", "column": columns[0], "stats": [box_stats(df[columns[0]], columns[0])]}
+    
+    if plot_type == 'correlation':
+        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        if not numeric_cols:
+            raise ValueError("Tidak ada kolom numerik untuk correlation matrix")
+        corr = aggregates.correlation().pearson(numeric_cols)
+        return {"kind": "heatmap", "figsize": (10, 8), "matrix": corr.to_numpy(),
+                "labels": corr.columns.tolist(), "title": 'Correlation Matrix'}
+    
+    if plot_type == 'scatter':
+        if len(columns) < 2:
+            raise ValueError("Scatter plot requires at least 2 columns")
+        x_col, y_col = columns[0], columns[1]
+        spec = {"kind": "scatter", "x_col": x_col, "y_col": y_col, "hue_column": hue_column}
+        if use_density(len(df), render_mode):
+            # Dataset besar: kirim raster per bin, bukan satu marker per baris
+            bins = grid_shape((10, 6), dpi_value)
+            if hue_column:
+                codes, _, x_edges, y_edges, hue_values = label_grid(
+                    df[x_col], df[y_col], df[hue_column].astype(str), bins)
+                spec.update(mode='hue_density', codes=codes, x_edges=x_edges, y_edges=y_edges,
+                            hue_values=hue_values.tolist())
+            else:
+                counts, x_edges, y_edges = density_grid(df[x_col], df[y_col], bins)
+                spec.update(mode='density', counts=counts, x_edges=x_edges, y_edges=y_edges)
+        elif hue_column:
+            spec.update(mode='hue_points', x=df[x_col].to_numpy(), y=df[y_col].to_numpy(),
+                        hue=df[hue_column].to_numpy())
+        else:
+            spec.update(mode='points', x=df[x_col].to_numpy(), y=df[y_col].to_numpy())
+        return spec
+    
+    if plot_type == 'bar':
+        if len(columns) < 2:
+            raise ValueError("Bar chart requires at least 2 columns")
+        x_col, y_col = columns[0], columns[1]
+        
+        # Optimize: Aggregasi data langsung tanpa sampling untuk performa lebih cepat
+        # Bar chart selalu perlu aggregation untuk performa optimal
+        if hue_column:
+            # Mean y_col per (x_col, hue_column)
+            keys = [x_col, hue_column]
+            plot_df = aggregates.mean(keys, y_col).reset_index()
+            # Batasi jumlah unique values di x_col untuk performa (maksimal 20)
+            if plot_df[x_col].nunique() > 20:
+                # Ambil top 20 berdasarkan frekuensi
+                top_x = aggregates.group_stats(keys)['size'].groupby(level=0).sum().nlargest(20).index
+                plot_df = plot_df[plot_df[x_col].isin(top_x)]
+            plot_df = plot_df.sort_values([x_col, hue_column])
+        else:
+            # Mean y_col per x_col
+            plot_df = aggregates.mean([x_col], y_col).reset_index()
+            # Batasi jumlah unique values untuk performa (maksimal 30)
+            if len(plot_df) > 30:
+                # Ambil top 30 berdasarkan frekuensi
+                top_x = aggregates.group_stats([x_col])['size'].nlargest(30).index
+                plot_df = plot_df[plot_df[x_col].isin(top_x)]
+            plot_df = plot_df.sort_values(x_col)
+        return {"kind": "bar", "x_col": x_col, "y_col": y_col, "hue_column": hue_column,
+                "data": plot_df.to_dict(orient='list')}
+    
+    if plot_type == 'line':
+        if len(columns) < 2:
+            raise ValueError("Line chart requires at least 2 columns")
+        x_col, y_col = columns[0], columns[1]
+        
+        if use_density(len(df), render_mode):
+            # Dataset besar: aggregate semua baris per nilai x, lalu downsample
+            # ke jumlah titik sesuai lebar gambar (LTTB / min-max) per kategori hue
+            group_cols = [x_col, hue_column] if hue_column else [x_col]
+            grouped = aggregates.mean(group_cols, y_col).reset_index().sort_values(by=x_col)
+            n_points = int(10 * dpi_value)
+            parts = []
+            for key, part in (grouped.groupby(hue_column) if hue_column else [(None, grouped)]):
+                if pd.api.types.is_numeric_dtype(part[x_col]):
+                    xs, ys = downsample_line(part[x_col].to_numpy(), part[y_col].to_numpy(), n_points, downsample)
+                    part = pd.DataFrame({x_col: xs, y_col: ys})
+                    if key is not None:
+                        part[hue_column] = key
+                parts.append(part)
+            plot_df = pd.concat(parts, ignore_index=True)
+        else:
+            # Optimize: Sample data if too large (>10000 rows)
+            plot_df = df[[x_col, y_col] + ([hue_column] if hue_column else [])]
+            if len(plot_df) > 10000:
+                plot_df = plot_df.sample(n=10000, random_state=42).sort_values(by=x_col)
+        
+        # For line chart, if x_col has too many unique values, aggregate
+        if plot_df[x_col].nunique() > 100:
+            # Group by x_col and calculate mean of y_col
+            if hue_column:
+                plot_df = plot_df.groupby([x_col, hue_column])[y_col].mean().reset_index()
+            else:
+                plot_df = plot_df.groupby(x_col)[y_col].mean().reset_index()
+            plot_df = plot_df.sort_values(by=x_col)
+        return {"kind": "line", "x_col": x_col, "y_col": y_col, "hue_column": hue_column,
+                "data": plot_df.to_dict(orient='list')}
+    
+    if plot_type == 'countplot':
+        # For categorical visualization
+        if not columns:
+            raise ValueError("Countplot requires at least one categorical column")
+        
+        # Detect target column for hue
+        target_col = aggregates.target_col
+        
+        panels = []
+        for col in columns:
+            if col not in df.columns:
+                continue
+            # Satu crosstab per kolom (kategori x target), renderer hanya menggambar bar
+            table = aggregates.crosstab(col)
+            panels.append({
+                "column": col,
+                "categories": table.index.tolist(),
+                "hue_values": table.columns.tolist(),
+                "counts": table.to_numpy()
+            })
+        n_rows = (len(panels) + 1) // 2
+        return {"kind": "countplot", "figsize": (15, 5 * max(n_rows, 1)), "panels": panels,
+                "target_col": target_col}
+    
+    if plot_type == 'boxplot_multi':
+        # For numeric vs categorical
+        if len(columns) < 2:
+            raise ValueError("Boxplot requires categorical and numeric columns")
+        
+        cat_col = columns[0]
+        num_cols = columns[1:]
+        
+        # Detect target for hue
+        target_col = aggregates.target_col
+        
+        panels = []
+        for num_col in num_cols:
+            if num_col not in df.columns or cat_col not in df.columns:
+                continue
+            if target_col:
+                # Stripplot memakai titik mentah, dibatasi STRIPPLOT_MAX_POINTS
+                strip_df = df[[cat_col, num_col, target_col]]
+                if len(strip_df) > STRIPPLOT_MAX_POINTS:
+                    strip_df = strip_df.sample(n=STRIPPLOT_MAX_POINTS, random_state=42)
+                panels.append({"num_col": num_col, "strip": {
+                    "x": strip_df[cat_col].to_numpy(),
+                    "y": strip_df[num_col].to_numpy(),
+                    "hue": _target_labels(strip_df[target_col]).astype(str).to_numpy()
+                }})
+            else:
+                panels.append({"num_col": num_col, "stats": aggregates.box_stats_by(cat_col, num_col)})
+        return {"kind": "boxplot_multi", "figsize": (5 * max(len(num_cols), 1), 5), "panels": panels,
+                "cat_col": cat_col, "target_col": target_col}
+    
+    raise ValueError(f"Unknown plot type: {plot_type}")
+
+def _analyze_error_bounds(sample, stats, numeric_cols):
+    """Ganti jumlah baris hasil sampel dengan estimasi data penuh, return error bound per statistik"""
+    frame = sample.df
+    bounds = {"missing_values": {}, "mean": {}, "quantiles": {}, "top_values": {}, "unique_count": {}}
+    for col in frame.columns:
+        missing = sample.total(frame[col].isnull().to_numpy())
+        bounds["missing_values"][col] = missing
+        stats["missing_values"][col] = int(round(missing["estimate"]))
+        stats["missing_percentage"][col] = round(missing["estimate"] / sample.n_rows * 100, 2)
+    for col in numeric_cols:
+        values = frame[col].to_numpy(dtype=float, na_value=np.nan)
+        bounds["mean"][col] = sample.mean(values)
+        bounds["quantiles"][col] = {f"{int(q * 100)}%": sample.quantile(values, q) for q in (0.25, 0.5, 0.75)}
+        stats["numeric_summary"][col]["count"] = float(round(sample.total(~np.isnan(values))["estimate"]))
+    for col, summary in stats["categorical_summary"].items():
+        top = {value: sample.total((frame[col] == value).to_numpy()) for value in summary["top_values"]}
+        bounds["top_values"][col] = top
+        summary["top_values"] = {value: int(round(b["estimate"])) for value, b in top.items()}
+        # Nilai unik di sampel adalah batas bawah nilai unik di data penuh
+        bounds["unique_count"][col] = {"lower_bound": summary["unique_count"]}
+    return bounds
 
 def register_routes(app):
     """Register routes untuk visualisasi data"""
     
     @app.route('/api/analyze', methods=['POST'])
+    @reads_dataset
     def analyze_data():
         """Analisis data dengan berbagai statistik menggunakan pandas dan numpy"""
         try:
@@ -37,7 +390,16 @@ def register_routes(app):
             if not filename:
                 return jsonify({"error": "Filename is required"}), 400
             
-            df = get_dataframe(filename, app.config['UPLOAD_FOLDER'])
+            # Read-only: statistik dihitung tanpa menyalin dataset
+            df, version = get_snapshot(filename, app.config['UPLOAD_FOLDER'])
+            try:
+                sample, refined = sampling.resolve(filename, version, df, data)
+            except ValueError as ve:
+                return jsonify({"error": str(ve)}), 400
+            if refined is not None:
+                return refined
+            # Dataset besar: statistik dari sampel berstrata, jumlah baris diestimasi ke data penuh
+            frame = sample.df if sample is not None else df
             
             # Basic statistics
             stats = {
@@ -47,29 +409,34 @@ def register_routes(app):
                 },
                 "columns": df.columns.tolist(),
                 "dtypes": df.dtypes.astype(str).to_dict(),
-                "missing_values": df.isnull().sum().to_dict(),
-                "missing_percentage": (df.isnull().sum() / len(df) * 100).round(2).to_dict(),
+                "missing_values": frame.isnull().sum().to_dict(),
+                "missing_percentage": (frame.isnull().sum() / len(frame) * 100).round(2).to_dict(),
                 "numeric_summary": {},
                 "categorical_summary": {}
             }
             
             # Numeric columns statistics
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+            numeric_cols = frame.select_dtypes(include=[np.number]).columns.tolist()
             if numeric_cols:
-                stats["numeric_summary"] = df[numeric_cols].describe().to_dict()
+                stats["numeric_summary"] = frame[numeric_cols].describe().to_dict()
             
             # Categorical columns summary
-            categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+            categorical_cols = frame.select_dtypes(include=['object']).columns.tolist()
             if categorical_cols:
                 for col in categorical_cols:
                     stats["categorical_summary"][col] = {
-                        "unique_count": int(df[col].nunique()),
-                        "top_values": df[col].value_counts().head(5).to_dict()
+                        "unique_count": int(frame[col].nunique()),
+                        "top_values": frame[col].value_counts().head(5).to_dict()
                     }
             
+            if sample is not None:
+                stats["sampling"] = clean_dict(sampling.report(sample, filename, version, data,
+                                                               _analyze_error_bounds(sample, stats, numeric_cols)))
+            
             # Preview processed data
-            df_processed = df.where(pd.notnull(df), None)
-            stats["preview"] = df_processed.head(10).to_dict(orient='records')
+            df_processed = df.head(10)
+            df_processed = df_processed.where(pd.notnull(df_processed), None)
+            stats["preview"] = df_processed.to_dict(orient='records')
             
             return jsonify({"message": "Data analyzed successfully", "data": stats})
             
@@ -77,6 +444,7 @@ def register_routes(app):
             return jsonify({"error": str(e)}), 500
     
     @app.route('/api/visualize', methods=['POST'])
+    @reads_dataset
     def visualize_data():
         """Generate visualizations menggunakan matplotlib dan seaborn"""
         try:
@@ -85,267 +453,274 @@ def register_routes(app):
             plot_type = data.get('plot_type', 'histogram')
             columns = data.get('columns', [])
             hue_column = data.get('hue_column', None)
+            render_mode = data.get('render_mode', 'auto')  # 'auto', 'points' atau 'density'
+            downsample = data.get('downsample', 'lttb')  # 'lttb' atau 'minmax' untuk line chart
             
             if not filename:
                 return jsonify({"error": "Filename is required"}), 400
             
-            df = get_dataframe(filename, app.config['UPLOAD_FOLDER'])
-            
-            # Set style
-            sns.set_style("whitegrid")
-            plt.rcParams['figure.figsize'] = (10, 6)
-            
-            if plot_type == 'histogram':
-                if not columns:
-                    columns = df.select_dtypes(include=[np.number]).columns.tolist()[:1]
-                if columns:
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    df[columns[0]].hist(ax=ax, bins=30)
-                    ax.set_title(f'Histogram of {columns[0]}')
-                    ax.set_xlabel(columns[0])
-                    ax.set_ylabel('Frequency')
-            
-            elif plot_type == 'boxplot':
-                if not columns:
-                    columns = df.select_dtypes(include=[np.number]).columns.tolist()[:1]
-                if columns:
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    df.boxplot(column=columns[0], ax=ax)
-                    ax.set_title(f'Boxplot of {columns[0]}')
-            
-            elif plot_type == 'correlation':
-                numeric_df = df.select_dtypes(include=[np.number])
-                if len(numeric_df.columns) > 0:
-                    fig, ax = plt.subplots(figsize=(10, 8))
-                    sns.heatmap(numeric_df.corr(), annot=True, fmt='.2f', ax=ax, cmap='coolwarm')
-                    ax.set_title('Correlation Matrix')
-            
-            elif plot_type == 'scatter':
-                if len(columns) >= 2:
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    x_col, y_col = columns[0], columns[1]
-                    if hue_column and hue_column in df.columns:
-                        sns.scatterplot(data=df, x=x_col, y=y_col, hue=hue_column, ax=ax, alpha=0.7)
-                    else:
-                        ax.scatter(df[x_col], df[y_col], alpha=0.7)
-                    ax.set_xlabel(x_col)
-                    ax.set_ylabel(y_col)
-                    ax.set_title(f'Scatter Plot: {x_col} vs {y_col}')
-                    if hue_column:
-                        ax.legend(title=hue_column)
-                else:
-                    return jsonify({"error": "Scatter plot requires at least 2 columns"}), 400
-            
-            elif plot_type == 'bar':
-                if len(columns) >= 2:
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    x_col, y_col = columns[0], columns[1]
-                    
-                    # Optimize: Aggregasi data langsung tanpa sampling untuk performa lebih cepat
-                    # Bar chart selalu perlu aggregation untuk performa optimal
-                    if hue_column and hue_column in df.columns:
-                        # Group by x_col dan hue_column, hitung mean y_col
-                        plot_df = df.groupby([x_col, hue_column])[y_col].mean().reset_index()
-                        # Batasi jumlah unique values di x_col untuk performa (maksimal 20)
-                        if plot_df[x_col].nunique() > 20:
-                            # Ambil top 20 berdasarkan frekuensi
-                            top_x = df[x_col].value_counts().head(20).index
-                            plot_df = plot_df[plot_df[x_col].isin(top_x)]
-                    else:
-                        # Group by x_col saja, hitung mean y_col
-                        plot_df = df.groupby(x_col)[y_col].mean().reset_index()
-                        # Batasi jumlah unique values untuk performa (maksimal 30)
-                        if len(plot_df) > 30:
-                            # Ambil top 30 berdasarkan frekuensi
-                            top_x = df[x_col].value_counts().head(30).index
-                            plot_df = plot_df[plot_df[x_col].isin(top_x)]
-                    
-                    # Sort untuk visualisasi yang lebih rapi
-                    if hue_column and hue_column in plot_df.columns:
-                        plot_df = plot_df.sort_values([x_col, hue_column])
-                    else:
-                        plot_df = plot_df.sort_values(x_col)
-                    
-                    # Gunakan seaborn dengan data yang sudah di-aggregate (lebih cepat)
-                    if hue_column and hue_column in plot_df.columns:
-                        sns.barplot(data=plot_df, x=x_col, y=y_col, hue=hue_column, ax=ax, errorbar=None, palette='Set2')
-                    else:
-                        sns.barplot(data=plot_df, x=x_col, y=y_col, ax=ax, errorbar=None, color='steelblue')
-                    
-                    ax.set_xlabel(x_col, fontsize=10)
-                    ax.set_ylabel(y_col, fontsize=10)
-                    ax.set_title(f'Bar Chart: {y_col} vs {x_col}', fontsize=12, fontweight='bold')
-                    if hue_column:
-                        ax.legend(title=hue_column, fontsize=9)
-                    # Rotate x-axis labels untuk readability
-                    if plot_df[x_col].nunique() > 5:
-                        plt.xticks(rotation=45, ha='right', fontsize=8)
-                    else:
-                        plt.xticks(rotation=0, fontsize=9)
-                else:
-                    return jsonify({"error": "Bar chart requires at least 2 columns"}), 400
-            
-            elif plot_type == 'line':
-                if len(columns) >= 2:
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    x_col, y_col = columns[0], columns[1]
-                    
-                    # Optimize: Sample data if too large (>10000 rows)
-                    plot_df = df.copy()
-                    if len(plot_df) > 10000:
-                        plot_df = plot_df.sample(n=10000, random_state=42).sort_values(by=x_col)
-                    
-                    # For line chart, if x_col has too many unique values, aggregate
-                    if plot_df[x_col].nunique() > 100:
-                        # Group by x_col and calculate mean of y_col
-                        if hue_column and hue_column in plot_df.columns:
-                            plot_df = plot_df.groupby([x_col, hue_column])[y_col].mean().reset_index()
-                        else:
-                            plot_df = plot_df.groupby(x_col)[y_col].mean().reset_index()
-                        plot_df = plot_df.sort_values(by=x_col)
-                    
-                    if hue_column and hue_column in plot_df.columns:
-                        sns.lineplot(data=plot_df, x=x_col, y=y_col, hue=hue_column, ax=ax, marker='o', markersize=3)
-                    else:
-                        sns.lineplot(data=plot_df, x=x_col, y=y_col, ax=ax, marker='o', markersize=3)
-                    ax.set_xlabel(x_col)
-                    ax.set_ylabel(y_col)
-                    ax.set_title(f'Line Chart: {x_col} vs {y_col}')
-                    if hue_column:
-                        ax.legend(title=hue_column)
-                    # Rotate x-axis labels if too many
-                    if plot_df[x_col].nunique() > 20:
-                        plt.xticks(rotation=45, ha='right')
-                else:
-                    return jsonify({"error": "Line chart requires at least 2 columns"}), 400
+            try:
+                # Reduce DPI lebih agresif untuk bar chart dan line chart (60 untuk performa lebih cepat)
+                try:
+                    dpi_value = int(data.get('dpi') or (60 if plot_type in ['bar', 'line'] else 75))
+                except (TypeError, ValueError):
+                    raise ValueError("dpi harus berupa bilangan bulat")
+                if not MIN_DPI <= dpi_value <= MAX_DPI:
+                    raise ValueError(f"dpi harus antara {MIN_DPI} dan {MAX_DPI}")
+                formats = parse_formats(data.get('formats'))
+                use_density(0, render_mode)
+                if downsample not in ('lttb', 'minmax'):
+                    raise ValueError("downsample harus 'lttb' atau 'minmax'")
+            except ValueError as ve:
+                return jsonify({"error": str(ve)}), 400
             
-            elif plot_type == 'countplot':
-                # For categorical visualization
-                if not columns:
-                    return jsonify({"error": "Countplot requires at least one categorical column"}), 400
-                
-                n_cols = min(2, len(columns))
-                n_rows = (len(columns) + n_cols - 1) // n_cols
-                fig, axes = plt.subplots(n_rows, n_cols, figsize=(15, 5*n_rows))
-                
-                if n_rows == 1 and n_cols == 1:
-                    axes = [axes]
-                elif n_rows == 1:
-                    axes = list(axes)
-                else:
-                    axes = axes.ravel()
-                
-                # Detect target column for hue
-                possible_targets = ['Churn', 'churn', 'HeartDisease', 'heart_disease', 'target', 'Target']
-                target_col = None
-                for t in possible_targets:
-                    if t in df.columns:
-                        target_col = t
-                        break
-                
-                colors = ['#0343DF', '#75BB4F']
-                
-                for idx, col in enumerate(columns):
-                    if col not in df.columns:
-                        continue
-                    
-                    if target_col and target_col in df.columns:
-                        # Map target values if needed
-                        plot_df = df.copy()
-                        if df[target_col].dtype == 'int64' or df[target_col].dtype == 'float64':
-                            plot_df[target_col] = plot_df[target_col].map({0: 'No', 1: 'Yes'})
-                        
-                        sns.countplot(data=plot_df, x=col, hue=target_col, palette=colors, 
-                                    edgecolor='black', ax=axes[idx])
+            # Read-only: build_visualization_spec tidak mengubah dataframe
+            df, version = get_snapshot(filename, app.config['UPLOAD_FOLDER'])
+            try:
+                sample, refined = sampling.resolve(filename, version, df, data)
+            except ValueError as ve:
+                return jsonify({"error": str(ve)}), 400
+            if refined is not None:
+                return refined
+            
+            # Cek cache render dulu (key data penuh sama dengan /api/dashboard; chart dari sampel di-cache terpisah)
+            cache_key = (filename, version, plot_type, tuple(columns), hue_column, dpi_value, tuple(formats),
+                         render_mode, downsample) + (('sample',) if sample is not None else ())
+            images = render_cache.get(cache_key)
+            cached = images is not None
+            
+            if not cached:
+                try:
+                    if sample is not None:
+                        # Agregasi dari baris sampel saja (bukan cube/korelasi data penuh)
+                        spec = build_visualization_spec(sample.df, plot_type, columns, hue_column, dpi_value,
+                                                        render_mode, downsample, SharedAggregates(sample.df))
                     else:
-                        sns.countplot(data=df, x=col, edgecolor='black', ax=axes[idx])
-                    
-                    axes[idx].set_title(f'{col}')
-                    axes[idx].tick_params(axis='x', rotation=45)
-                    
-                    # Add labels on bars
-                    for container in axes[idx].containers:
-                        axes[idx].bar_label(container)
+                        spec = build_visualization_spec(df, plot_type, columns, hue_column, dpi_value,
+                                                        render_mode, downsample,
+                                                        SharedAggregates(df, filename, version))
+                except ValueError as ve:
+                    return jsonify({"error": str(ve)}), 400
                 
-                # Remove unused subplots
-                for idx in range(len(columns), len(axes)):
-                    fig.delaxes(axes[idx])
-                
-                plt.tight_layout()
+                # Render di worker process, response hanya berisi URL gambar
+                images = renderer.render(spec, formats, bbox_inches='tight', dpi=dpi_value, facecolor='white')
+                render_cache.put(cache_key, images)
             
-            elif plot_type == 'boxplot_multi':
-                # For numeric vs categorical
-                if len(columns) < 2:
-                    return jsonify({"error": "Boxplot requires categorical and numeric columns"}), 400
-                
-                cat_col = columns[0]
-                num_cols = columns[1:]
-                n_cols = len(num_cols)
-                
-                fig, axes = plt.subplots(nrows=1, ncols=n_cols, figsize=(5*n_cols, 5))
-                if n_cols == 1:
-                    axes = [axes]
+            image_urls = store_chart(images)
+            
+            result = {
+                "image": image_urls['png'],
+                "images": image_urls,
+                "plot_type": plot_type,
+                "cached": cached
+            }
+            if sample is not None:
+                bounds = sample.column_bounds(columns + ([hue_column] if hue_column else []))
+                result["sampling"] = clean_dict(sampling.report(sample, filename, version, data, bounds))
+            
+            return jsonify({
+                "message": "Visualization generated successfully",
+                "data": result
+            })
+            
+        except Exception as e:
+            import traceback
+            return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
+    
+    @app.route('/api/dashboard', methods=['POST'])
+    @reads_dataset
+    def visualize_dashboard():
+        """Generate banyak chart sekaligus dari satu pass data (agregasi dipakai bersama)"""
+        try:
+            data = request.get_json()
+            filename = data.get('filename')
+            charts = data.get('charts', [])
+            
+            if not filename:
+                return jsonify({"error": "Filename is required"}), 400
+            
+            if not charts:
+                return jsonify({"error": "Charts are required"}), 400
+            
+            try:
+                formats = parse_formats(data.get('formats'))
+            except ValueError as ve:
+                return jsonify({"error": str(ve)}), 400
+            
+            # Normalisasi dan validasi spec setiap panel (default sama dengan /api/visualize);
+            # panel yang tidak valid hanya menandai error di panel itu sendiri
+            panels = []
+            for chart in charts:
+                plot_type = chart.get('plot_type', 'histogram')
+                panel = {
+                    "plot_type": plot_type,
+                    "columns": chart.get('columns', []),
+                    "hue_column": chart.get('hue_column'),
+                    "render_mode": chart.get('render_mode', 'auto'),
+                    "downsample": chart.get('downsample', 'lttb')
+                }
+                try:
+                    try:
+                        panel["dpi"] = int(chart.get('dpi') or (60 if plot_type in ['bar', 'line'] else 75))
+                    except (TypeError, ValueError):
+                        raise ValueError("dpi harus berupa bilangan bulat")
+                    if not MIN_DPI <= panel["dpi"] <= MAX_DPI:
+                        raise ValueError(f"dpi harus antara {MIN_DPI} dan {MAX_DPI}")
+                    use_density(0, panel["render_mode"])
+                    if panel["downsample"] not in ('lttb', 'minmax'):
+                        raise ValueError("downsample harus 'lttb' atau 'minmax'")
+                    panel["cache_key"] = (plot_type, tuple(panel["columns"]), panel["hue_column"], panel["dpi"],
+                                          tuple(formats), panel["render_mode"], panel["downsample"])
+                except (TypeError, ValueError) as e:
+                    panel["error"] = str(e)
+                panels.append(panel)
+            
+            # Panel yang sudah ada di cache render tidak perlu menyentuh data
+            results = [None] * len(panels)
+            version = get_dataset_version(filename)
+            pending = []
+            for idx, panel in enumerate(panels):
+                if "error" in panel:
+                    results[idx] = {"error": panel["error"]}
+                    continue
+                images = render_cache.get((filename, version) + panel["cache_key"]) if version else None
+                if images is not None:
+                    results[idx] = {"images": images, "cached": True}
+                else:
+                    pending.append(idx)
+            
+            if pending:
+                df, version = get_snapshot(filename, app.config['UPLOAD_FOLDER'])
                 
-                colors = ['#0343DF', '#75BB4F']
+                # Planning: kumpulkan semua agregasi yang dibutuhkan, lalu hitung sekali per grup
+                aggregates = SharedAggregates(df, filename, version)
+                for idx in pending:
+                    panel = panels[idx]
+                    aggregates.plan(panel["plot_type"], panel["columns"], panel["hue_column"], panel["render_mode"])
                 
-                for i, num_col in enumerate(num_cols):
-                    if num_col not in df.columns or cat_col not in df.columns:
+                specs = []
+                for idx in pending:
+                    panel = panels[idx]
+                    try:
+                        spec = build_visualization_spec(df, panel["plot_type"], panel["columns"], panel["hue_column"],
+                                                        panel["dpi"], panel["render_mode"], panel["downsample"],
+                                                        aggregates=aggregates)
+                    except (ValueError, KeyError) as e:
+                        results[idx] = {"error": str(e)}
                         continue
-                    
-                    # Detect target for hue
-                    possible_targets = ['Churn', 'churn', 'HeartDisease', 'heart_disease', 'target', 'Target']
-                    target_col = None
-                    for t in possible_targets:
-                        if t in df.columns:
-                            target_col = t
-                            break
-                    
-                    if target_col and target_col in df.columns:
-                        plot_df = df.copy()
-                        if df[target_col].dtype == 'int64' or df[target_col].dtype == 'float64':
-                            plot_df[target_col] = plot_df[target_col].map({0: 'No', 1: 'Yes'})
-                        sns.stripplot(data=plot_df, x=cat_col, y=num_col, hue=target_col, 
-                                     palette=colors, ax=axes[i])
-                        axes[i].legend(title=target_col)
-                    else:
-                        sns.boxplot(data=df, x=cat_col, y=num_col, ax=axes[i])
-                    
-                    axes[i].set_title(f'{num_col} vs {cat_col}')
-                    axes[i].tick_params(axis='x', rotation=45)
+                    spec["savefig"] = {"dpi": panel["dpi"]}
+                    specs.append((idx, spec))
                 
-                plt.tight_layout()
+                # Semua panel dirender paralel di worker pool
+                rendered = renderer.render_many([spec for _, spec in specs], formats,
+                                                bbox_inches='tight', facecolor='white')
+                for (idx, _), images in zip(specs, rendered):
+                    render_cache.put((filename, version) + panels[idx]["cache_key"], images)
+                    results[idx] = {"images": images, "cached": False}
             
-            else:
-                return jsonify({"error": f"Unknown plot type: {plot_type}"}), 400
-            
-            # Convert plot to base64 with optimized settings
-            img_buffer = BytesIO()
-            # Reduce DPI lebih agresif untuk bar chart dan line chart (60 untuk performa lebih cepat)
-            dpi_value = 60 if plot_type in ['bar', 'line'] else 75
-            plt.savefig(img_buffer, format='png', bbox_inches='tight', dpi=dpi_value, facecolor='white')
-            img_buffer.seek(0)
-            img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-            plt.close('all')  # Close all figures untuk free memory
-            # Clear figure to free memory
-            plt.clf()
-            # Force garbage collection untuk bar chart yang berat
-            if plot_type in ['bar', 'line']:
-                import gc
-                gc.collect()
+            charts_result = []
+            for panel, res in zip(panels, results):
+                item = {"plot_type": panel["plot_type"], "columns": panel["columns"]}
+                if "error" in res:
+                    item["error"] = res["error"]
+                else:
+                    image_urls = store_chart(res["images"])
+                    item.update(image=image_urls['png'], images=image_urls, cached=res["cached"])
+                charts_result.append(item)
             
             return jsonify({
-                "message": "Visualization generated successfully",
-                "data": {
-                    "image": f"data:image/png;base64,{img_base64}",
-                    "plot_type": plot_type
-                }
+                "message": "Dashboard generated successfully",
+                "data": {"charts": charts_result}
             })
             
         except Exception as e:
             import traceback
             return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
     
+    @app.route('/api/visualize/cache-stats', methods=['GET'])
+    def visualize_cache_stats():
+        """Statistik cache render visualisasi (hit rate, ukuran, eviction)"""
+        return jsonify({"message": "Cache stats retrieved successfully", "data": render_cache.stats()})
+
+    @app.route('/api/correlation', methods=['POST'])
+    @reads_dataset
+    def correlation_matrix():
+        """Matriks korelasi (Pearson) atau asosiasi campuran (Pearson, eta, Cramér's V) untuk subset kolom"""
+        try:
+            data = request.get_json()
+            filename = data.get('filename')
+            columns = data.get('columns') or None
+            method = data.get('method', 'pearson')
+
+            if not filename:
+                return jsonify({"error": "Filename is required"}), 400
+            if method not in ('pearson', 'all'):
+                return jsonify({"error": "method harus 'pearson' atau 'all'"}), 400
+
+            df, version = get_snapshot(filename, app.config['UPLOAD_FOLDER'])
+            engine = get_engine(filename, version, df)
+
+            if method == 'pearson':
+                unknown = [col for col in (columns or []) if col not in engine.numeric_columns]
+                if unknown:
+                    return jsonify({"error": f"Kolom bukan numerik atau tidak ditemukan: {', '.join(unknown)}"}), 400
+                matrix = engine.pearson(columns)
+                methods, skipped = None, []
+            else:
+                matrix, methods, skipped = engine.association(columns)
+
+            result = {
+                "columns": matrix.columns.tolist(),
+                "matrix": matrix.round(4).astype(object).where(matrix.notna(), None).values.tolist(),
+                "method": method,
+                "skipped_columns": skipped
+            }
+            if methods is not None:
+                result["pair_methods"] = methods.values.tolist()
+
+            return jsonify({"message": "Correlation computed successfully", "data": result})
+
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/grouped-summary', methods=['POST'])
+    @reads_dataset
+    def grouped_summary():
+        """Ringkasan per grup (count, mean, std, min, max) dari aggregation cube"""
+        try:
+            data = request.get_json()
+            filename = data.get('filename')
+            group_by = data.get('group_by', [])
+            measures = data.get('measures', [])
+
+            if not filename:
+                return jsonify({"error": "Filename is required"}), 400
+            if not group_by:
+                return jsonify({"error": "group_by is required"}), 400
+
+            df, version = get_snapshot(filename, app.config['UPLOAD_FOLDER'])
+            cube = get_cube(filename, version, df)
+            measures = measures or cube.measures
+            if not cube.covers(group_by, measures):
+                return jsonify({
+                    "error": "Kolom group_by harus berkardinalitas rendah dan measures harus numerik",
+                    "dimensions": cube.dimensions,
+                    "measures": cube.measures
+                }), 400
+
+            summary = cube.summary(group_by, measures).reset_index()
+            summary = summary.astype(object).where(summary.notna(), None)
+            return jsonify({"message": "Grouped summary generated successfully", "data": {
+                "group_by": group_by,
+                "measures": measures,
+                "rows": summary.to_dict(orient='records')
+            }})
+
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
     @app.route('/api/plotly', methods=['POST'])
+    @reads_dataset
     def plotly_visualize():
         """Generate interactive visualizations menggunakan Plotly"""
         try:
@@ -353,37 +728,75 @@ def register_routes(app):
             filename = data.get('filename')
             plot_type = data.get('plot_type', 'scatter')
             columns = data.get('columns', [])
+            bins = int(data.get('bins', 30))
             
             if not filename:
                 return jsonify({"error": "Filename is required"}), 400
             
-            df = get_dataframe(filename, app.config['UPLOAD_FOLDER'])
+            # Read-only: figure dibangun dari snapshot tanpa mengubah dataframe
+            df, version = get_snapshot(filename, app.config['UPLOAD_FOLDER'])
             
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+            # Pakai kolom dari request jika ada, jika tidak pilih kolom numerik otomatis
+            for col in columns:
+                if col not in df.columns:
+                    return jsonify({"error": f"Column {col} not found"}), 400
+                if not pd.api.types.is_numeric_dtype(df[col]):
+                    return jsonify({"error": f"Column {col} must be numeric"}), 400
+            numeric_cols = columns or df.select_dtypes(include=[np.number]).columns.tolist()
             
             if plot_type == 'scatter' and len(numeric_cols) >= 2:
-                fig = px.scatter(df, x=numeric_cols[0], y=numeric_cols[1])
+                x_col, y_col = numeric_cols[0], numeric_cols[1]
+                if use_density(len(df), data.get('render_mode', 'auto')):
+                    # Dataset besar: kirim grid density (ukuran tetap), bukan satu marker per baris
+                    counts, x_edges, y_edges = density_grid(df[x_col], df[y_col], bins=(200, 120))
+                    fig = go.Figure(go.Heatmap(
+                        x=(x_edges[:-1] + x_edges[1:]) / 2,
+                        y=(y_edges[:-1] + y_edges[1:]) / 2,
+                        z=np.where(counts > 0, counts, np.nan),
+                        colorscale='Viridis',
+                        colorbar={"title": "Jumlah data"}
+                    ))
+                else:
+                    fig = go.Figure(go.Scatter(x=df[x_col].to_numpy(), y=df[y_col].to_numpy(), mode='markers'))
+                fig.update_layout(xaxis_title=x_col, yaxis_title=y_col)
             elif plot_type == 'histogram' and numeric_cols:
-                fig = px.histogram(df, x=numeric_cols[0])
+                # Histogram dihitung di server, browser hanya menerima count per bin
+                col = numeric_cols[0]
+                counts, edges = np.histogram(df[col].dropna().to_numpy(), bins=bins)
+                fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=float(edges[1] - edges[0]),
+                                       name=col))
+                fig.update_layout(xaxis_title=col, yaxis_title='count', bargap=0)
             elif plot_type == 'box' and numeric_cols:
-                fig = px.box(df, y=numeric_cols[0])
+                # Statistik box (kuartil, fence, outlier unik) dihitung di server
+                col = numeric_cols[0]
+                stats = box_stats(df[col], col)
+                fig = go.Figure(go.Box(
+                    name=col,
+                    q1=[stats['q1']], median=[stats['med']], q3=[stats['q3']],
+                    lowerfence=[stats['whislo']], upperfence=[stats['whishi']],
+                    mean=[float(df[col].mean())]
+                ))
+                if len(stats['fliers']):
+                    fig.add_trace(go.Scatter(x=np.full(len(stats['fliers']), col, dtype=object), y=stats['fliers'],
+                                             mode='markers', name='outliers', showlegend=False))
+                fig.update_layout(yaxis_title=col)
             elif plot_type == 'correlation' and len(numeric_cols) > 1:
-                corr_matrix = df[numeric_cols].corr()
+                corr_matrix = get_engine(filename, version, df).pearson(numeric_cols)
                 fig = px.imshow(corr_matrix, text_auto=True, aspect="auto")
             else:
                 return jsonify({"error": "Invalid plot type or insufficient columns"}), 400
             
-            # Convert to JSON
-            fig_json = fig.to_json()
-            
-            return jsonify({
-                "message": "Plotly visualization generated successfully",
-                "data": {
-                    "plot": json.loads(fig_json),
-                    "plot_type": plot_type
+            # Serialisasi sekali: array numerik dikirim sebagai typed array base64
+            with stage('serialize'):
+                payload = {
+                    "message": "Plotly visualization generated successfully",
+                    "data": {
+                        "plot": encode_typed_arrays(fig.to_plotly_json()),
+                        "plot_type": plot_type
+                    }
                 }
-            })
+                body = json.dumps(payload, separators=(',', ':'), cls=plotly_utils.PlotlyJSONEncoder)
+            return Response(body, mimetype='application/json')
             
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-
@@ -0,0 +1,140 @@
+"""
+Aggregation - Reduksi data untuk rendering chart pada dataset besar
+Library yang digunakan:
+- numpy: Untuk binning 2D (density raster), statistik boxplot dan downsampling line chart (LTTB / min-max)
+
+Di atas LARGE_DATA_THRESHOLD baris, scatter dan cluster plot digambar sebagai raster density
+dan line chart di-downsample, sehingga waktu render mengikuti jumlah pixel output, bukan jumlah baris.
+"""
+import numpy as np
+
+LARGE_DATA_THRESHOLD = 50_000
+RENDER_MODES = ('auto', 'points', 'density')
+
+
+def use_density(n_rows, render_mode='auto', threshold=LARGE_DATA_THRESHOLD):
+    """Tentukan apakah chart digambar sebagai density raster"""
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"render_mode harus salah satu dari: {', '.join(RENDER_MODES)}")
+    if render_mode == 'auto':
+        return n_rows > threshold
+    return render_mode == 'density'
+
+
+def grid_shape(figsize, dpi, cell_px=3):
+    """Jumlah bin (x, y) berdasarkan ukuran output dalam pixel"""
+    width_px, height_px = figsize[0] * dpi, figsize[1] * dpi
+    return max(int(width_px // cell_px), 10), max(int(height_px // cell_px), 10)
+
+
+def _finite(*arrays):
+    arrays = [np.asarray(a, dtype=float) for a in arrays]
+    mask = np.ones(len(arrays[0]), dtype=bool)
+    for a in arrays:
+        mask &= np.isfinite(a)
+    return [a[mask] for a in arrays], mask
+
+
+def density_grid(x, y, bins):
+    """Histogram 2D: return (counts[y, x], x_edges, y_edges)"""
+    (x, y), _ = _finite(x, y)
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    return counts.T, x_edges, y_edges
+
+
+def label_grid(x, y, labels, bins):
+    """Label mayoritas per bin (untuk cluster/hue plot)
+
+    Return (codes[y, x], counts[y, x], x_edges, y_edges, unique_labels), codes adalah indeks ke
+    unique_labels dan bin kosong berisi NaN.
+    """
+    (x, y), mask = _finite(x, y)
+    labels = np.asarray(labels)[mask]
+    unique_labels, codes = np.unique(labels, return_inverse=True)
+    x_edges = np.histogram_bin_edges(x, bins=bins[0])
+    y_edges = np.histogram_bin_edges(y, bins=bins[1])
+
+    # Satu histogram per label, lalu ambil label dengan count terbesar di setiap bin
+    per_label = np.stack([
+        np.histogram2d(x[codes == i], y[codes == i], bins=(x_edges, y_edges))[0].T
+        for i in range(len(unique_labels))
+    ])
+    counts = per_label.sum(axis=0)
+    majority = per_label.argmax(axis=0).astype(float)
+    majority[counts == 0] = np.nan
+    return majority, counts, x_edges, y_edges, unique_labels
+
+
+def box_stats(values, label=''):
+    """Statistik boxplot (format Axes.bxp, whisker 1.5 IQR) tanpa mengirim semua nilai ke renderer"""
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return {"label": label, "med": np.nan, "q1": np.nan, "q3": np.nan,
+                "whislo": np.nan, "whishi": np.nan, "fliers": np.array([])}
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    fliers = values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)]
+    return {
+        "label": label,
+        "med": med,
+        "q1": q1,
+        "q3": q3,
+        "whislo": inside.min() if len(inside) else q1,
+        "whishi": inside.max() if len(inside) else q3,
+        # Outlier dengan nilai sama tergambar di posisi yang sama, cukup kirim nilai unik
+        "fliers": np.unique(fliers)
+    }
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling, x harus sudah terurut"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Luas segitiga (titik terpilih sebelumnya, kandidat, rata-rata bucket berikutnya)
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return x[selected], y[selected]
+
+
+def minmax_downsample(x, y, n_buckets):
+    """Ambil titik minimum dan maksimum y di setiap bucket x, x harus sudah terurut"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= 2 * n_buckets:
+        return x, y
+
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    # Urutkan per (bucket, y): elemen pertama tiap bucket = minimum, terakhir = maksimum
+    bucket_ids = np.repeat(np.arange(n_buckets), np.diff(edges))
+    order = np.lexsort((y, bucket_ids))
+    first = order[starts]
+    last = order[edges[1:] - 1]
+    selected = np.unique(np.concatenate([first, last]))
+    return x[selected], y[selected]
+
+
+def downsample_line(x, y, n_out, method='lttb'):
+    """Downsample line chart dengan metode 'lttb' atau 'minmax'"""
+    if method == 'minmax':
+        return minmax_downsample(x, y, max(n_out // 2, 1))
+    if method == 'lttb':
+        return lttb(x, y, n_out)
+    raise ValueError("downsample harus 'lttb' atau 'minmax'")
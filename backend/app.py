@@ -1,23 +1,62 @@
 """
 Main Application - Menggabungkan semua modul
+
+Registrasi route hanya meng-import Flask dan numpy; pandas, scikit-learn dan plotly dimuat saat
+pertama dipakai (lihat lazy.py). Set PREWARM_IMPORTS=0 untuk mematikan import di background.
+
+Pool worker render/clustering memakai start method spawn yang menjalankan ulang modul ini di setiap
+worker, jadi di level modul tidak ada import route maupun prewarm: semuanya ada di create_app() dan
+blok __main__ (worker baru hanya memuat library yang dibutuhkan initializer-nya).
 """
-from Home import app
-from Input_Data import register_routes as register_input_routes
-from Preprocessing_Data import register_routes as register_preprocessing_routes
-from Test_Data import register_routes as register_test_routes
-from Visualisasi_Data import register_routes as register_visualization_routes
-from Analisis_Lanjutan import register_routes as register_advanced_analysis_routes
+import time
+_started = time.perf_counter()
+
 import os
 
-# Register semua routes
-register_input_routes(app)
-register_preprocessing_routes(app)
-register_test_routes(app)
-register_visualization_routes(app)
-register_advanced_analysis_routes(app)
+
+def create_app():
+    """Register semua routes ke Flask app dan catat durasi startup"""
+    from Home import app
+    from Input_Data import register_routes as register_input_routes
+    from Preprocessing_Data import register_routes as register_preprocessing_routes
+    from Test_Data import register_routes as register_test_routes
+    from Visualisasi_Data import register_routes as register_visualization_routes
+    from Analisis_Lanjutan import register_routes as register_advanced_analysis_routes
+    from charts import register_routes as register_chart_routes
+    from query import register_routes as register_query_routes
+    from sampling import register_routes as register_sampling_routes
+    from metrics import register_routes as register_metrics_routes
+    import lazy
+
+    # Register semua routes (metrics pertama supaya instrumentasi aktif di semua route)
+    register_metrics_routes(app)
+    register_input_routes(app)
+    register_preprocessing_routes(app)
+    register_test_routes(app)
+    register_visualization_routes(app)
+    register_advanced_analysis_routes(app)
+    register_chart_routes(app)
+    register_query_routes(app)
+    register_sampling_routes(app)
+
+    lazy.mark_started(_started)
+    app.logger.info("Startup %.3fs (%d modul)", lazy.startup["seconds"], lazy.startup["modules"])
+    return app
+
 
 if __name__ == '__main__':
+    import lazy
+    import renderer
+
+    app = create_app()
     UPLOAD_FOLDER = 'uploads'
     if not os.path.exists(UPLOAD_FOLDER):
         os.makedirs(UPLOAD_FOLDER)
-    app.run(debug=True, port=5000)
+    # Library berat di-import di background supaya request pertama tidak menunggu import
+    if os.environ.get('PREWARM_IMPORTS', '1') == '1':
+        lazy.prewarm()
+    # Siapkan worker render (matplotlib/seaborn di-import di background)
+    renderer.get_pool()
+    print(f"Startup: {lazy.startup['seconds']:.3f}s, library berat dimuat di background")
+    # Request read-only berjalan paralel di thread; mutasi dataset diserialisasi per dataset (utils.RWLock)
+    app.run(debug=True, port=5000, threaded=True)
@@ -0,0 +1,239 @@
+"""
+Benchmark - Mengukur performa setiap endpoint API pada ukuran data yang berbeda
+Library yang digunakan:
+- pandas: Untuk membaca schema dataset dan menulis dataset sintetis
+- numpy: Untuk generate data sintetis
+- Flask test client: Untuk memanggil endpoint tanpa server/network
+
+Contoh:
+    python benchmark.py --sizes 7k,100k
+    python benchmark.py --sizes 7k,100k --save-baseline
+    python benchmark.py --sizes 7k,100k --baseline benchmark_baseline.json
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import pandas as pd
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_FILE = os.path.join(BACKEND_DIR, '..', 'Dataset Akdat.csv')
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, 'benchmark_baseline.json')
+SIZE_ALIASES = {'7k': 7_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+# Urutan stage mengikuti alur aplikasi: eksplorasi dulu, baru preprocessing dan modelling
+STAGES = [
+    ('upload', None),
+    ('analyze', ('/api/analyze', {})),
+    ('visualize_histogram', ('/api/visualize', {'plot_type': 'histogram', 'columns': ['MonthlyCharges']})),
+    ('visualize_bar', ('/api/visualize', {'plot_type': 'bar', 'columns': ['Contract', 'MonthlyCharges'], 'hue_column': 'Churn'})),
+    ('visualize_correlation', ('/api/visualize', {'plot_type': 'correlation'})),
+    ('plotly_histogram', ('/api/plotly', {'plot_type': 'histogram'})),
+    ('association_rules', ('/api/association-rules', {'min_support': 0.1, 'min_confidence': 0.5})),
+    ('preprocess', ('/api/preprocess', {'options': {'label_encode': True}})),
+    ('identify_features', ('/api/identify-features', {})),
+    ('detect_outliers', ('/api/detect-outliers', {'column': 'MonthlyCharges'})),
+    ('split', ('/api/split', {'target_column': 'Churn'})),
+    ('train_model', ('/api/train-model', {})),
+    ('explain', ('/api/explain', {})),
+    ('clustering', ('/api/clustering', {'method': 'kmeans', 'n_clusters': 3, 'columns': ['tenure', 'MonthlyCharges']})),
+]
+
+
+def parse_size(text):
+    """Parse ukuran seperti '7k', '1M' atau '25000'"""
+    key = text.strip().lower()
+    if key in SIZE_ALIASES:
+        return SIZE_ALIASES[key]
+    if key.endswith('k'):
+        return int(float(key[:-1]) * 1_000)
+    if key.endswith('m'):
+        return int(float(key[:-1]) * 1_000_000)
+    return int(key)
+
+
+def generate_dataset(n_rows, path, seed=42, chunk_size=500_000):
+    """Generate dataset sintetis dengan schema dan distribusi marginal yang sama seperti Dataset Akdat.csv"""
+    schema_df = pd.read_csv(SCHEMA_FILE)
+    rng = np.random.default_rng(seed)
+
+    # Distribusi empiris per kolom (nilai unik + probabilitas)
+    distributions = {}
+    for col in schema_df.columns:
+        if schema_df[col].nunique() == len(schema_df):
+            distributions[col] = None  # Kolom ID, dibuat unik per baris
+        else:
+            counts = schema_df[col].value_counts(dropna=False, normalize=True)
+            distributions[col] = (counts.index.to_numpy(), counts.to_numpy())
+
+    written = 0
+    with open(path, 'w', newline='') as f:
+        while written < n_rows:
+            size = min(chunk_size, n_rows - written)
+            chunk = {}
+            for col, dist in distributions.items():
+                if dist is None:
+                    ids = np.arange(written, written + size)
+                    chunk[col] = [f"{i % 10000:04d}-SYN{i // 10000:05d}" for i in ids]
+                else:
+                    values, probs = dist
+                    chunk[col] = values[rng.choice(len(values), size=size, p=probs)]
+            pd.DataFrame(chunk, columns=schema_df.columns).to_csv(f, index=False, header=(written == 0))
+            written += size
+    return path
+
+
+def current_rss_bytes():
+    """RSS proses saat ini (Linux /proc), fallback ke peak RSS dari getrusage"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakRSSSampler:
+    """Sampling RSS di background thread untuk mendapatkan peak RSS per stage"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak = current_rss_bytes()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss_bytes())
+            time.sleep(self.interval)
+
+
+def run_stages(client, filename, csv_path, stages):
+    """Jalankan semua stage secara berurutan dan catat wall time, peak RSS, dan ukuran response"""
+    results = {}
+    for name, spec in STAGES:
+        if stages and name not in stages:
+            continue
+        with PeakRSSSampler() as sampler:
+            start = time.perf_counter()
+            if spec is None:
+                with open(csv_path, 'rb') as f:
+                    response = client.post('/api/upload', data={'file': (f, filename)},
+                                           content_type='multipart/form-data')
+            else:
+                url, payload = spec
+                response = client.post(url, json={'filename': filename, **payload})
+            body = response.get_data()
+            elapsed = time.perf_counter() - start
+        results[name] = {
+            "status": response.status_code,
+            "wall_time": round(elapsed, 4),
+            "peak_rss_mb": round(sampler.peak / (1024 * 1024), 1),
+            "response_bytes": len(body)
+        }
+        if response.status_code != 200:
+            results[name]["error"] = (response.get_json(silent=True) or {}).get('error')
+        print(f"  {name:<24} {response.status_code}  {elapsed:9.3f}s  "
+              f"{results[name]['peak_rss_mb']:9.1f} MB  {len(body):>12,d} B", flush=True)
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Bandingkan hasil dengan baseline, kembalikan daftar stage yang melambat"""
+    regressions = []
+    for size, stages in results.items():
+        for name, current in stages.items():
+            previous = baseline.get(size, {}).get(name)
+            if not previous or previous.get("status") != 200 or current["status"] != 200:
+                continue
+            if current["wall_time"] > previous["wall_time"] * (1 + tolerance):
+                regressions.append((size, name, previous["wall_time"], current["wall_time"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark endpoint API PREDICTEL dengan dataset sintetis")
+    parser.add_argument('--sizes', default='7k,100k', help="Ukuran dataset, contoh: 7k,100k,1M,10M")
+    parser.add_argument('--stages', default='', help="Subset stage (dipisah koma), default semua")
+    parser.add_argument('--output', default=None, help="Simpan hasil ke file JSON")
+    parser.add_argument('--baseline', default=None, help="File baseline untuk perbandingan regresi")
+    parser.add_argument('--save-baseline', action='store_true', help="Simpan hasil sebagai baseline baru")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Toleransi perlambatan (0.2 = 20%%)")
+    parser.add_argument('--keep-data', action='store_true', help="Jangan hapus dataset sintetis")
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    workdir = tempfile.mkdtemp(prefix='predictel-bench-')
+
+    # Import app setelah pindah ke workdir supaya folder uploads tidak mengotori repo
+    sys.path.insert(0, BACKEND_DIR)
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from app import create_app
+        app = create_app()
+        app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+        client = app.test_client()
+
+        results = {}
+        for size_text in args.sizes.split(','):
+            n_rows = parse_size(size_text)
+            label = size_text.strip()
+            filename = f"bench_{n_rows}.csv"
+            csv_path = os.path.join(workdir, filename)
+            print(f"[{label}] generating {n_rows:,d} rows...", flush=True)
+            start = time.perf_counter()
+            generate_dataset(n_rows, csv_path)
+            print(f"[{label}] generated in {time.perf_counter() - start:.2f}s", flush=True)
+            results[label] = run_stages(client, filename, csv_path, stages)
+            if not args.keep_data:
+                os.remove(csv_path)
+    finally:
+        os.chdir(previous_cwd)
+        if not args.keep_data:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        path = args.baseline or DEFAULT_BASELINE
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline disimpan ke {path}")
+        return 0
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("Regresi performa terdeteksi:")
+            for size, name, before, after in regressions:
+                print(f"  [{size}] {name}: {before:.3f}s -> {after:.3f}s")
+            return 1
+        print("Tidak ada regresi dibanding baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Charts - Menyimpan gambar chart hasil render dan menyajikannya sebagai binary (PNG/SVG/WebP)
+dengan ETag sehingga browser bisa memakai cache (304 Not Modified)
+Library yang digunakan:
+- hashlib: Untuk ID chart dan ETag berbasis isi gambar
+"""
+from flask import request, jsonify, make_response
+import hashlib
+from cache import LRUCache
+from metrics import register_cache
+
+CHART_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'webp': 'image/webp'
+}
+
+# Chart disimpan per chart_id (hash isi PNG), value: {format: bytes}
+chart_store = register_cache('chart_store', LRUCache(max_bytes=128 * 1024 * 1024, sizeof=lambda images: sum(len(b) for b in images.values())))
+
+
+def parse_formats(formats):
+    """Validasi daftar format dari request, PNG selalu disertakan"""
+    formats = [f.lower() for f in (formats or [])]
+    unknown = [f for f in formats if f not in CHART_FORMATS]
+    if unknown:
+        raise ValueError(f"Format tidak didukung: {', '.join(unknown)}. Gunakan {', '.join(CHART_FORMATS)}")
+    return ['png'] + [f for f in dict.fromkeys(formats) if f != 'png']
+
+
+def store_chart(images):
+    """Simpan gambar ke chart store dan return dict URL per format"""
+    chart_id = hashlib.sha256(images['png']).hexdigest()[:32]
+    chart_store.put(chart_id, images)
+    return {fmt: f"/api/charts/{chart_id}.{fmt}" for fmt in images}
+
+
+def register_routes(app):
+    """Register routes untuk menyajikan gambar chart"""
+
+    @app.route('/api/charts/<chart_id>.<fmt>', methods=['GET'])
+    def get_chart(chart_id, fmt):
+        """Ambil gambar chart dalam bentuk binary dengan dukungan If-None-Match"""
+        if fmt not in CHART_FORMATS:
+            return jsonify({"error": f"Format {fmt} tidak didukung"}), 400
+
+        images = chart_store.get(chart_id)
+        if images is None or fmt not in images:
+            return jsonify({"error": "Chart tidak ditemukan atau sudah kadaluarsa. Silakan generate ulang."}), 404
+
+        body = images[fmt]
+        response = make_response(body)
+        response.headers['Content-Type'] = CHART_FORMATS[fmt]
+        # Isi chart tidak pernah berubah untuk chart_id yang sama
+        response.headers['Cache-Control'] = 'public, max-age=86400, immutable'
+        response.set_etag(hashlib.sha256(body).hexdigest())
+        return response.make_conditional(request)
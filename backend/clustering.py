@@ -0,0 +1,587 @@
+"""
+Clustering - Komputasi clustering yang dipakai ulang antar request
+Library yang digunakan:
+- numpy: Untuk matriks fitur yang sudah di-scale
+- scikit-learn: KMeans / MiniBatchKMeans dan silhouette score
+- concurrent.futures: ProcessPoolExecutor untuk sweep beberapa nilai k secara paralel
+
+Matriks fitur (StandardScaler) disimpan per (filename, versi dataset, kolom), sehingga pemilihan k,
+clustering ulang dan evaluasi tidak men-scale data lagi. Di atas MINIBATCH_THRESHOLD baris,
+KMeans diganti MiniBatchKMeans. Set CLUSTER_WORKERS=0 untuk sweep di process yang sama.
+Silhouette dihitung per blok jarak dengan memori terbatas; di atas SILHOUETTE_EXACT_THRESHOLD baris
+nilainya diestimasi dari sampel berstrata per cluster beserta confidence interval.
+DBSCAN memakai index KD/ball-tree yang di-cache per matriks, estimasi eps dari kurva k-distance,
+dan query neighborhood per chunk di thread pool (query tree scikit-learn melepas GIL).
+Model yang sudah di-fit (beserta scaler) disimpan per dataset untuk assignment data baru per chunk.
+Data campuran (numerik + kategorikal) di-cluster dengan k-prototypes di atas jarak Gower.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import itertools
+import multiprocessing
+import threading
+import os
+import numpy as np
+from cache import LRUCache
+from utils import on_dataset_change
+from metrics import register_cache
+from shared_matrix import shared, as_array
+from lazy import lazy_module
+
+pd = lazy_module('pandas')
+sklearn_cluster = lazy_module('sklearn.cluster', 'clustering')
+sklearn_metrics = lazy_module('sklearn.metrics', 'clustering')
+sklearn_neighbors = lazy_module('sklearn.neighbors', 'clustering')
+sklearn_preprocessing = lazy_module('sklearn.preprocessing', 'preprocessing')
+
+CLUSTER_WORKERS = int(os.environ.get('CLUSTER_WORKERS', min(4, os.cpu_count() or 1)))
+MINIBATCH_THRESHOLD = 50_000
+SILHOUETTE_SAMPLE_SIZE = 10_000
+# Silhouette exact (semua baris) sampai batas ini, di atasnya estimasi dari sampel berstrata
+SILHOUETTE_EXACT_THRESHOLD = 10_000
+SILHOUETTE_STRATIFIED_SAMPLE_SIZE = 2_000
+SILHOUETTE_MODES = ('auto', 'exact', 'sample')
+# Batas memori blok jarak (baris x semua titik) saat menghitung silhouette
+DISTANCE_BLOCK_BYTES = 64 * 1024 * 1024
+RANDOM_STATE = 42
+NEIGHBOR_WORKERS = int(os.environ.get('NEIGHBOR_WORKERS', os.cpu_count() or 1))
+# Jumlah pasangan neighbor maksimal yang diproses sekaligus per chunk DBSCAN
+NEIGHBOR_BLOCK_PAIRS = 4_000_000
+EPS_SAMPLE_SIZE = 20_000
+# KD-tree efektif untuk dimensi rendah, di atas ini pakai ball-tree
+KD_TREE_MAX_DIM = 15
+
+# Baris per chunk saat assignment data baru ke cluster
+ASSIGN_CHUNK_SIZE = 50_000
+
+# Model clustering terakhir per dataset, key: filename
+cluster_models = {}
+_model_versions = itertools.count(1)
+
+# Matriks hasil scaling per (filename, versi dataset, kolom)
+scaled_cache = register_cache('scaled_matrix', LRUCache(max_bytes=256 * 1024 * 1024,
+                                                        sizeof=lambda entry: entry["X"].nbytes + entry["index"].nbytes))
+
+# Index neighbor (KD/ball-tree) per (filename, versi dataset, kolom), tree menyimpan salinan data + index
+neighbor_index_cache = register_cache('neighbor_index', LRUCache(max_bytes=256 * 1024 * 1024,
+                                                                 sizeof=lambda tree: tree.get_arrays()[0].nbytes * 2))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+@on_dataset_change
+def _invalidate_scaled_cache(filename, change):
+    """Matriks dari versi dataset lama tidak dipakai lagi"""
+    scaled_cache.invalidate(lambda key: key[0] == filename)
+    neighbor_index_cache.invalidate(lambda key: key[0] == filename)
+
+
+def get_scaled_matrix(filename, version, df, columns):
+    """Matriks fitur yang sudah di-scale untuk kolom tertentu (baris dengan NaN dibuang)
+
+    Return dict {"X": ndarray, "scaler": StandardScaler, "index": index baris asal}.
+    """
+    key = (filename, version, tuple(columns))
+    entry = scaled_cache.get(key) if version else None
+    if entry is None:
+        X = df[columns].dropna()
+        scaler = sklearn_preprocessing.StandardScaler()
+        entry = {
+            "X": np.ascontiguousarray(scaler.fit_transform(X)),
+            "scaler": scaler,
+            "index": X.index.to_numpy()
+        }
+        if version:
+            scaled_cache.put(key, entry)
+    return entry
+
+
+def make_kmeans(n_clusters, n_rows):
+    """KMeans untuk data kecil, MiniBatchKMeans di atas MINIBATCH_THRESHOLD baris"""
+    if n_rows > MINIBATCH_THRESHOLD:
+        return sklearn_cluster.MiniBatchKMeans(n_clusters=n_clusters, random_state=RANDOM_STATE, n_init=3,
+                               batch_size=4096)
+    return sklearn_cluster.KMeans(n_clusters=n_clusters, random_state=RANDOM_STATE, n_init=10)
+
+
+def silhouette_sample_indices(n_rows, sample_size=SILHOUETTE_SAMPLE_SIZE):
+    """Indeks sampel tetap (sama untuk semua k) supaya kurva silhouette bisa dibandingkan"""
+    if n_rows <= sample_size:
+        return None
+    return np.sort(np.random.default_rng(RANDOM_STATE).choice(n_rows, size=sample_size, replace=False))
+
+
+def evaluate_k(X, n_clusters, sample_idx=None):
+    """Fit satu kandidat k dan return inertia serta silhouette (pada sampel)
+
+    X boleh berupa SharedMatrix: worker meng-attach matriks dari shared memory tanpa copy.
+    """
+    X = as_array(X)
+    model = make_kmeans(n_clusters, len(X))
+    labels = model.fit_predict(X)
+    X_eval, labels_eval = (X, labels) if sample_idx is None else (X[sample_idx], labels[sample_idx])
+    silhouette = sklearn_metrics.silhouette_score(X_eval, labels_eval) if len(np.unique(labels_eval)) > 1 else None
+    return {
+        "k": int(n_clusters),
+        "inertia": float(model.inertia_),
+        "silhouette": float(silhouette) if silhouette is not None else None
+    }
+
+
+def silhouette_values(X, labels, rows=None, block_bytes=DISTANCE_BLOCK_BYTES):
+    """Silhouette per titik untuk baris `rows` terhadap seluruh data, dihitung per blok
+
+    Setiap blok hanya menyimpan jarak (blok x n) lalu dijumlahkan per cluster dengan satu perkalian
+    matriks, sehingga memori dibatasi block_bytes, bukan n x n. Cluster berisi satu titik bernilai 0
+    (sama seperti sklearn).
+    """
+    X = np.asarray(X, dtype=float)
+    _, codes = np.unique(labels, return_inverse=True)
+    n_clusters = codes.max() + 1
+    sizes = np.bincount(codes, minlength=n_clusters)
+    onehot = np.zeros((len(X), n_clusters))
+    onehot[np.arange(len(X)), codes] = 1.0
+    sq_norms = np.einsum('ij,ij->i', X, X)
+
+    rows = np.arange(len(X)) if rows is None else np.asarray(rows)
+    block = max(block_bytes // (8 * max(len(X), 1)), 1)
+    values = np.empty(len(rows))
+    for start in range(0, len(rows), block):
+        idx = rows[start:start + block]
+        dist = sq_norms[idx, None] + sq_norms[None, :] - 2 * (X[idx] @ X.T)
+        np.sqrt(np.maximum(dist, 0, out=dist), out=dist)
+        sums = dist @ onehot
+        own = codes[idx]
+        own_size = sizes[own]
+        a = sums[np.arange(len(idx)), own] / np.maximum(own_size - 1, 1)
+        mean_other = sums / sizes
+        mean_other[np.arange(len(idx)), own] = np.inf
+        b = mean_other.min(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            s = (b - a) / np.maximum(a, b)
+        values[start:start + len(idx)] = np.where(own_size > 1, np.nan_to_num(s), 0.0)
+    return values
+
+
+def stratified_sample(labels, sample_size, seed=RANDOM_STATE):
+    """Sampel proporsional per cluster (minimal 2 titik per cluster jika tersedia)"""
+    rng = np.random.default_rng(seed)
+    _, codes = np.unique(labels, return_inverse=True)
+    sizes = np.bincount(codes)
+    allocation = np.minimum(np.maximum(np.round(sample_size * sizes / len(labels)).astype(int), 2), sizes)
+    strata = []
+    for c, take in enumerate(allocation):
+        members = np.flatnonzero(codes == c)
+        strata.append(rng.choice(members, size=take, replace=False))
+    return strata, sizes
+
+
+def silhouette(X, labels, mode='auto', sample_size=SILHOUETTE_STRATIFIED_SAMPLE_SIZE):
+    """Silhouette score dengan memori terbatas
+
+    mode 'exact' menghitung semua baris (per blok), 'sample' mengestimasi dari sampel berstrata per
+    cluster (silhouette setiap titik sampel tetap dihitung terhadap seluruh data) dengan confidence
+    interval 95%, 'auto' memilih 'exact' sampai SILHOUETTE_EXACT_THRESHOLD baris.
+    Return dict {score, mode, n_evaluated, ci_low, ci_high} atau None jika kurang dari 2 cluster.
+    """
+    if mode not in SILHOUETTE_MODES:
+        raise ValueError(f"silhouette_mode harus salah satu dari: {', '.join(SILHOUETTE_MODES)}")
+    labels = np.asarray(labels)
+    if len(np.unique(labels)) < 2:
+        return None
+    if mode == 'auto':
+        mode = 'exact' if len(X) <= SILHOUETTE_EXACT_THRESHOLD else 'sample'
+    if mode == 'sample' and sample_size >= len(X):
+        mode = 'exact'
+
+    if mode == 'exact':
+        score = float(silhouette_values(X, labels).mean())
+        return {"score": score, "mode": mode, "n_evaluated": int(len(X)), "ci_low": score, "ci_high": score}
+
+    strata, sizes = stratified_sample(labels, sample_size)
+    values = silhouette_values(X, labels, np.concatenate(strata))
+
+    # Estimator berstrata: mean tertimbang ukuran cluster, variance dengan finite population correction
+    weights = sizes / sizes.sum()
+    score, variance, offset = 0.0, 0.0, 0
+    for weight, size, members in zip(weights, sizes, strata):
+        part = values[offset:offset + len(members)]
+        offset += len(members)
+        score += weight * part.mean()
+        if len(part) > 1:
+            variance += weight ** 2 * part.var(ddof=1) / len(part) * (1 - len(part) / size)
+    margin = 1.96 * np.sqrt(variance)
+    return {"score": float(score), "mode": mode, "n_evaluated": int(len(values)),
+            "ci_low": float(score - margin), "ci_high": float(score + margin)}
+
+
+def _init_worker():
+    """Import scikit-learn sekali per worker"""
+    import sklearn.cluster  # noqa: F401
+    import sklearn.metrics  # noqa: F401
+
+
+def get_pool():
+    """Pool worker clustering (dibuat sekali saat pertama dipakai)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None and CLUSTER_WORKERS > 0:
+            _pool = ProcessPoolExecutor(max_workers=CLUSTER_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_init_worker)
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def sweep_k(X, k_values, share_key=None):
+    """Evaluasi semua kandidat k secara paralel, return list hasil evaluate_k terurut per k
+
+    Matriks dikirim ke worker lewat shared memory (sekali per share_key, mis. (filename, versi,
+    kolom)), bukan di-pickle untuk setiap kandidat k.
+    """
+    sample_idx = silhouette_sample_indices(len(X))
+    pool = get_pool()
+    if pool is None:
+        return [evaluate_k(X, k, sample_idx) for k in k_values]
+    try:
+        with shared(share_key, X) as handle:
+            futures = [pool.submit(evaluate_k, handle, k, sample_idx) for k in k_values]
+            return [future.result() for future in futures]
+    except BrokenProcessPool:
+        shutdown_pool()
+        return [evaluate_k(X, k, sample_idx) for k in k_values]
+
+
+def elbow_k(results):
+    """Titik elbow: k dengan jarak terbesar ke garis antara titik pertama dan terakhir kurva inertia"""
+    if len(results) < 3:
+        return results[0]["k"] if results else None
+    k = np.array([r["k"] for r in results], dtype=float)
+    inertia = np.array([r["inertia"] for r in results], dtype=float)
+    # Normalisasi kedua sumbu ke [0, 1] supaya jarak tidak didominasi skala inertia
+    k_norm = (k - k[0]) / (k[-1] - k[0])
+    span = inertia[0] - inertia[-1]
+    if span <= 0:
+        return int(k[0])
+    inertia_norm = (inertia - inertia[-1]) / span
+    distance = (1 - k_norm) - inertia_norm
+    return int(k[np.argmax(distance)])
+
+
+def recommend_k(results):
+    """Rekomendasi k: silhouette tertinggi, fallback ke elbow jika silhouette tidak tersedia"""
+    scored = [r for r in results if r["silhouette"] is not None]
+    elbow = elbow_k(results)
+    if not scored:
+        return elbow, elbow, None
+    best = max(scored, key=lambda r: r["silhouette"])["k"]
+    return best, elbow, best
+
+
+def get_neighbor_index(filename, version, columns, X):
+    """KD-tree (atau ball-tree untuk dimensi tinggi) atas matriks yang sudah di-scale"""
+    key = (filename, version, tuple(columns))
+    tree = neighbor_index_cache.get(key) if version else None
+    if tree is None:
+        tree = build_index(X)
+        if version:
+            neighbor_index_cache.put(key, tree)
+    return tree
+
+
+def _map_chunks(fn, chunks, workers=None):
+    """Jalankan fn per chunk di thread pool, hasil dikembalikan berurutan dengan jumlah chunk
+    yang sedang diproses dibatasi (memori tidak menampung hasil semua chunk sekaligus)"""
+    workers = workers or NEIGHBOR_WORKERS
+    if workers <= 1:
+        for chunk in chunks:
+            yield fn(chunk)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for chunk in chunks:
+            pending.append(executor.submit(fn, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def k_distance_curve(tree, X, k, sample_size=EPS_SAMPLE_SIZE, chunk_size=5_000):
+    """Jarak ke tetangga ke-k (termasuk titik itu sendiri, sama seperti min_samples DBSCAN), terurut naik"""
+    rows = np.arange(len(X))
+    if len(X) > sample_size:
+        rows = np.sort(np.random.default_rng(RANDOM_STATE).choice(len(X), size=sample_size, replace=False))
+    k = min(k, len(X))
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    distances = np.concatenate(list(_map_chunks(lambda idx: tree.query(X[idx], k=k)[0][:, -1], chunks)))
+    return np.sort(distances)
+
+
+def estimate_eps(distances):
+    """eps dari knee kurva k-distance: titik dengan jarak terbesar di bawah garis ujung-ke-ujung"""
+    if len(distances) < 3 or distances[-1] <= distances[0]:
+        return float(distances[-1]) if len(distances) else None
+    x = np.linspace(0, 1, len(distances))
+    y = (distances - distances[0]) / (distances[-1] - distances[0])
+    return float(distances[np.argmax(x - y)])
+
+
+def _find_roots(parent, nodes):
+    """Root union-find untuk banyak node sekaligus (pointer jumping)"""
+    roots = parent[nodes]
+    while True:
+        next_roots = parent[roots]
+        if np.array_equal(next_roots, roots):
+            return roots
+        roots = next_roots
+
+
+def _union(parent, a, b):
+    """Gabungkan komponen setiap pasangan (a, b), root terkecil menjadi root gabungan"""
+    while len(a):
+        ra, rb = _find_roots(parent, a), _find_roots(parent, b)
+        differ = ra != rb
+        if not differ.any():
+            break
+        ra, rb = ra[differ], rb[differ]
+        np.minimum.at(parent, np.maximum(ra, rb), np.minimum(ra, rb))
+        a, b = a[differ], b[differ]
+    # Path compression supaya pencarian root berikutnya pendek
+    parent[:] = _find_roots(parent, np.arange(len(parent)))
+
+
+def _pair_chunks(counts, rows=None):
+    """Bagi baris menjadi chunk dengan total pasangan neighbor <= NEIGHBOR_BLOCK_PAIRS"""
+    rows = np.arange(len(counts)) if rows is None else rows
+    cumulative = np.cumsum(counts[rows])
+    bounds = np.searchsorted(cumulative, np.arange(NEIGHBOR_BLOCK_PAIRS, cumulative[-1] + NEIGHBOR_BLOCK_PAIRS,
+                                                   NEIGHBOR_BLOCK_PAIRS)) if len(rows) else []
+    start = 0
+    for end in bounds:
+        end = max(int(end), start + 1)
+        if start < len(rows):
+            yield rows[start:end]
+        start = end
+    if start < len(rows):
+        yield rows[start:]
+
+
+def dbscan(tree, X, eps, min_samples):
+    """DBSCAN dengan memori terbatas di atas index yang sudah ada
+
+    1. Hitung jumlah neighbor setiap titik (count_only) untuk menentukan core point.
+    2. Gabungkan core point yang bertetangga dengan union-find, chunk demi chunk.
+    3. Border point ikut cluster core point terdekat dalam radius eps, sisanya noise (-1).
+    Return (labels, core_mask).
+    """
+    n = len(X)
+    count_chunks = [np.arange(i, min(i + 10_000, n)) for i in range(0, n, 10_000)]
+    counts = np.concatenate(list(_map_chunks(lambda idx: tree.query_radius(X[idx], eps, count_only=True),
+                                             count_chunks)))
+    core = counts >= min_samples
+    core_rows = np.flatnonzero(core)
+    labels = np.full(n, -1, dtype=np.int64)
+    if len(core_rows) == 0:
+        return labels, core
+
+    def core_edges(idx):
+        neighbors = tree.query_radius(X[idx], eps)
+        src = np.repeat(idx, [len(nb) for nb in neighbors])
+        dst = np.concatenate(neighbors)
+        keep = core[dst] & (src < dst)
+        return src[keep], dst[keep]
+
+    parent = np.arange(n)
+    for src, dst in _map_chunks(core_edges, _pair_chunks(counts, core_rows)):
+        _union(parent, src, dst)
+
+    roots = parent[core_rows]
+    _, cluster_ids = np.unique(roots, return_inverse=True)
+    # Nomor cluster mengikuti urutan kemunculan core point pertama (seperti sklearn)
+    first_seen = np.unique(cluster_ids, return_index=True)[1]
+    relabel = np.empty(len(first_seen), dtype=np.int64)
+    relabel[np.argsort(first_seen)] = np.arange(len(first_seen))
+    labels[core_rows] = relabel[cluster_ids]
+
+    # Border point: core point terdekat dalam radius eps
+    border_rows = np.flatnonzero(~core & (counts > 1))
+    if len(border_rows):
+        labels[border_rows] = assign_to_core(X[border_rows], build_index(X[core_rows]), labels[core_rows], eps)
+    return labels, core
+
+
+def build_index(X):
+    """KD-tree untuk dimensi rendah, ball-tree untuk dimensi tinggi"""
+    return sklearn_neighbors.KDTree(X) if X.shape[1] <= KD_TREE_MAX_DIM else sklearn_neighbors.BallTree(X)
+
+
+def assign_to_core(points, core_tree, core_labels, eps, chunk_size=10_000):
+    """Label core point terdekat untuk setiap titik, -1 jika tidak ada core point dalam radius eps"""
+    chunks = [np.arange(i, min(i + chunk_size, len(points))) for i in range(0, len(points), chunk_size)]
+    assigned = []
+    for dist, idx in _map_chunks(lambda rows: core_tree.query(points[rows], k=1), chunks):
+        assigned.append(np.where(dist[:, 0] <= eps, core_labels[idx[:, 0]], -1))
+    return np.concatenate(assigned) if assigned else np.array([], dtype=np.int64)
+
+
+def save_model(filename, dataset_version, method, columns, scaler, **params):
+    """Simpan model clustering hasil fit (menggantikan model sebelumnya untuk dataset ini)
+
+    KMeans menyimpan centers (ruang scaled); DBSCAN menyimpan core points, label dan eps;
+    k-prototypes menyimpan encoding data campuran dan prototype.
+    """
+    model = {
+        "method": method,
+        "columns": list(columns),
+        "scaler": scaler,
+        "dataset_version": dataset_version,
+        "version": next(_model_versions),
+        **params
+    }
+    cluster_models[filename] = model
+    return model
+
+
+def assign_clusters(model, X_scaled):
+    """Label cluster untuk baris baru yang sudah di-scale dengan scaler model
+
+    Untuk k-prototypes, X_scaled berupa tuple (numerik ternormalisasi, code kategorikal).
+    """
+    if model["method"] == 'kprototypes':
+        num, cat = X_scaled
+        return gower_distances(num, cat, model["proto_num"], model["proto_cat"]).argmin(axis=1)
+    if model["method"] == 'kmeans':
+        # Centroid terdekat: ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2 (||x||^2 sama untuk semua c)
+        centers = model["centers"]
+        scores = (centers ** 2).sum(axis=1) - 2 * (X_scaled @ centers.T)
+        return scores.argmin(axis=1)
+    if "core_index" not in model:
+        model["core_index"] = build_index(model["core_points"])
+    return assign_to_core(X_scaled, model["core_index"], model["core_labels"], model["eps"])
+
+
+def assign_chunks(model, chunks):
+    """Generator (chunk DataFrame, label) untuk setiap chunk input
+
+    Baris dengan nilai kosong/non-numerik di kolom model mendapat label -1.
+    """
+    columns = model["columns"]
+    for chunk in chunks:
+        missing = [col for col in columns if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Kolom tidak ditemukan pada data: {', '.join(missing)}")
+        if model["method"] == 'kprototypes':
+            num, cat, _ = encode_mixed(chunk, model["numeric_columns"], model["categorical_columns"],
+                                       model["encoding"])
+            valid = ~np.isnan(num).any(axis=1)
+            labels = np.full(len(chunk), -1, dtype=np.int64)
+            if valid.any():
+                labels[valid] = assign_clusters(model, (num[valid], cat[valid]))
+            yield chunk, labels
+            continue
+        values = chunk[columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        valid = ~np.isnan(values).any(axis=1)
+        labels = np.full(len(chunk), -1, dtype=np.int64)
+        if valid.any():
+            X_scaled = model["scaler"].transform(pd.DataFrame(values[valid], columns=columns))
+            labels[valid] = assign_clusters(model, X_scaled)
+        yield chunk, labels
+
+
+def encode_mixed(df, numeric_columns, categorical_columns, encoding=None):
+    """Encode data campuran: numerik dinormalisasi ke rentang [0, 1], kategorikal menjadi integer code
+
+    encoding (min, range, kategori per kolom) dibuat dari data fit dan dipakai ulang untuk data baru;
+    kategori yang tidak dikenal mendapat code -1 (selalu dihitung berbeda dari prototype).
+    """
+    num = df[numeric_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    if encoding is None:
+        minimum = np.nanmin(num, axis=0) if num.size else np.zeros(len(numeric_columns))
+        spread = (np.nanmax(num, axis=0) - minimum) if num.size else np.ones(len(numeric_columns))
+        encoding = {
+            "min": minimum,
+            "range": np.where(spread > 0, spread, 1.0),
+            "categories": [pd.Index(pd.unique(df[col].dropna())) for col in categorical_columns]
+        }
+    num = (num - encoding["min"]) / encoding["range"]
+    cat = np.empty((len(df), len(categorical_columns)), dtype=np.int64)
+    for j, (col, categories) in enumerate(zip(categorical_columns, encoding["categories"])):
+        cat[:, j] = categories.get_indexer(df[col])
+    return num, cat, encoding
+
+
+def gower_distances(num, cat, proto_num, proto_cat, block_bytes=DISTANCE_BLOCK_BYTES):
+    """Jarak Gower setiap baris ke setiap prototype, dihitung per chunk di thread pool
+
+    Gower = (jumlah |selisih numerik ternormalisasi| + jumlah kategori yang berbeda) / jumlah fitur.
+    Memori sementara per chunk dibatasi block_bytes (chunk x k x fitur).
+    """
+    n, k = len(num), len(proto_num)
+    n_features = num.shape[1] + cat.shape[1]
+    chunk_size = max(block_bytes // (8 * k * max(n_features, 1)), 1)
+    chunks = [np.arange(i, min(i + chunk_size, n)) for i in range(0, n, chunk_size)]
+
+    def kernel(rows):
+        dist = np.abs(num[rows, None, :] - proto_num[None, :, :]).sum(axis=2)
+        dist += (cat[rows, None, :] != proto_cat[None, :, :]).sum(axis=2)
+        return dist / n_features
+
+    if not chunks:
+        return np.empty((0, k))
+    return np.concatenate(list(_map_chunks(kernel, chunks)))
+
+
+def _init_prototypes(num, cat, k, rng, sample_size=10_000):
+    """Seeding k-means++ dengan jarak Gower pada sampel baris"""
+    rows = np.arange(len(num))
+    if len(rows) > sample_size:
+        rows = rng.choice(len(num), size=sample_size, replace=False)
+    chosen = [rows[rng.integers(len(rows))]]
+    nearest = gower_distances(num[rows], cat[rows], num[chosen], cat[chosen])[:, 0]
+    for _ in range(1, k):
+        weights = nearest ** 2
+        total = weights.sum()
+        pick = rows[rng.choice(len(rows), p=weights / total)] if total > 0 else rows[rng.integers(len(rows))]
+        chosen.append(pick)
+        new = gower_distances(num[rows], cat[rows], num[[pick]], cat[[pick]])[:, 0]
+        nearest = np.minimum(nearest, new)
+    return num[chosen].copy(), cat[chosen].copy()
+
+
+def kprototypes(num, cat, k, max_iter=20, seed=RANDOM_STATE):
+    """K-prototypes dengan jarak Gower: prototype = median numerik dan modus kategorikal per cluster
+
+    Median dan modus meminimalkan jarak L1 dan mismatch, sehingga cost tidak naik di setiap iterasi.
+    Return (labels, proto_num, proto_cat, cost, n_iter).
+    """
+    rng = np.random.default_rng(seed)
+    proto_num, proto_cat = _init_prototypes(num, cat, k, rng)
+    labels = None
+    for n_iter in range(1, max_iter + 1):
+        distances = gower_distances(num, cat, proto_num, proto_cat)
+        new_labels = distances.argmin(axis=1)
+        cost = float(distances[np.arange(len(num)), new_labels].sum())
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(k):
+            members = labels == c
+            if not members.any():
+                continue  # Cluster kosong: prototype lama dipertahankan
+            if num.shape[1]:
+                proto_num[c] = np.median(num[members], axis=0)
+            for j in range(cat.shape[1]):
+                codes = cat[members, j]
+                codes = codes[codes >= 0]
+                if len(codes):
+                    proto_cat[c, j] = np.bincount(codes).argmax()
+    return new_labels, proto_num, proto_cat, cost, n_iter
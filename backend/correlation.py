@@ -0,0 +1,244 @@
+"""
+Correlation - Engine korelasi dan asosiasi dengan statistik yang di-cache per versi dataset
+Library yang digunakan:
+- numpy: Untuk sufficient statistics (count, sum, cross-product) dan contingency table
+- pandas: Untuk mendeteksi tipe kolom
+
+Pearson (pairwise-complete, sama seperti DataFrame.corr()) dihitung dari matriks count/sum/
+cross-product yang disimpan sekali per versi dataset, sehingga korelasi subset kolom apa pun
+hanya berupa lookup O(k^2). Pasangan kategorikal memakai Cramér's V (kategori x kategori) dan
+correlation ratio / eta (kategori x numerik) dari contingency table dan group sums (count, sum, sum
+kuadrat per kategori) yang dihitung sekali saat engine dibuat, diambil dari cuboid cube bila ada.
+"""
+import threading
+import numpy as np
+from metrics import cache_lookup
+from utils import on_dataset_change
+from cube import get_cube
+from lazy import lazy_module
+
+pd = lazy_module('pandas')
+
+# Kolom non-numerik dengan nilai unik lebih dari ini dianggap ID/teks bebas, bukan kategori
+MAX_CATEGORIES = 50
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+class CorrelationEngine:
+    """Statistik korelasi untuk satu versi dataset"""
+
+    def __init__(self, df, max_categories=MAX_CATEGORIES, cube=None):
+        numeric_cols = df.select_dtypes(include=[np.number, 'bool']).columns.tolist()
+        X = df[numeric_cols].to_numpy(dtype=float)
+        mask = ~np.isnan(X)
+
+        # Geser setiap kolom ke mean-nya supaya cross-product stabil secara numerik
+        counts = mask.sum(axis=0)
+        means = np.divide(np.where(mask, X, 0.0).sum(axis=0), counts,
+                          out=np.zeros(len(numeric_cols)), where=counts > 0)
+        Xc = np.where(mask, X - means, 0.0)
+        M = mask.astype(float)
+
+        self.numeric_columns = numeric_cols
+        self._index = {col: i for i, col in enumerate(numeric_cols)}
+        # n[i, j]: jumlah baris dengan i dan j tidak null; sx[i, j]: sum x_i pada baris tersebut
+        self.n = M.T @ M
+        self.sx = Xc.T @ M
+        self.sxx = (Xc ** 2).T @ M
+        self.sxy = Xc.T @ Xc
+
+        # Kolom kategorikal di-encode sekali menjadi integer code (-1 untuk NaN)
+        self.categorical_columns = []
+        self._codes = {}
+        # Sufficient statistics eta per kolom kategorikal: (count, sum, sum kuadrat) nilai numerik yang
+        # sudah digeser ke mean, per kategori x kolom numerik. Matriks baris tidak perlu disimpan.
+        self._group_stats = {}
+        for col in df.columns:
+            if col in self._index:
+                continue
+            codes, categories = pd.factorize(df[col])
+            if 0 < len(categories) <= max_categories:
+                self.categorical_columns.append(col)
+                # Code disimpan sekecil mungkin (maks. MAX_CATEGORIES kategori muat di int8)
+                self._codes[col] = (codes.astype(np.int8 if len(categories) < 128 else np.int32), len(categories))
+                self._group_stats[col] = self._build_group_stats(col, codes, categories, Xc, mask, means, cube)
+
+        self._contingency = {}
+        self._eta = {}
+        self._lock = threading.Lock()
+
+    def _build_group_stats(self, col, codes, categories, Xc, mask, means, cube):
+        """Count/sum/sum kuadrat per kategori; dari cuboid cube jika tersedia, selain itu dari baris"""
+        shape = (len(categories), len(self.numeric_columns))
+        group_n, group_sum, group_sumsq = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+        table = None
+        if cube is not None and cube.covers((col,)):
+            table = cube.cuboid((col,)).reindex(pd.Index(categories, name=col))
+        ids = codes + 1  # kategori NaN (-1) masuk bin 0 lalu dibuang
+        for j, num_col in enumerate(self.numeric_columns):
+            if table is not None and cube.covers((col,), [num_col]):
+                # Cuboid menyimpan sum mentah: geser ke mean kolom supaya sama dengan jalur dari baris
+                n = table[f'{num_col}_count'].fillna(0).to_numpy(dtype=float)
+                raw_sum = table[f'{num_col}_sum'].fillna(0).to_numpy(dtype=float)
+                raw_sumsq = table[f'{num_col}_sumsq'].fillna(0).to_numpy(dtype=float)
+                group_n[:, j] = n
+                group_sum[:, j] = raw_sum - n * means[j]
+                group_sumsq[:, j] = raw_sumsq - 2 * means[j] * raw_sum + n * means[j] ** 2
+            else:
+                minlength = len(categories) + 1
+                group_n[:, j] = np.bincount(ids, weights=mask[:, j], minlength=minlength)[1:]
+                group_sum[:, j] = np.bincount(ids, weights=Xc[:, j], minlength=minlength)[1:]
+                group_sumsq[:, j] = np.bincount(ids, weights=Xc[:, j] ** 2, minlength=minlength)[1:]
+        return group_n, group_sum, group_sumsq
+
+    @property
+    def columns(self):
+        return self.numeric_columns + self.categorical_columns
+
+    def pearson(self, columns=None):
+        """Matriks Pearson (pairwise-complete) untuk subset kolom numerik"""
+        columns = self.numeric_columns if columns is None else list(columns)
+        idx = np.array([self._index[col] for col in columns], dtype=int)
+        n = self.n[np.ix_(idx, idx)]
+        sx = self.sx[np.ix_(idx, idx)]
+        sxx = self.sxx[np.ix_(idx, idx)]
+        sxy = self.sxy[np.ix_(idx, idx)]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = sxy - sx * sx.T / n
+            var_i = sxx - sx ** 2 / n
+            r = cov / np.sqrt(var_i * var_i.T)
+        r[(n < 2) | ~np.isfinite(r)] = np.nan
+        r = np.clip(r, -1.0, 1.0)
+        np.fill_diagonal(r, np.where(np.diag(var_i) > 0, 1.0, np.nan))
+        return pd.DataFrame(r, index=columns, columns=columns)
+
+    def contingency(self, col_a, col_b):
+        """Contingency table dua kolom kategorikal (di-cache)"""
+        key = (col_a, col_b)
+        with self._lock:
+            if key in self._contingency:
+                return self._contingency[key]
+        codes_a, size_a = self._codes[col_a]
+        codes_b, size_b = self._codes[col_b]
+        valid = (codes_a >= 0) & (codes_b >= 0)
+        table = np.bincount(codes_a[valid].astype(np.int64) * size_b + codes_b[valid],
+                            minlength=size_a * size_b).reshape(size_a, size_b)
+        with self._lock:
+            self._contingency[key] = table
+            self._contingency[(col_b, col_a)] = table.T
+        return table
+
+    def cramers_v(self, col_a, col_b):
+        """Cramér's V dari contingency table"""
+        table = self.contingency(col_a, col_b)
+        table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+        n = table.sum()
+        if n == 0 or min(table.shape) < 2:
+            return np.nan
+        expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+        chi2 = ((table - expected) ** 2 / expected).sum()
+        return float(np.sqrt(chi2 / (n * (min(table.shape) - 1))))
+
+    def correlation_ratio(self, cat_col, num_col):
+        """Correlation ratio (eta) kolom numerik terhadap kolom kategorikal"""
+        key = (cat_col, num_col)
+        with self._lock:
+            if key in self._eta:
+                return self._eta[key]
+        j = self._index[num_col]
+        group_n, group_sum, group_sumsq = (stat[:, j] for stat in self._group_stats[cat_col])
+        n = group_n.sum()
+        if n == 0:
+            return np.nan
+
+        # Variance antar grup dibanding variance total, dari count/sum/sum kuadrat per grup
+        mean = group_sum.sum() / n
+        sumsq = group_sumsq.sum()
+        total_ss = sumsq - n * mean ** 2
+        present = group_n > 0
+        between_ss = (group_n[present] * (group_sum[present] / group_n[present] - mean) ** 2).sum()
+        # Selisih sisa pembulatan (kolom konstan) dianggap variance nol
+        if total_ss <= 1e-12 * sumsq:
+            total_ss = 0.0
+        eta = float(np.sqrt(min(between_ss / total_ss, 1.0))) if total_ss > 0 else np.nan
+        with self._lock:
+            self._eta[key] = eta
+        return eta
+
+    def association(self, columns=None):
+        """Matriks asosiasi campuran: Pearson, eta, atau Cramér's V sesuai tipe pasangan kolom
+
+        Return (matrix DataFrame, methods DataFrame, kolom yang dilewati).
+        """
+        columns = self.columns if columns is None else list(columns)
+        skipped = [col for col in columns if col not in self._index and col not in self._codes]
+        columns = [col for col in columns if col not in skipped]
+
+        matrix = pd.DataFrame(np.nan, index=columns, columns=columns)
+        methods = pd.DataFrame('', index=columns, columns=columns)
+        numeric = [col for col in columns if col in self._index]
+        if numeric:
+            matrix.loc[numeric, numeric] = self.pearson(numeric).to_numpy()
+            methods.loc[numeric, numeric] = 'pearson'
+
+        for i, a in enumerate(columns):
+            for b in columns[i:]:
+                a_cat, b_cat = a in self._codes, b in self._codes
+                if not a_cat and not b_cat:
+                    continue
+                if a_cat and b_cat:
+                    value = 1.0 if a == b else self.cramers_v(a, b)
+                    method = 'cramers_v'
+                else:
+                    cat_col, num_col = (a, b) if a_cat else (b, a)
+                    value = self.correlation_ratio(cat_col, num_col)
+                    method = 'correlation_ratio'
+                matrix.loc[a, b] = matrix.loc[b, a] = value
+                methods.loc[a, b] = methods.loc[b, a] = method
+        return matrix, methods, skipped
+
+    def drop_columns(self, columns):
+        """Update statistik secara incremental setelah kolom dihapus (tanpa menghitung ulang)"""
+        dropped = set(columns)
+        keep = [i for i, col in enumerate(self.numeric_columns) if col not in dropped]
+        self.numeric_columns = [self.numeric_columns[i] for i in keep]
+        self._index = {col: i for i, col in enumerate(self.numeric_columns)}
+        for name in ('n', 'sx', 'sxx', 'sxy'):
+            setattr(self, name, getattr(self, name)[np.ix_(keep, keep)])
+
+        self.categorical_columns = [col for col in self.categorical_columns if col not in dropped]
+        for col in dropped:
+            self._codes.pop(col, None)
+            self._group_stats.pop(col, None)
+        self._group_stats = {col: tuple(stat[:, keep] for stat in stats) for col, stats in self._group_stats.items()}
+        with self._lock:
+            self._contingency = {k: v for k, v in self._contingency.items() if not dropped & set(k)}
+            self._eta = {k: v for k, v in self._eta.items() if not dropped & set(k)}
+
+
+def get_engine(filename, version, df):
+    """Engine korelasi untuk versi dataset tertentu (dibuat sekali per versi)"""
+    with _engines_lock:
+        entry = _engines.get(filename)
+        hit = bool(entry) and entry[0] == version
+    cache_lookup('correlation', hit)
+    if hit:
+        return entry[1]
+    # Group sums untuk eta diambil dari cuboid 1 dimensi cube versi yang sama (dihitung saat upload)
+    engine = CorrelationEngine(df, cube=get_cube(filename, version, df))
+    with _engines_lock:
+        _engines[filename] = (version, engine)
+    return engine
+
+
+@on_dataset_change
+def _update_engine(filename, change):
+    """Drop kolom di-update incremental, perubahan lain membuang engine lama"""
+    with _engines_lock:
+        entry = _engines.pop(filename, None)
+        if entry and change["type"] == "drop_columns" and entry[0] == change["previous_version"]:
+            entry[1].drop_columns(change["columns"])
+            _engines[filename] = (change["version"], entry[1])
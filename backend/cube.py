@@ -0,0 +1,202 @@
+"""
+Cube - Aggregation cube untuk kolom berkardinalitas rendah (contract, layanan, flag churn, dll)
+Library yang digunakan:
+- numpy: Untuk encoding dimensi dan agregasi per sel (bincount / reduceat)
+- pandas: Untuk index hasil (sama seperti hasil groupby)
+
+Setiap sel cube menyimpan size serta count, sum, sumsq, min dan max setiap measure numerik.
+Kolom dimensi di-encode sekali saat upload; cuboid (kombinasi dimensi) dihitung sekali dari baris,
+cuboid dengan dimensi lebih sedikit di-roll-up dari cuboid yang sudah ada tanpa menyentuh baris.
+"""
+import threading
+import numpy as np
+from metrics import cache_lookup
+from utils import on_dataset_change, detect_target_column
+from lazy import lazy_module
+
+pd = lazy_module('pandas')
+
+# Kolom dengan nilai unik maksimal sebanyak ini dijadikan dimensi cube
+MAX_CARDINALITY = 50
+MEASURE_STATS = ('count', 'sum', 'sumsq', 'min', 'max')
+
+_cubes = {}
+_cubes_lock = threading.Lock()
+
+
+class AggregationCube:
+    """Aggregation cube untuk satu versi dataset"""
+
+    def __init__(self, df, max_cardinality=MAX_CARDINALITY):
+        self.n_rows = len(df)
+        self._codes = {}
+        for col in df.columns:
+            codes, uniques = pd.factorize(df[col], sort=True)
+            if 0 < len(uniques) <= max_cardinality:
+                self._codes[col] = (codes, uniques)
+        self._complete = {col: bool((codes >= 0).all()) for col, (codes, _) in self._codes.items()}
+        self.dimensions = list(self._codes)
+
+        numeric = df.select_dtypes(include=[np.number]).columns
+        self._measures = {col: df[col].to_numpy(dtype=float) for col in numeric}
+        self.measures = list(self._measures)
+
+        self._cuboids = {}
+        self._lock = threading.Lock()
+
+    def covers(self, dims, measures=()):
+        """True jika kombinasi dimensi dan measure bisa dijawab dari cube"""
+        return (len(dims) > 0 and len(set(dims)) == len(dims)
+                and all(d in self._codes for d in dims) and all(m in self._measures for m in measures))
+
+    def cuboid(self, dims):
+        """DataFrame per sel (index seperti groupby(dims)) berisi size dan <measure>_<stat>"""
+        dims = tuple(dims)
+        with self._lock:
+            cached = self._cuboids.get(dims)
+        if cached is not None:
+            return cached
+
+        parent = self._smallest_parent(dims)
+        table = self._roll_up(parent, dims) if parent is not None else self._from_rows(dims)
+        with self._lock:
+            self._cuboids[dims] = table
+        return table
+
+    def prewarm(self, target_col=None):
+        """Hitung cuboid per dimensi (dan dimensi x target) sekali saat dataset diupload"""
+        for dim in self.dimensions:
+            if target_col in self._codes and dim != target_col:
+                self.cuboid((dim, target_col))
+            self.cuboid((dim,))
+
+    def _smallest_parent(self, dims):
+        with self._lock:
+            # Roll-up hanya dari cuboid yang dimensi tambahannya tidak punya NaN (baris NaN tidak masuk sel)
+            parents = [(len(table), key) for key, table in self._cuboids.items()
+                       if len(key) > len(dims) and set(dims) <= set(key)
+                       and all(self._complete[d] for d in set(key) - set(dims))]
+        if not parents:
+            return None
+        return min(parents)[1]
+
+    def _roll_up(self, parent, dims):
+        """Agregasi ulang cuboid yang lebih detail (jumlah sel jauh lebih kecil dari jumlah baris)"""
+        with self._lock:
+            table = self._cuboids[parent]
+        agg = {'size': 'sum'}
+        for m in self.measures:
+            agg.update({f'{m}_count': 'sum', f'{m}_sum': 'sum', f'{m}_sumsq': 'sum',
+                        f'{m}_min': 'min', f'{m}_max': 'max'})
+        return table.groupby(level=list(dims)).agg(agg)
+
+    def _from_rows(self, dims):
+        codes = [self._codes[d][0] for d in dims]
+        shape = tuple(len(self._codes[d][1]) for d in dims)
+        valid = np.ones(self.n_rows, dtype=bool)
+        for c in codes:
+            valid &= c >= 0
+        flat = np.ravel_multi_index([c[valid] for c in codes], shape)
+
+        # Sel yang terisi saja, terurut sesuai urutan kategori (sama seperti groupby)
+        n_flat = int(np.prod(shape))
+        if n_flat <= max(4 * len(flat), 1024):
+            occupied = np.bincount(flat, minlength=n_flat) > 0
+            cells = np.flatnonzero(occupied)
+            cell_ids = (np.cumsum(occupied) - 1)[flat]
+        else:
+            cells, cell_ids = np.unique(flat, return_inverse=True)
+        n_cells = len(cells)
+        columns = {'size': np.bincount(cell_ids, minlength=n_cells)}
+        order = np.argsort(cell_ids, kind='stable')
+        for m, values in self._measures.items():
+            values = values[valid]
+            finite = np.isfinite(values)
+            ids, vals = cell_ids[finite], values[finite]
+            count = np.bincount(ids, minlength=n_cells)
+            columns[f'{m}_count'] = count
+            columns[f'{m}_sum'] = np.bincount(ids, weights=vals, minlength=n_cells)
+            columns[f'{m}_sumsq'] = np.bincount(ids, weights=vals ** 2, minlength=n_cells)
+
+            # Min/max per sel: urutkan nilai per sel lalu reduceat di awal setiap sel
+            mins = np.full(n_cells, np.nan)
+            maxs = np.full(n_cells, np.nan)
+            sorted_order = order[finite[order]]
+            if len(sorted_order):
+                sorted_ids = cell_ids[sorted_order]
+                sorted_vals = values[sorted_order]
+                starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+                present = sorted_ids[starts]
+                mins[present] = np.minimum.reduceat(sorted_vals, starts)
+                maxs[present] = np.maximum.reduceat(sorted_vals, starts)
+            columns[f'{m}_min'] = mins
+            columns[f'{m}_max'] = maxs
+
+        cell_codes = np.unravel_index(cells, shape)
+        levels = [self._codes[d][1][c] for d, c in zip(dims, cell_codes)]
+        if len(dims) == 1:
+            index = pd.Index(levels[0], name=dims[0])
+        else:
+            index = pd.MultiIndex.from_arrays(levels, names=list(dims))
+        return pd.DataFrame(columns, index=index)
+
+    def summary(self, dims, measures):
+        """Ringkasan per sel: count, mean, std (ddof=1), min dan max setiap measure"""
+        table = self.cuboid(dims)
+        result = table[['size']].copy()
+        for m in measures:
+            n = table[f'{m}_count']
+            mean = table[f'{m}_sum'] / n
+            var = (table[f'{m}_sumsq'] - n * mean ** 2) / (n - 1)
+            result[f'{m}_count'] = n
+            result[f'{m}_mean'] = mean
+            result[f'{m}_std'] = np.sqrt(var.clip(lower=0)).where(n > 1)
+            result[f'{m}_min'] = table[f'{m}_min']
+            result[f'{m}_max'] = table[f'{m}_max']
+        return result
+
+    def drop_columns(self, columns):
+        """Buang dimensi/measure yang dihapus tanpa menghitung ulang cuboid lain"""
+        dropped = set(columns)
+        for col in dropped:
+            self._codes.pop(col, None)
+            self._measures.pop(col, None)
+        self.dimensions = [d for d in self.dimensions if d not in dropped]
+        self.measures = [m for m in self.measures if m not in dropped]
+        drop_stats = [f'{m}_{stat}' for m in dropped for stat in MEASURE_STATS]
+        with self._lock:
+            self._cuboids = {
+                key: table.drop(columns=drop_stats, errors='ignore')
+                for key, table in self._cuboids.items() if not dropped & set(key)
+            }
+
+
+def get_cube(filename, version, df):
+    """Cube untuk versi dataset tertentu (dibuat sekali per versi)"""
+    with _cubes_lock:
+        entry = _cubes.get(filename)
+        hit = bool(entry) and entry[0] == version
+    cache_lookup('cube', hit)
+    if hit:
+        return entry[1]
+    cube = AggregationCube(df)
+    with _cubes_lock:
+        _cubes[filename] = (version, cube)
+    return cube
+
+
+def build_cube(filename, version, df):
+    """Bangun cube dan cuboid dasar saat dataset baru diupload"""
+    cube = get_cube(filename, version, df)
+    cube.prewarm(detect_target_column(df))
+    return cube
+
+
+@on_dataset_change
+def _update_cube(filename, change):
+    """Drop kolom di-update incremental, perubahan lain membuang cube lama"""
+    with _cubes_lock:
+        entry = _cubes.pop(filename, None)
+        if entry and change["type"] == "drop_columns" and entry[0] == change["previous_version"]:
+            entry[1].drop_columns(change["columns"])
+            _cubes[filename] = (change["version"], entry[1])
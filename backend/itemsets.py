@@ -0,0 +1,189 @@
+"""
+Itemsets - Frequent itemset mining (Eclat) dan association rules
+Library yang digunakan:
+- numpy: Untuk tidset bit-packed (uint64) dan support counting dengan AND + popcount
+- pandas: Untuk encoding kolom kategorikal menjadi item
+
+Setiap nilai kolom menjadi item "<kolom>_<nilai>" (sama seperti pd.get_dummies). Tidset setiap item
+disimpan sebagai bitset (1 bit per transaksi, dikemas ke word 64-bit), 8x lebih kecil dari kolom
+boolean. Support pasangan semua frequent item dihitung sekali secara blocked; Eclat lalu menelusuri
+itemset depth-first dan hanya memperluas prefix dengan item yang pasangannya frequent.
+"""
+import heapq
+from itertools import combinations
+import numpy as np
+from lazy import lazy_module
+
+pd = lazy_module('pandas')
+
+# Kolom dengan nilai unik lebih dari ini dianggap ID/teks bebas, bukan kategori
+MAX_ITEM_CARDINALITY = 50
+
+# Panjang itemset maksimum jika max_len tidak diberikan (jumlah rule tumbuh eksponensial per level)
+DEFAULT_MAX_ITEMSET_LEN = 3
+
+# Batas memori sementara (bytes) untuk satu blok perhitungan support pasangan
+PAIR_BLOCK_BYTES = 64 * 1024 * 1024
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words, axis=None):
+        """Jumlah bit 1 pada array uint64"""
+        return np.bitwise_count(words).sum(axis=axis, dtype=np.int64)
+else:
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(words, axis=None):
+        """Jumlah bit 1 pada array uint64 (lookup table per byte untuk numpy < 2.0)"""
+        counts = _BYTE_COUNTS[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1, dtype=np.int64)
+        return counts.sum(axis=axis)
+
+
+def pack_bits(mask):
+    """Kemas array boolean menjadi word uint64 (bit ke-i = transaksi ke-i)"""
+    packed = np.packbits(mask, bitorder='little')
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(np.uint64)
+
+
+def select_item_columns(df, max_cardinality=MAX_ITEM_CARDINALITY):
+    """Kolom kategorikal (object/category/bool) dan numerik diskrit (<= 10 nilai unik)"""
+    columns = []
+    for col in df.columns:
+        n_unique = df[col].nunique()
+        if n_unique == 0 or n_unique > max_cardinality:
+            continue
+        if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]) and n_unique > 10:
+            continue
+        columns.append(col)
+    return columns
+
+
+class TransactionSet:
+    """Representasi vertikal transaksi: item, kolom asal item, dan bitset tidset per item"""
+
+    def __init__(self, df, columns):
+        self.n_transactions = len(df)
+        self.items = []
+        self.item_columns = []
+        n_words = -(-self.n_transactions // 64)
+        bitsets = []
+        for col_idx, col in enumerate(columns):
+            codes, uniques = pd.factorize(df[col], sort=True)
+            for code, value in enumerate(uniques):
+                self.items.append(f"{col}_{value}")
+                self.item_columns.append(col_idx)
+                bitsets.append(pack_bits(codes == code))
+        self.item_columns = np.array(self.item_columns, dtype=int)
+        # Matriks (n_items, n_words), satu baris bitset per item
+        self.bitsets = np.vstack(bitsets) if bitsets else np.zeros((0, n_words), dtype=np.uint64)
+
+    @property
+    def nbytes(self):
+        return self.bitsets.nbytes
+
+    def supports(self):
+        """Jumlah transaksi per item"""
+        return popcount(self.bitsets, axis=1)
+
+    def pair_supports(self, items):
+        """Matriks jumlah transaksi setiap pasangan item, dihitung per blok baris"""
+        bits = self.bitsets[items]
+        n_items, n_words = bits.shape
+        block = max(PAIR_BLOCK_BYTES // max(n_items * n_words * 8, 1), 1)
+        result = np.empty((n_items, n_items), dtype=np.int64)
+        for start in range(0, n_items, block):
+            chunk = bits[start:start + block, None, :] & bits[None, :, :]
+            result[start:start + block] = popcount(chunk, axis=2)
+        return result
+
+    def intersect(self, bitset, item):
+        """Bitset (prefix + item) dan jumlah transaksinya"""
+        merged = bitset & self.bitsets[item]
+        return merged, int(popcount(merged))
+
+
+def eclat(transactions, min_support, max_len=None):
+    """Semua frequent itemset: dict {tuple indeks item terurut: jumlah transaksi}"""
+    min_count = max(int(np.ceil(min_support * transactions.n_transactions)), 1)
+    counts = transactions.supports()
+    # Item diurutkan dari support terkecil supaya bitset prefix cepat mengecil
+    frequent = np.array([i for i in np.argsort(counts, kind='stable') if counts[i] >= min_count], dtype=int)
+    result = {(int(i),): int(counts[i]) for i in frequent}
+    if max_len == 1 or len(frequent) < 2:
+        return result
+
+    # Support semua pasangan sekaligus; item dari kolom yang sama selalu 0 sehingga ikut terpangkas
+    pairs = transactions.pair_supports(frequent)
+    pair_ok = pairs >= min_count
+
+    def extend(prefix, bitset, candidates):
+        """prefix/candidates berisi posisi di `frequent`, candidates sudah frequent berpasangan"""
+        for pos, item in enumerate(candidates):
+            if len(prefix) == 1:
+                merged, count = None, int(pairs[prefix[0], item])
+            else:
+                merged, count = transactions.intersect(bitset, frequent[item])
+            if count < min_count:
+                continue
+            itemset = prefix + (item,)
+            result[tuple(sorted(int(frequent[i]) for i in itemset))] = count
+            if max_len is not None and len(itemset) >= max_len:
+                continue
+            rest = candidates[pos + 1:]
+            rest = rest[pair_ok[item, rest]]
+            if len(rest):
+                if merged is None:
+                    merged = bitset & transactions.bitsets[frequent[item]]
+                extend(itemset, merged, rest)
+
+    for pos in range(len(frequent)):
+        candidates = np.arange(pos + 1, len(frequent))
+        candidates = candidates[pair_ok[pos, candidates]]
+        if len(candidates):
+            extend((pos,), transactions.bitsets[frequent[pos]], candidates)
+    return result
+
+
+def generate_rules(itemsets, n_transactions, min_confidence, top_n=None):
+    """Association rules dari frequent itemsets dengan support, confidence, lift, leverage dan conviction
+
+    Semua subset frequent itemset juga frequent, sehingga support antecedent/consequent cukup
+    di-lookup dari hasil mining tanpa menghitung ulang. Jika top_n diberikan, hanya top_n rule
+    terbaik (confidence, lalu lift) yang disimpan di heap berukuran tetap.
+    Return (rules terurut dari confidence/lift tertinggi, jumlah semua rule yang lolos min_confidence).
+    """
+    heap = []
+    n_rules = 0
+    for itemset, count in itemsets.items():
+        if len(itemset) < 2:
+            continue
+        support = count / n_transactions
+        for size in range(1, len(itemset)):
+            for antecedent in combinations(itemset, size):
+                antecedent_support = itemsets[antecedent] / n_transactions
+                confidence = support / antecedent_support
+                if confidence < min_confidence:
+                    continue
+                consequent = tuple(i for i in itemset if i not in antecedent)
+                consequent_support = itemsets[consequent] / n_transactions
+                lift = confidence / consequent_support
+                # Urutan munculnya rule dipakai sebagai tie-breaker (rule lebih awal menang)
+                key = (confidence, lift, -n_rules)
+                n_rules += 1
+                if top_n is not None and len(heap) >= top_n:
+                    if top_n == 0 or key <= heap[0][0]:
+                        continue
+                    heapq.heappop(heap)
+                heapq.heappush(heap, (key, {
+                    "antecedent": antecedent,
+                    "consequent": consequent,
+                    "support": support,
+                    "confidence": confidence,
+                    "lift": lift,
+                    "leverage": support - antecedent_support * consequent_support,
+                    # Conviction tak hingga jika rule selalu benar (confidence = 1)
+                    "conviction": (1 - consequent_support) / (1 - confidence) if confidence < 1 else None
+                }))
+    heap.sort(key=lambda entry: entry[0], reverse=True)
+    return [rule for _, rule in heap], n_rules
@@ -0,0 +1,89 @@
+"""
+Lazy - Import library berat (pandas, scikit-learn, plotly) saat pertama kali dipakai
+Library yang digunakan:
+- importlib: Untuk meng-import modul saat atributnya pertama kali diakses
+- threading: Untuk pre-warm import di background
+
+Modul route hanya memegang proxy `lazy_module(...)`, sehingga registrasi route cukup meng-import
+Flask dan numpy. Library dimuat saat subsystem-nya pertama kali dipakai, atau lebih awal lewat
+`prewarm()` di background. Waktu startup dan durasi setiap import dicatat untuk startup report.
+"""
+import importlib
+import sys
+import threading
+import time
+import types
+
+_lazy_modules = {}
+_prewarm_thread = None
+
+# {nama modul: (subsystem, detik)} untuk modul yang di-import lewat proxy
+import_times = {}
+startup = {"seconds": None, "modules": 0}
+
+
+class LazyModule(types.ModuleType):
+    """Proxy modul yang meng-import modul aslinya saat atribut pertama diakses"""
+
+    def __init__(self, name, subsystem):
+        super().__init__(name)
+        self._subsystem = subsystem
+        self._module = None
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            loaded = self.__name__ in sys.modules
+            start = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            if not loaded:
+                import_times.setdefault(self.__name__, (self._subsystem, time.perf_counter() - start))
+            self._module = module
+        return module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_module(name, subsystem=None):
+    """Proxy untuk modul `name` (satu proxy per modul, dipakai bersama semua route)"""
+    proxy = _lazy_modules.get(name)
+    if proxy is None:
+        proxy = _lazy_modules[name] = LazyModule(name, subsystem or name.split('.')[0])
+    return proxy
+
+
+def prewarm():
+    """Import semua modul lazy di thread background (request yang butuh modul ikut menunggu import-nya)"""
+    global _prewarm_thread
+    if _prewarm_thread is None:
+        def run():
+            for proxy in list(_lazy_modules.values()):
+                proxy._load()
+        _prewarm_thread = threading.Thread(target=run, name='lazy-prewarm', daemon=True)
+        _prewarm_thread.start()
+    return _prewarm_thread
+
+
+def mark_started(started):
+    """Catat durasi startup (dari `started` = time.perf_counter() di awal app.py)"""
+    startup["seconds"] = time.perf_counter() - started
+    startup["modules"] = len(sys.modules)
+
+
+def startup_report():
+    """Durasi startup, modul lazy yang sudah dimuat (dengan durasi import) dan yang belum"""
+    return {
+        "startup_seconds": startup["seconds"],
+        "modules_at_startup": startup["modules"],
+        "lazy_imports": {name: {"subsystem": subsystem, "seconds": round(seconds, 4)}
+                         for name, (subsystem, seconds) in import_times.items()},
+        "pending": [name for name, proxy in _lazy_modules.items() if not proxy.loaded]
+    }
@@ -0,0 +1,218 @@
+"""
+Metrics - Instrumentasi latency per endpoint dan per stage, bytes in/out, dan hit rate cache
+Library yang digunakan:
+- Flask: Hook before/after request dan JSON provider untuk mengukur jsonify
+- time: perf_counter untuk mengukur durasi
+
+Setiap request dicatat ke histogram latency per endpoint. Bagian yang mahal (get_dataframe,
+render chart, serialisasi, jsonify) dibungkus `stage(name)` sehingga durasinya tercatat per
+(endpoint, stage); sisanya dilaporkan sebagai stage "compute". Semua metrik diekspos dalam
+format teks Prometheus di /api/metrics.
+
+Kirim header `X-Profile: 1` (atau query `?profile=1`) untuk mendapatkan breakdown stage
+request tersebut di header `Server-Timing` (durasi dalam milidetik).
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+import threading
+import time
+from flask import Response, g, has_request_context, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+import lazy
+
+PREFIX = 'predictel'
+# Batas atas bucket histogram latency (detik), sama seperti default client Prometheus + 30s
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_caches = {}
+
+
+class Histogram:
+    """Histogram kumulatif dengan bucket tetap"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def observe(name, value, **labels):
+    """Catat satu nilai ke histogram `name` dengan label tertentu"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+
+def increment(name, value=1, **labels):
+    """Tambah counter `name` dengan label tertentu"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def register_cache(name, cache):
+    """Ekspos statistik LRUCache (hits, misses, evictions, bytes) di /api/metrics"""
+    _caches[name] = cache
+    return cache
+
+
+def cache_lookup(name, hit):
+    """Catat lookup cache berbasis dict (dataset, model, engine per versi)"""
+    increment('cache_hits_total' if hit else 'cache_misses_total', cache=name)
+
+
+def _current_endpoint():
+    return (request.endpoint or 'unknown') if has_request_context() else 'background'
+
+
+@contextmanager
+def stage(name):
+    """Ukur durasi satu stage; di dalam request durasinya juga masuk breakdown request"""
+    in_request = has_request_context()
+    if in_request:
+        g.metrics_depth = g.get('metrics_depth', 0) + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe('stage_duration_seconds', elapsed, endpoint=_current_endpoint(), stage=name)
+        if in_request:
+            g.metrics_depth -= 1
+            # Stage bersarang tidak dikurangkan lagi dari sisa waktu "compute"
+            g.setdefault('metrics_stages', []).append((name, elapsed, g.metrics_depth == 0))
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider default Flask yang mencatat durasi jsonify sebagai stage"""
+
+    def response(self, *args, **kwargs):
+        with stage('jsonify'):
+            return super().response(*args, **kwargs)
+
+
+def _profiling_requested():
+    return request.headers.get('X-Profile') == '1' or request.args.get('profile') == '1'
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_stages = []
+
+
+def _after_request(response):
+    start = g.get('metrics_start')
+    if start is None:
+        return response
+    total = time.perf_counter() - start
+    endpoint = _current_endpoint()
+    observe('request_duration_seconds', total, endpoint=endpoint)
+    increment('requests_total', endpoint=endpoint, method=request.method, status=str(response.status_code))
+    increment('request_bytes_total', request.content_length or 0, endpoint=endpoint)
+    # Response streaming belum diketahui ukurannya saat after_request
+    if not response.is_streamed:
+        increment('response_bytes_total', response.calculate_content_length() or 0, endpoint=endpoint)
+
+    stages = g.get('metrics_stages', [])
+    compute = max(total - sum(elapsed for _, elapsed, top in stages if top), 0.0)
+    observe('stage_duration_seconds', compute, endpoint=endpoint, stage='compute')
+
+    if _profiling_requested():
+        # Durasi stage yang sama dijumlahkan (mis. beberapa kali get_dataframe)
+        breakdown = {}
+        for name, elapsed, _ in stages:
+            breakdown[name] = breakdown.get(name, 0.0) + elapsed
+        breakdown['compute'] = compute
+        breakdown['total'] = total
+        response.headers['Server-Timing'] = ', '.join(
+            f'{name};dur={elapsed * 1000:.2f}' for name, elapsed in breakdown.items())
+        response.headers['Timing-Allow-Origin'] = '*'
+        response.headers['Access-Control-Expose-Headers'] = 'Server-Timing'
+    return response
+
+
+def _format_labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ''
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in items]
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+
+def render_prometheus():
+    """Semua metrik dalam format teks Prometheus (exposition format 0.0.4)"""
+    lines = []
+    with _lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+
+    seen = set()
+    for (name, labels), histogram in histograms:
+        metric = f'{PREFIX}_{name}'
+        if metric not in seen:
+            seen.add(metric)
+            lines.append(f'# TYPE {metric} histogram')
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{_format_labels(labels, le=bound)} {cumulative}')
+        lines.append(f'{metric}_bucket{_format_labels(labels, le="+Inf")} {histogram.count}')
+        lines.append(f'{metric}_sum{_format_labels(labels)} {histogram.sum:.6f}')
+        lines.append(f'{metric}_count{_format_labels(labels)} {histogram.count}')
+
+    for (name, labels), value in counters:
+        metric = f'{PREFIX}_{name}'
+        if metric not in seen:
+            seen.add(metric)
+            lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric}{_format_labels(labels)} {value}')
+
+    # Cache LRU: counter hits/misses/evictions dan gauge ukuran serta hit rate
+    for stat, kind in (('hits', 'counter'), ('misses', 'counter'), ('evictions', 'counter'),
+                       ('items', 'gauge'), ('total_bytes', 'gauge'), ('max_bytes', 'gauge'),
+                       ('hit_rate', 'gauge')):
+        if not _caches:
+            break
+        metric = f'{PREFIX}_lru_cache_{stat}' + ('_total' if kind == 'counter' else '')
+        lines.append(f'# TYPE {metric} {kind}')
+        for name, cache in sorted(_caches.items()):
+            lines.append(f'{metric}{_format_labels((), cache=name)} {cache.stats()[stat]}')
+
+    # Startup report: durasi startup dan durasi import setiap library yang dimuat lazy
+    if lazy.startup["seconds"] is not None:
+        lines.append(f'# TYPE {PREFIX}_startup_seconds gauge')
+        lines.append(f'{PREFIX}_startup_seconds {lazy.startup["seconds"]:.6f}')
+    if lazy.import_times:
+        lines.append(f'# TYPE {PREFIX}_lazy_import_seconds gauge')
+        for name, (subsystem, seconds) in sorted(lazy.import_times.items()):
+            lines.append(f'{PREFIX}_lazy_import_seconds{_format_labels((), module=name, subsystem=subsystem)} {seconds:.6f}')
+    return '\n'.join(lines) + '\n'
+
+
+def register_routes(app):
+    """Pasang instrumentasi di semua route dan endpoint /api/metrics"""
+    app.json = TimedJSONProvider(app)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """Metrik latency, bytes dan cache dalam format teks Prometheus"""
+        return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/api/startup', methods=['GET'])
+    def startup():
+        """Startup report: durasi startup, library yang sudah/belum dimuat dan durasi import-nya"""
+        return jsonify({"message": "Startup report retrieved successfully", "data": lazy.startup_report()})
@@ -0,0 +1,325 @@
+"""
+Query - Browsing baris dan query agregasi deklaratif atas dataset yang tersimpan
+Library yang digunakan:
+- numpy: Untuk mask filter dan index array urutan sort
+- pandas: Untuk membaca kolom, mengurutkan baris dan agregasi per grup
+- cache: Untuk LRU cache index urutan sort per versi dataset
+
+Filter dievaluasi per kolom menjadi boolean mask, hanya kolom yang disebut filter yang dibaca.
+Urutan sort disimpan sebagai index array (posisi baris) per (versi dataset, kolom sort), sehingga
+halaman berikutnya cukup mengambil slice index lalu membaca kolom hasil proyeksi untuk baris
+di halaman itu saja. Ukuran response konstan berapa pun jumlah baris dataset.
+
+Query agregasi (filters, group_by, aggregates, order_by, limit) memakai predicate pushdown:
+mask filter dihitung dulu dari kolom filter, lalu hanya kolom yang dibutuhkan group-by/aggregate
+pada baris yang lolos filter yang disalin. Dataset tidak pernah di-deep-copy utuh.
+"""
+from flask import request, jsonify
+import numpy as np
+from utils import get_dataframe, get_snapshot, on_dataset_change, reads_dataset
+from cache import LRUCache
+from metrics import register_cache, stage
+from lazy import lazy_module
+
+pd = lazy_module('pandas')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+DEFAULT_QUERY_LIMIT = 1000
+MAX_QUERY_LIMIT = 10000
+
+# Fungsi agregasi query; rate = proporsi baris (non-null) yang nilainya sama dengan `value`
+AGGREGATE_FUNCS = ('count', 'sum', 'mean', 'median', 'std', 'min', 'max', 'nunique', 'rate')
+NUMERIC_FUNCS = ('sum', 'mean', 'median', 'std')
+
+# Operator filter: nama dan alias simbolnya
+FILTER_OPS = {
+    'eq': 'eq', '==': 'eq', 'ne': 'ne', '!=': 'ne',
+    'lt': 'lt', '<': 'lt', 'le': 'le', '<=': 'le',
+    'gt': 'gt', '>': 'gt', 'ge': 'ge', '>=': 'ge',
+    'in': 'in', 'not_in': 'not_in', 'between': 'between', 'contains': 'contains',
+    'is_null': 'is_null', 'not_null': 'not_null'
+}
+
+# Index urutan sort (posisi baris, int64), key: (filename, versi dataset, ((kolom, descending), ...))
+sort_index_cache = register_cache('sort_index', LRUCache(max_bytes=128 * 1024 * 1024,
+                                                         sizeof=lambda order: order.nbytes))
+
+
+@on_dataset_change
+def _invalidate_sort_index(filename, change):
+    sort_index_cache.invalidate(lambda key: key[0] == filename)
+
+
+def _check_columns(df, columns):
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"Kolom tidak ditemukan: {', '.join(map(str, missing))}")
+
+
+def predicate_mask(series, op, value=None):
+    """Boolean mask satu predicate terhadap satu kolom (NaN tidak lolos kecuali is_null)"""
+    if op not in FILTER_OPS:
+        raise ValueError(f"Operator filter tidak dikenal: {op}. Gunakan salah satu dari: "
+                         f"{', '.join(sorted(set(FILTER_OPS.values())))}")
+    op = FILTER_OPS[op]
+    if op == 'is_null':
+        return series.isna().to_numpy()
+    if op == 'not_null':
+        return series.notna().to_numpy()
+    if op in ('in', 'not_in'):
+        if not isinstance(value, list):
+            raise ValueError(f"Operator {op} membutuhkan value berupa list")
+        mask = series.isin(value).to_numpy()
+        return ~mask & series.notna().to_numpy() if op == 'not_in' else mask
+    if op == 'between':
+        if not isinstance(value, list) or len(value) != 2:
+            raise ValueError("Operator between membutuhkan value [min, max]")
+        return (series.between(value[0], value[1]) & series.notna()).to_numpy()
+    if op == 'contains':
+        return series.astype(str).str.contains(str(value), case=False, regex=False).to_numpy() & series.notna().to_numpy()
+    mask = {'eq': series.__eq__, 'ne': series.__ne__, 'lt': series.__lt__,
+            'le': series.__le__, 'gt': series.__gt__, 'ge': series.__ge__}[op](value)
+    return mask.fillna(False).to_numpy(dtype=bool) & series.notna().to_numpy()
+
+
+def filter_mask(df, filters):
+    """AND dari semua filter [{column, op, value}], None jika tidak ada filter"""
+    if not filters:
+        return None
+    if not isinstance(filters, list):
+        raise ValueError("filters harus berupa list [{column, op, value}]")
+    for f in filters:
+        if not isinstance(f, dict) or 'column' not in f:
+            raise ValueError("Setiap filter harus berupa object {column, op, value}")
+    _check_columns(df, [f['column'] for f in filters])
+    mask = np.ones(len(df), dtype=bool)
+    for f in filters:
+        try:
+            mask &= predicate_mask(df[f['column']], f.get('op', 'eq'), f.get('value'))
+        except TypeError:
+            raise ValueError(f"Value {f.get('value')!r} tidak bisa dibandingkan dengan kolom {f['column']}")
+    return mask
+
+
+def parse_sort(sort):
+    """Normalisasi spec sort ("kolom", {column, order} atau list keduanya) menjadi ((kolom, desc), ...)"""
+    if not sort:
+        return ()
+    if not isinstance(sort, list):
+        sort = [sort]
+    keys = []
+    for item in sort:
+        if isinstance(item, str):
+            item = {"column": item}
+        if not isinstance(item, dict) or 'column' not in item:
+            raise ValueError("Setiap sort harus berupa nama kolom atau object {column, order}")
+        order = item.get('order', 'asc')
+        if order not in ('asc', 'desc'):
+            raise ValueError("order sort harus 'asc' atau 'desc'")
+        keys.append((item['column'], order == 'desc'))
+    return tuple(keys)
+
+
+def sort_index(filename, version, df, sort_keys):
+    """Posisi baris terurut (stabil, NaN di akhir), di-cache per versi dataset dan kolom sort"""
+    key = (filename, version, sort_keys)
+    order = sort_index_cache.get(key) if version else None
+    if order is None:
+        columns = [col for col, _ in sort_keys]
+        _check_columns(df, columns)
+        frame = df[columns].reset_index(drop=True)
+        order = frame.sort_values(columns, ascending=[not desc for _, desc in sort_keys],
+                                  kind='stable', na_position='last').index.to_numpy(dtype=np.int64)
+        sort_index_cache.put(key, order)
+    return order
+
+
+def parse_aggregates(aggregates):
+    """Normalisasi [{func, column, value, as}] menjadi [(alias, func, column, value)]"""
+    if not isinstance(aggregates, list) or not aggregates:
+        raise ValueError("aggregates harus berupa list [{func, column, as}]")
+    parsed = []
+    for agg in aggregates:
+        if not isinstance(agg, dict):
+            raise ValueError("Setiap agregasi harus berupa object {func, column, as}")
+        func, column = agg.get('func', 'count'), agg.get('column')
+        if func not in AGGREGATE_FUNCS:
+            raise ValueError(f"Fungsi agregasi tidak dikenal: {func}. Gunakan salah satu dari: "
+                             f"{', '.join(AGGREGATE_FUNCS)}")
+        if func != 'count' and column is None:
+            raise ValueError(f"Agregasi {func} membutuhkan column")
+        if func == 'rate' and 'value' not in agg:
+            raise ValueError("Agregasi rate membutuhkan value, mis. {func: 'rate', column: 'Churn', value: 'Yes'}")
+        alias = agg.get('as') or (func if column is None else f"{func}_{column}")
+        parsed.append((alias, func, column, agg.get('value')))
+    aliases = [alias for alias, _, _, _ in parsed]
+    if len(set(aliases)) != len(aliases):
+        raise ValueError("Nama hasil agregasi (as) harus unik")
+    return parsed
+
+
+def run_query(df, filters=None, group_by=None, aggregates=None, order_by=None, limit=DEFAULT_QUERY_LIMIT):
+    """Jalankan query agregasi deklaratif, return (DataFrame hasil, info eksekusi)
+
+    Filter dievaluasi lebih dulu (predicate pushdown), lalu hanya kolom group-by/aggregate
+    pada baris yang lolos filter yang dibaca (column pruning).
+    """
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    elif group_by and not isinstance(group_by, list):
+        raise ValueError("group_by harus berupa list nama kolom")
+    group_by = list(group_by or [])
+    aggs = parse_aggregates(aggregates or [{"func": "count"}])
+    needed = list(dict.fromkeys(group_by + [col for _, _, col, _ in aggs if col is not None]))
+    _check_columns(df, needed)
+    aliases = {alias for alias, _, _, _ in aggs}
+    if aliases & set(group_by):
+        raise ValueError("Nama hasil agregasi (as) tidak boleh sama dengan kolom group_by")
+    for alias, func, col, _ in aggs:
+        if func in NUMERIC_FUNCS and not pd.api.types.is_numeric_dtype(df[col]):
+            raise ValueError(f"Agregasi {func} membutuhkan kolom numerik, {col} bukan numerik")
+
+    with stage('filter'):
+        mask = filter_mask(df, filters)
+        sub = df[needed] if mask is None else df.loc[mask, needed]
+
+    with stage('aggregate'):
+        keys = [sub[col] for col in group_by]
+        results = {}
+        for alias, func, col, value in aggs:
+            if func == 'rate':
+                values = (sub[col] == value).astype(float).where(sub[col].notna())
+                func = 'mean'
+            else:
+                values = sub[col] if col is not None else pd.Series(0, index=sub.index)
+                # count tanpa kolom = jumlah baris; count dengan kolom = jumlah nilai non-null
+                func = 'size' if func == 'count' and col is None else func
+            if group_by:
+                results[alias] = values.groupby(keys, dropna=False, observed=True, sort=True).agg(func)
+            else:
+                results[alias] = [len(values) if func == 'size' else values.agg(func)]
+        table = pd.DataFrame(results)
+        if group_by:
+            table = table.reset_index()
+            table.columns = group_by + list(results)
+
+    if order_by:
+        sort_keys = parse_sort(order_by)
+        _check_columns(table, [col for col, _ in sort_keys])
+        table = table.sort_values([col for col, _ in sort_keys], ascending=[not desc for _, desc in sort_keys],
+                                  kind='stable', na_position='last')
+    info = {
+        "rows_scanned": int(len(df)),
+        "rows_matched": int(len(sub)),
+        "columns_read": list(dict.fromkeys([f['column'] for f in filters or []] + needed)),
+        "total_groups": int(len(table)),
+        "truncated": len(table) > limit
+    }
+    return table.head(limit), info
+
+
+def to_records(frame):
+    """Baris DataFrame menjadi list dict dengan NaN sebagai None (untuk JSON)"""
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient='records')
+
+
+def register_routes(app):
+    """Register routes untuk browsing baris dataset"""
+
+    @app.route('/api/rows', methods=['POST'])
+    @reads_dataset
+    def browse_rows():
+        """Satu halaman baris dataset dengan filter, sort dan proyeksi kolom di server"""
+        try:
+            data = request.get_json()
+            filename = data.get('filename')
+            columns = data.get('columns')
+            if not filename:
+                return jsonify({"error": "Filename is required"}), 400
+
+            try:
+                page = int(data.get('page', 1))
+                page_size = int(data.get('page_size', DEFAULT_PAGE_SIZE))
+            except (TypeError, ValueError):
+                return jsonify({"error": "page dan page_size harus berupa angka"}), 400
+            if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+                return jsonify({"error": f"page minimal 1 dan page_size antara 1 dan {MAX_PAGE_SIZE}"}), 400
+
+            # Read-only: hanya kolom filter/sort dan baris di halaman yang dibaca
+            df, version = get_snapshot(filename, app.config['UPLOAD_FOLDER'])
+            if isinstance(columns, str):
+                columns = [columns]
+            elif columns and not isinstance(columns, list):
+                return jsonify({"error": "columns harus berupa list nama kolom"}), 400
+            columns = columns or df.columns.tolist()
+            try:
+                _check_columns(df, columns)
+                with stage('filter'):
+                    mask = filter_mask(df, data.get('filters'))
+                sort_keys = parse_sort(data.get('sort'))
+                with stage('sort'):
+                    if sort_keys:
+                        order = sort_index(filename, version, df, sort_keys)
+                        rows = order if mask is None else order[mask[order]]
+                    else:
+                        rows = np.arange(len(df)) if mask is None else np.flatnonzero(mask)
+            except ValueError as ve:
+                return jsonify({"error": str(ve)}), 400
+
+            total_rows = len(rows)
+            page_rows = rows[(page - 1) * page_size:page * page_size]
+            page_df = df.iloc[page_rows, df.columns.get_indexer(columns)]
+
+            return jsonify({
+                "message": "Rows retrieved successfully",
+                "data": {
+                    "columns": columns,
+                    "rows": to_records(page_df),
+                    "row_index": page_rows.tolist(),
+                    "page": page,
+                    "page_size": page_size,
+                    "total_rows": int(total_rows),
+                    "total_pages": int(-(-total_rows // page_size)),
+                    "dataset_rows": int(len(df)),
+                    "version": version
+                }
+            })
+
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/query', methods=['POST'])
+    @reads_dataset
+    def query_dataset():
+        """Query agregasi deklaratif: filters, group_by, aggregates, order_by dan limit"""
+        try:
+            data = request.get_json()
+            filename = data.get('filename')
+            if not filename:
+                return jsonify({"error": "Filename is required"}), 400
+            try:
+                limit = int(data.get('limit', DEFAULT_QUERY_LIMIT))
+            except (TypeError, ValueError):
+                return jsonify({"error": "limit harus berupa angka"}), 400
+            if not 1 <= limit <= MAX_QUERY_LIMIT:
+                return jsonify({"error": f"limit antara 1 dan {MAX_QUERY_LIMIT}"}), 400
+
+            # Read-only: run_query hanya menyalin kolom yang dibutuhkan pada baris yang lolos filter
+            df = get_dataframe(filename, app.config['UPLOAD_FOLDER'], copy=False)
+            try:
+                table, info = run_query(df, data.get('filters'), data.get('group_by'), data.get('aggregates'),
+                                        data.get('order_by'), limit)
+            except ValueError as ve:
+                return jsonify({"error": str(ve)}), 400
+
+            return jsonify({
+                "message": "Query executed successfully",
+                "data": {
+                    "columns": [str(col) for col in table.columns],
+                    "rows": to_records(table),
+                    **info
+                }
+            })
+
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
@@ -0,0 +1,335 @@
+"""
+Renderer - Render chart di pool worker process menggunakan Figure API (object-oriented) matplotlib
+Library yang digunakan:
+- matplotlib: Figure API (tanpa state global pyplot) untuk menggambar chart
+- seaborn: Untuk statistical plots di atas Axes
+- concurrent.futures: ProcessPoolExecutor untuk render paralel
+
+Modul route hanya menyiapkan "spec" chart yang ringkas (hasil agregasi, bukan DataFrame utuh),
+lalu spec tersebut digambar di worker process yang sudah meng-import matplotlib/seaborn.
+Set RENDER_WORKERS=0 untuk render di process yang sama (tetap thread-safe karena tidak memakai pyplot).
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+import multiprocessing
+import threading
+import os
+from metrics import stage
+
+RENDER_WORKERS = int(os.environ.get('RENDER_WORKERS', min(4, os.cpu_count() or 1)))
+STYLE = 'whitegrid'
+TARGET_COLORS = ['#0343DF', '#75BB4F']
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    """Import library berat sekali per worker supaya render pertama tidak menunggu import"""
+    import matplotlib
+    matplotlib.use('Agg')  # Non-interactive backend
+    import matplotlib.figure  # noqa: F401
+    import seaborn  # noqa: F401
+
+
+def _warmup():
+    return os.getpid()
+
+
+def get_pool():
+    """Pool worker render (dibuat sekali, lalu di-warmup di background)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None and RENDER_WORKERS > 0:
+            # spawn: worker tidak mewarisi thread/lock dari process Flask
+            _pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_init_worker)
+            for _ in range(RENDER_WORKERS):
+                _pool.submit(_warmup)
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def render(spec, formats=('png',), **savefig_kwargs):
+    """Render satu spec chart, return {format: bytes}"""
+    return render_many([spec], formats, **savefig_kwargs)[0]
+
+
+def render_many(specs, formats=('png',), **savefig_kwargs):
+    """Render beberapa spec chart secara paralel di worker pool"""
+    with stage('render'):
+        return _render_many(specs, formats, savefig_kwargs)
+
+
+def _render_many(specs, formats, savefig_kwargs):
+    pool = get_pool()
+    if pool is None:
+        return [render_chart(spec, formats, savefig_kwargs) for spec in specs]
+    try:
+        futures = [pool.submit(render_chart, spec, tuple(formats), savefig_kwargs) for spec in specs]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        # Worker mati (mis. kehabisan memory): buat ulang pool untuk request berikutnya
+        shutdown_pool()
+        return [render_chart(spec, formats, savefig_kwargs) for spec in specs]
+
+
+def render_chart(spec, formats, savefig_kwargs):
+    """Gambar spec ke Figure baru dan simpan ke setiap format (dijalankan di worker)"""
+    import matplotlib
+    import seaborn as sns
+    from matplotlib.figure import Figure
+
+    with matplotlib.rc_context(sns.axes_style(STYLE)):
+        fig = Figure(figsize=spec.get('figsize', (10, 6)))
+        DRAWERS[spec['kind']](fig, spec)
+        # spec boleh meng-override opsi savefig (mis. dpi per chart di dashboard)
+        return render_figure(fig, formats, **{**savefig_kwargs, **spec.get('savefig', {})})
+
+
+def render_figure(fig, formats=('png',), **savefig_kwargs):
+    """Simpan figure ke setiap format yang diminta, return {format: bytes}"""
+    images = {}
+    for fmt in formats:
+        buffer = BytesIO()
+        fig.savefig(buffer, format=fmt, **savefig_kwargs)
+        images[fmt] = buffer.getvalue()
+    return images
+
+
+def _draw_histogram(fig, spec):
+    ax = fig.subplots()
+    edges = spec['edges']
+    ax.hist(edges[:-1], bins=edges, weights=spec['counts'])
+    ax.set_title(f"Histogram of {spec['column']}")
+    ax.set_xlabel(spec['column'])
+    ax.set_ylabel('Frequency')
+
+
+def _draw_boxplot(fig, spec):
+    ax = fig.subplots()
+    ax.bxp(spec['stats'])
+    ax.set_title(f"Boxplot of {spec['column']}")
+
+
+def _draw_heatmap(fig, spec):
+    import seaborn as sns
+    import pandas as pd
+    ax = fig.subplots()
+    matrix = pd.DataFrame(spec['matrix'], index=spec['labels'], columns=spec['labels'])
+    sns.heatmap(matrix, annot=True, fmt='.2f', ax=ax, cmap='coolwarm')
+    ax.set_title(spec.get('title', 'Correlation Matrix'))
+
+
+def _draw_scatter(fig, spec):
+    import numpy as np
+    import seaborn as sns
+    from matplotlib.colors import ListedColormap, LogNorm
+    from matplotlib.patches import Patch
+    ax = fig.subplots()
+    x_col, y_col, hue_column = spec['x_col'], spec['y_col'], spec.get('hue_column')
+    mode = spec['mode']
+
+    if mode == 'density':
+        mesh = ax.pcolormesh(spec['x_edges'], spec['y_edges'], np.ma.masked_equal(spec['counts'], 0),
+                             cmap='viridis', norm=LogNorm())
+        fig.colorbar(mesh, ax=ax, label='Jumlah data')
+    elif mode == 'hue_density':
+        # Warna = kategori hue mayoritas di setiap bin
+        hue_values = spec['hue_values']
+        palette = sns.color_palette('Set2', len(hue_values))
+        ax.pcolormesh(spec['x_edges'], spec['y_edges'], np.ma.masked_invalid(spec['codes']),
+                      cmap=ListedColormap(palette), vmin=-0.5, vmax=len(hue_values) - 0.5)
+        ax.legend(handles=[Patch(color=palette[i], label=value) for i, value in enumerate(hue_values)],
+                  title=hue_column)
+    elif mode == 'hue_points':
+        sns.scatterplot(x=spec['x'], y=spec['y'], hue=spec['hue'], ax=ax, alpha=0.7)
+        ax.legend(title=hue_column)
+    else:
+        ax.scatter(spec['x'], spec['y'], alpha=0.7)
+
+    ax.set_xlabel(x_col)
+    ax.set_ylabel(y_col)
+    ax.set_title(f'Scatter Plot: {x_col} vs {y_col}')
+
+
+def _draw_bar(fig, spec):
+    import pandas as pd
+    import seaborn as sns
+    ax = fig.subplots()
+    x_col, y_col, hue_column = spec['x_col'], spec['y_col'], spec.get('hue_column')
+    plot_df = pd.DataFrame(spec['data'])
+
+    # Data sudah di-aggregate (mean per grup), seaborn hanya menggambar
+    if hue_column:
+        sns.barplot(data=plot_df, x=x_col, y=y_col, hue=hue_column, ax=ax, errorbar=None, palette='Set2')
+    else:
+        sns.barplot(data=plot_df, x=x_col, y=y_col, ax=ax, errorbar=None, color='steelblue')
+
+    ax.set_xlabel(x_col, fontsize=10)
+    ax.set_ylabel(y_col, fontsize=10)
+    ax.set_title(f'Bar Chart: {y_col} vs {x_col}', fontsize=12, fontweight='bold')
+    if hue_column:
+        ax.legend(title=hue_column, fontsize=9)
+    # Rotate x-axis labels untuk readability
+    if plot_df[x_col].nunique() > 5:
+        ax.tick_params(axis='x', labelrotation=45, labelsize=8)
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment('right')
+    else:
+        ax.tick_params(axis='x', labelrotation=0, labelsize=9)
+
+
+def _draw_line(fig, spec):
+    import pandas as pd
+    import seaborn as sns
+    ax = fig.subplots()
+    x_col, y_col, hue_column = spec['x_col'], spec['y_col'], spec.get('hue_column')
+    plot_df = pd.DataFrame(spec['data'])
+
+    if hue_column:
+        sns.lineplot(data=plot_df, x=x_col, y=y_col, hue=hue_column, ax=ax, marker='o', markersize=3)
+        ax.legend(title=hue_column)
+    else:
+        sns.lineplot(data=plot_df, x=x_col, y=y_col, ax=ax, marker='o', markersize=3)
+    ax.set_xlabel(x_col)
+    ax.set_ylabel(y_col)
+    ax.set_title(f'Line Chart: {x_col} vs {y_col}')
+    # Rotate x-axis labels if too many
+    if plot_df[x_col].nunique() > 20:
+        ax.tick_params(axis='x', labelrotation=45)
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment('right')
+
+
+def _grid_axes(fig, n_panels, n_cols):
+    n_rows = (n_panels + n_cols - 1) // n_cols
+    axes = fig.subplots(n_rows, n_cols, squeeze=False).ravel()
+    # Remove unused subplots
+    for idx in range(n_panels, len(axes)):
+        fig.delaxes(axes[idx])
+    return axes
+
+
+def _draw_countplot(fig, spec):
+    import pandas as pd
+    import seaborn as sns
+    panels = spec['panels']
+    target_col = spec.get('target_col')
+    axes = _grid_axes(fig, len(panels), min(2, len(panels)))
+
+    for ax, panel in zip(axes, panels):
+        col = panel['column']
+        # Tabel frekuensi (crosstab) sudah dihitung, gambar sebagai bar per kategori
+        counts = pd.DataFrame(panel['counts'], index=panel['categories'], columns=panel['hue_values'])
+        long_df = counts.rename_axis(index=col, columns='__hue__').stack().rename('count').reset_index()
+        if target_col:
+            palette = TARGET_COLORS if len(panel['hue_values']) <= len(TARGET_COLORS) else 'Set2'
+            sns.barplot(data=long_df, x=col, y='count', hue='__hue__', order=panel['categories'],
+                        hue_order=panel['hue_values'], palette=palette, edgecolor='black', ax=ax)
+            ax.legend(title=target_col)
+        else:
+            sns.barplot(data=long_df, x=col, y='count', order=panel['categories'], edgecolor='black', ax=ax)
+        ax.set_title(f'{col}')
+        ax.set_ylabel('count')
+        ax.tick_params(axis='x', rotation=45)
+
+        # Add labels on bars
+        for container in ax.containers:
+            ax.bar_label(container)
+    fig.tight_layout()
+
+
+def _draw_boxplot_multi(fig, spec):
+    import seaborn as sns
+    panels = spec['panels']
+    cat_col, target_col = spec['cat_col'], spec.get('target_col')
+    axes = fig.subplots(nrows=1, ncols=max(len(panels), 1), squeeze=False).ravel()
+
+    for ax, panel in zip(axes, panels):
+        num_col = panel['num_col']
+        if 'strip' in panel:
+            strip = panel['strip']
+            hue_values = sorted(set(strip['hue']))
+            palette = TARGET_COLORS if len(hue_values) <= len(TARGET_COLORS) else 'Set2'
+            sns.stripplot(x=strip['x'], y=strip['y'], hue=strip['hue'], hue_order=hue_values,
+                          palette=palette, ax=ax)
+            ax.legend(title=target_col)
+            ax.set_xlabel(cat_col)
+            ax.set_ylabel(num_col)
+        else:
+            ax.bxp(panel['stats'])
+            ax.set_xlabel(cat_col)
+            ax.set_ylabel(num_col)
+        ax.set_title(f'{num_col} vs {cat_col}')
+        ax.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+
+
+def _draw_cluster(fig, spec):
+    import numpy as np
+    axes = fig.subplots(1, 2)
+    x_col, y_col = spec['x_col'], spec['y_col']
+
+    # Scatter plot (atau raster cluster mayoritas untuk dataset besar)
+    if spec['mode'] == 'density':
+        scatter = axes[0].pcolormesh(spec['x_edges'], spec['y_edges'], np.ma.masked_invalid(spec['majority']),
+                                     cmap='viridis')
+    else:
+        scatter = axes[0].scatter(spec['x'], spec['y'], c=spec['labels'], cmap='viridis', alpha=0.6)
+    if spec.get('centers') is not None:
+        centers = np.asarray(spec['centers'])
+        axes[0].scatter(centers[:, 0], centers[:, 1], c='red', marker='x', s=200, linewidths=3, label='Centroids')
+        axes[0].legend()
+
+    axes[0].set_xlabel(x_col)
+    axes[0].set_ylabel(y_col)
+    axes[0].set_title(f"{spec['method']} Clustering")
+    fig.colorbar(scatter, ax=axes[0])
+
+    # Cluster distribution
+    cluster_counts = spec['cluster_counts']
+    axes[1].bar(list(cluster_counts.keys()), list(cluster_counts.values()), color='skyblue', edgecolor='black')
+    axes[1].set_xlabel('Cluster')
+    axes[1].set_ylabel('Jumlah Data')
+    axes[1].set_title('Distribusi Cluster')
+    axes[1].grid(axis='y', alpha=0.3)
+    fig.tight_layout()
+
+
+def _draw_confusion_matrix(fig, spec):
+    import seaborn as sns
+    ax = fig.subplots()
+    sns.heatmap(spec['matrix'], annot=True, fmt='d', cmap='Blues', ax=ax,
+                cbar_kws={'label': 'Count'}, linewidths=0.5, linecolor='gray')
+    ax.set_xlabel('Predicted', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Actual', fontsize=12, fontweight='bold')
+    ax.set_title('Confusion Matrix', fontsize=14, fontweight='bold', pad=20)
+
+    # Set labels for classes
+    ax.set_xticklabels(spec['class_labels'], rotation=0)
+    ax.set_yticklabels(spec['class_labels'], rotation=0)
+    fig.tight_layout()
+
+
+DRAWERS = {
+    'histogram': _draw_histogram,
+    'boxplot': _draw_boxplot,
+    'heatmap': _draw_heatmap,
+    'scatter': _draw_scatter,
+    'bar': _draw_bar,
+    'line': _draw_line,
+    'countplot': _draw_countplot,
+    'boxplot_multi': _draw_boxplot_multi,
+    'cluster': _draw_cluster,
+    'confusion_matrix': _draw_confusion_matrix,
+}
@@ -0,0 +1,372 @@
+"""
+Sampling - Sampel reservoir berstrata per versi dataset untuk eksplorasi cepat dataset besar
+Library yang digunakan:
+- numpy: Untuk kunci acak reservoir dan estimasi error bound
+- pandas: Untuk kolom strata dan sampel DataFrame
+- concurrent.futures: ThreadPoolExecutor untuk refine ke hasil penuh di background
+
+Setiap baris mendapat kunci acak; reservoir per strata (nilai target yang terdeteksi, mis. Churn)
+menyimpan baris dengan kunci terkecil, sehingga sampel bisa dibangun per chunk dan setiap strata
+adalah simple random sample. Ukuran sampel per strata proporsional dengan ukuran strata di data
+penuh (sampel self-weighting: proporsi target pada sampel sama dengan data penuh).
+
+/api/analyze, /api/visualize dan /api/clustering menerima `sampling`: "auto" (default, sampel jika
+baris > SAMPLE_THRESHOLD), "sample" atau "full". Hasil dari sampel berisi blok "sampling" dengan
+estimasi dan confidence interval 95% (rata-rata dan proporsi dengan rumus stratified sampling,
+kuantil dengan interval bebas distribusi). Dengan `refine: true` request yang sama dijalankan
+ulang dengan data penuh di background; hasilnya diambil lewat GET /api/refine/<job_id> dan
+request "auto" berikutnya untuk versi dataset yang sama langsung memakai hasil penuh tersebut.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+from flask import Response, current_app, jsonify, request
+from cache import LRUCache
+from metrics import cache_lookup, register_cache, stage
+from utils import on_dataset_change, detect_target_column, get_dataset_version
+from lazy import lazy_module
+
+pd = lazy_module('pandas')
+
+SAMPLE_SIZE = int(os.environ.get('SAMPLE_SIZE', 100_000))
+# Mode "auto" memakai sampel hanya untuk dataset dengan baris lebih dari ini
+SAMPLE_THRESHOLD = int(os.environ.get('SAMPLE_THRESHOLD', 500_000))
+SAMPLING_MODES = ('auto', 'sample', 'full')
+# Target dengan nilai unik lebih dari ini tidak dipakai sebagai strata (sampel acak biasa)
+MAX_STRATA = 20
+# Baris per chunk saat mengisi reservoir
+RESERVOIR_CHUNK_SIZE = 1_000_000
+Z_95 = 1.959964
+RANDOM_STATE = 42
+REFINE_WORKERS = int(os.environ.get('REFINE_WORKERS', 1))
+
+# Sampel per dataset: filename -> (versi, DatasetSample)
+_samples = {}
+_samples_lock = threading.Lock()
+
+# Response hasil refine (data penuh) per (filename, versi, path, parameter request)
+refined_cache = register_cache('refined', LRUCache(max_bytes=128 * 1024 * 1024,
+                                                   sizeof=lambda entry: len(entry[1])))
+_jobs = {}
+_jobs_lock = threading.Lock()
+_executor = None
+
+
+class StratifiedReservoir:
+    """Reservoir per strata: setiap baris diberi kunci acak, reservoir menyimpan kunci terkecil"""
+
+    def __init__(self, capacity, seed=RANDOM_STATE):
+        self.capacity = capacity
+        self._rng = np.random.default_rng(seed)
+        self._reservoirs = {}  # kode strata -> (kunci, posisi baris)
+        self.counts = {}
+        self.n_rows = 0
+
+    def add(self, codes):
+        """Tambahkan satu chunk baris (kode strata per baris, posisi melanjutkan chunk sebelumnya)"""
+        keys = self._rng.random(len(codes))
+        positions = np.arange(self.n_rows, self.n_rows + len(codes))
+        for code in np.unique(codes):
+            mask = codes == code
+            new_keys, new_positions = keys[mask], positions[mask]
+            self.counts[code] = self.counts.get(code, 0) + len(new_keys)
+            if code in self._reservoirs:
+                old_keys, old_positions = self._reservoirs[code]
+                new_keys = np.concatenate([old_keys, new_keys])
+                new_positions = np.concatenate([old_positions, new_positions])
+            if len(new_keys) > self.capacity:
+                keep = np.argpartition(new_keys, self.capacity - 1)[:self.capacity]
+                new_keys, new_positions = new_keys[keep], new_positions[keep]
+            self._reservoirs[code] = (new_keys, new_positions)
+        self.n_rows += len(codes)
+
+    def allocation(self, size):
+        """Ukuran sampel per strata, proporsional terhadap ukuran strata (minimal 1 baris)"""
+        size = min(size, self.n_rows)
+        return {code: min(count, max(1, int(round(size * count / self.n_rows))))
+                for code, count in self.counts.items()}
+
+    def sample(self, size):
+        """Posisi baris sampel (terurut) dan kode strata setiap baris sampel"""
+        positions, codes = [], []
+        for code, n in self.allocation(size).items():
+            keys, rows = self._reservoirs[code]
+            if len(keys) > n:
+                rows = rows[np.argpartition(keys, n - 1)[:n]]
+            positions.append(rows)
+            codes.append(np.full(len(rows), code))
+        positions, codes = np.concatenate(positions), np.concatenate(codes)
+        order = np.argsort(positions, kind='stable')
+        return positions[order], codes[order]
+
+
+def _interval(estimate, variance):
+    std_error = float(np.sqrt(max(variance, 0.0)))
+    return {"estimate": float(estimate), "std_error": std_error,
+            "ci_low": float(estimate - Z_95 * std_error), "ci_high": float(estimate + Z_95 * std_error)}
+
+
+class DatasetSample:
+    """Sampel berstrata satu versi dataset beserta estimator dengan error bound"""
+
+    def __init__(self, df, size=SAMPLE_SIZE, target=None):
+        self.n_rows = len(df)
+        self.target = target if target is not None else detect_target_column(df)
+        strata_values = None
+        if self.target is not None:
+            codes, strata_values = pd.factorize(df[self.target], use_na_sentinel=False)
+            if len(strata_values) > MAX_STRATA:
+                self.target, strata_values = None, None
+        if strata_values is None:
+            codes = np.zeros(self.n_rows, dtype=np.intp)
+
+        reservoir = StratifiedReservoir(size)
+        for start in range(0, self.n_rows, RESERVOIR_CHUNK_SIZE):
+            reservoir.add(codes[start:start + RESERVOIR_CHUNK_SIZE])
+        positions, sample_codes = reservoir.sample(size)
+        self.df = df.iloc[positions]
+
+        # kode strata -> (nilai target, jumlah baris di data penuh, posisi baris di sampel)
+        self._strata = {}
+        for code, count in reservoir.counts.items():
+            rows = np.flatnonzero(sample_codes == code)
+            label = strata_values[code] if strata_values is not None else 'all'
+            label = None if pd.isna(label) else (label.item() if hasattr(label, 'item') else label)
+            self._strata[code] = (label, count, rows)
+
+    @property
+    def fraction(self):
+        return len(self.df) / self.n_rows if self.n_rows else 1.0
+
+    def mean(self, values):
+        """Estimasi rata-rata populasi (stratified, NaN diabaikan) dengan confidence interval 95%"""
+        values = np.asarray(values, dtype=float)
+        estimate, variance, weight = 0.0, 0.0, 0.0
+        for _, count, rows in self._strata.values():
+            v = values[rows]
+            v = v[~np.isnan(v)]
+            if not len(v):
+                continue
+            w = count / self.n_rows
+            weight += w
+            estimate += w * v.mean()
+            if len(v) > 1:
+                # Finite population correction per strata
+                variance += w ** 2 * (1 - len(rows) / count) * v.var(ddof=1) / len(v)
+        if weight == 0:
+            return None
+        return _interval(estimate / weight, variance / weight ** 2)
+
+    def proportion(self, mask):
+        bounds = self.mean(np.asarray(mask, dtype=float))
+        if bounds:
+            bounds.update(ci_low=max(bounds["ci_low"], 0.0), ci_high=min(bounds["ci_high"], 1.0))
+        return bounds
+
+    def total(self, mask):
+        """Estimasi jumlah baris di data penuh yang memenuhi mask (sampel)"""
+        bounds = self.proportion(mask)
+        return {key: value * self.n_rows for key, value in bounds.items()} if bounds else None
+
+    def quantile(self, values, q):
+        """Kuantil sampel dan interval 95% bebas distribusi (order statistic binomial)"""
+        values = np.sort(np.asarray(values, dtype=float))
+        values = values[~np.isnan(values)]
+        m = len(values)
+        if not m:
+            return None
+        spread = Z_95 * np.sqrt(m * q * (1 - q))
+        low = int(np.clip(np.floor(m * q - spread), 0, m - 1))
+        high = int(np.clip(np.ceil(m * q + spread), 0, m - 1))
+        return {"estimate": float(np.quantile(values, q)), "ci_low": float(values[low]), "ci_high": float(values[high])}
+
+    def column_bounds(self, columns, top=20):
+        """Error bound per kolom: rata-rata (numerik) atau proporsi kategori teratas (kategorikal)"""
+        bounds = {}
+        for col in columns:
+            if col not in self.df.columns:
+                continue
+            series = self.df[col]
+            if pd.api.types.is_numeric_dtype(series):
+                bounds[col] = {"mean": self.mean(series.to_numpy(dtype=float, na_value=np.nan))}
+            else:
+                bounds[col] = {"share": {str(value): self.proportion((series == value).to_numpy())
+                                         for value in series.value_counts().index[:top]}}
+        return bounds
+
+    def report(self, **extra):
+        """Blok "sampling" untuk response: ukuran sampel, strata dan error bound"""
+        return {
+            "mode": "sample",
+            "sample_rows": int(len(self.df)),
+            "total_rows": int(self.n_rows),
+            "fraction": round(self.fraction, 6),
+            "stratified_by": self.target,
+            "strata": [{"value": label, "rows": int(count), "sample_rows": int(len(rows))}
+                       for label, count, rows in self._strata.values()],
+            "confidence": 0.95,
+            **extra
+        }
+
+
+def use_sample(n_rows, mode='auto'):
+    """True jika request dengan mode ini dijawab dari sampel"""
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"sampling harus salah satu dari: {', '.join(SAMPLING_MODES)}")
+    if mode == 'full' or n_rows <= SAMPLE_SIZE:
+        return False
+    return mode == 'sample' or n_rows > SAMPLE_THRESHOLD
+
+
+def get_sample(filename, version, df):
+    """Sampel untuk versi dataset tertentu (dibangun sekali per versi)"""
+    with _samples_lock:
+        entry = _samples.get(filename)
+        hit = bool(entry) and entry[0] == version
+    cache_lookup('sample', hit)
+    if hit:
+        return entry[1]
+    with stage('sample'):
+        sample = DatasetSample(df)
+    with _samples_lock:
+        _samples[filename] = (version, sample)
+    return sample
+
+
+def sample_for(filename, version, df, mode='auto'):
+    """Sampel jika request dijawab dari sampel, None jika memakai data penuh"""
+    return get_sample(filename, version, df) if use_sample(len(df), mode) else None
+
+
+def build_sample(filename, version, df):
+    """Bangun sampel saat upload untuk dataset besar (request eksplorasi pertama tidak menunggu)"""
+    if len(df) > SAMPLE_THRESHOLD:
+        return get_sample(filename, version, df)
+    return None
+
+
+def resolve(filename, version, df, params):
+    """(sample, refined) untuk request ini
+
+    sample None berarti hitung dengan data penuh; refined berisi response data penuh dari refine
+    sebelumnya (hanya mode "auto") yang bisa langsung dikembalikan.
+    """
+    mode = params.get('sampling', 'auto')
+    sample = sample_for(filename, version, df, mode)
+    if sample is not None and mode == 'auto':
+        refined = refined_response(request.path, filename, version, params)
+        if refined is not None:
+            return None, refined
+    return sample, None
+
+
+def report(sample, filename, version, params, error_bounds):
+    """Blok "sampling" response, sekaligus menjadwalkan refine jika diminta (`refine: true`)"""
+    refine = start_refine(request.path, filename, version, params) if params.get('refine') else None
+    return sample.report(error_bounds=error_bounds, refine=refine)
+
+
+def _refine_key(path, filename, version, params):
+    params = {k: v for k, v in params.items() if k not in ('sampling', 'refine')}
+    return (filename, version, path, json.dumps(params, sort_keys=True, default=str))
+
+
+def _job_id(key):
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+
+
+def refined_response(path, filename, version, params):
+    """Response hasil refine (data penuh) untuk request yang sama, None jika belum ada"""
+    entry = refined_cache.get(_refine_key(path, filename, version, params))
+    if entry is None:
+        return None
+    status, body = entry
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _get_executor():
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REFINE_WORKERS, thread_name_prefix='sample-refine')
+        return _executor
+
+
+def _run_refine(app, job_id, path, payload):
+    job = _jobs.get(job_id)
+    if job is None:
+        return
+    job["status"] = "running"
+    try:
+        # Request yang sama dijalankan ulang dengan data penuh (lewat lock dataset dan instrumentasi)
+        with app.test_request_context(path, method='POST', json=dict(payload, sampling='full', refine=False)):
+            response = app.full_dispatch_request()
+            body = response.get_data()
+    except Exception as e:
+        job.update(status="failed", error=str(e))
+        return
+    filename, version = job["key"][0], job["key"][1]
+    if get_dataset_version(filename) != version:
+        job["status"] = "stale"
+    elif response.status_code != 200:
+        job.update(status="failed", error=body.decode(errors='replace'))
+    else:
+        refined_cache.put(job["key"], (response.status_code, body))
+        job["status"] = "done"
+
+
+def start_refine(path, filename, version, params):
+    """Jadwalkan request yang sama dengan data penuh di background, return {job_id, status}"""
+    key = _refine_key(path, filename, version, params)
+    job_id = _job_id(key)
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is not None and job["status"] == "done" and key not in refined_cache:
+            job["status"] = "expired"
+        # Job yang gagal atau hasilnya sudah tidak ada (dataset berubah, cache penuh) dijalankan ulang
+        if job is None or job["status"] in ('failed', 'stale', 'expired'):
+            job = _jobs[job_id] = {"key": key, "status": "pending", "error": None}
+            submit = True
+        else:
+            submit = False
+    if submit:
+        app = current_app._get_current_object()
+        _get_executor().submit(_run_refine, app, job_id, path, dict(params))
+    return {"job_id": job_id, "status": job["status"]}
+
+
+@on_dataset_change
+def _drop_dataset(filename, change):
+    """Sampel dan hasil refine dari versi dataset lama tidak dipakai lagi"""
+    with _samples_lock:
+        _samples.pop(filename, None)
+    refined_cache.invalidate(lambda key: key[0] == filename)
+    with _jobs_lock:
+        for job_id in [job_id for job_id, job in _jobs.items() if job["key"][0] == filename]:
+            del _jobs[job_id]
+
+
+def register_routes(app):
+    """Register route status refine"""
+
+    @app.route('/api/refine/<job_id>', methods=['GET'])
+    def refine_status(job_id):
+        """Status refine; jika selesai, response endpoint asal dengan data penuh"""
+        job = _jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "Refine job tidak ditemukan (dataset mungkin sudah berubah)"}), 404
+        if job["status"] == "done":
+            entry = refined_cache.get(job["key"])
+            if entry is not None:
+                status, body = entry
+                return Response(body, status=status, mimetype='application/json')
+            job["status"] = "expired"
+        if job["status"] in ('stale', 'expired'):
+            return jsonify({"error": "Hasil refine tidak tersedia lagi (dataset berubah atau cache penuh)",
+                            "data": {"job_id": job_id, "status": job["status"]}}), 410
+        if job["status"] == "failed":
+            return jsonify({"error": job["error"], "data": {"job_id": job_id, "status": "failed"}}), 500
+        return jsonify({"message": "Refine sedang berjalan", "data": {"job_id": job_id, "status": job["status"]}}), 202
@@ -0,0 +1,249 @@
+"""
+Score Batch - Scoring churn offline untuk file besar tanpa melalui API
+Library yang digunakan:
+- pandas: Untuk membaca input CSV per chunk dan menulis hasil scoring
+- pyarrow (opsional): Untuk membaca input Parquet per batch
+- concurrent.futures: ProcessPoolExecutor untuk scoring chunk secara paralel
+- scoring: Untuk memuat artefak model dan menerapkan schema preprocessing
+
+Artefak model dibuat otomatis oleh /api/train-model (folder models/). Input dibaca per chunk,
+setiap chunk di-score di worker process (artefak dimuat sekali per worker) dan hasilnya ditulis
+berurutan ke output. Setelah setiap chunk ditulis, progres disimpan ke checkpoint
+`<output>.checkpoint.json`; jika proses terhenti, jalankan ulang dengan --resume untuk
+melanjutkan dari chunk terakhir yang sudah ditulis.
+
+Contoh:
+    python score_batch.py --model "models/Dataset Akdat.joblib" --input pelanggan.csv --output skor.csv
+    python score_batch.py --model "models/Dataset Akdat.joblib" --input pelanggan.parquet --output skor.csv --id-column customerID
+    python score_batch.py --model "models/Dataset Akdat.joblib" --input pelanggan.csv --output skor.csv --resume
+"""
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import scoring
+
+DEFAULT_CHUNK_SIZE = 50_000
+SCORE_WORKERS = int(os.environ.get('SCORE_WORKERS', os.cpu_count() or 1))
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+
+# Artefak model di worker process (dimuat sekali oleh initializer)
+_artifact = None
+
+
+def _init_worker(model_path):
+    global _artifact
+    _artifact = scoring.load_artifact(model_path)
+
+
+def score_chunk(start_row, chunk, id_column=None):
+    """Score satu chunk, return (baris CSV hasil dalam bytes, jumlah baris, jumlah baris ter-score)"""
+    scores, n_scored = scoring.score_frame(_artifact, chunk)
+    out = pd.DataFrame({'row': np.arange(start_row, start_row + len(chunk))})
+    if id_column:
+        out[id_column] = chunk[id_column].to_numpy()
+    for col in scores.columns:
+        out[col] = scores[col].to_numpy()
+    return out.to_csv(index=False, header=False).encode(), len(chunk), n_scored
+
+
+def output_header(artifact, id_column=None):
+    columns = ['row'] + ([id_column] if id_column else []) + ['prediction']
+    columns += [f'probability_{cls}' for cls in artifact['classes']]
+    return pd.DataFrame(columns=columns).to_csv(index=False).encode()
+
+
+def iter_chunks(path, chunk_size, columns, skip_rows=0, dtype=None):
+    """DataFrame per chunk (hanya kolom yang dibutuhkan), mulai dari baris data ke-skip_rows"""
+    if path.lower().endswith(PARQUET_EXTENSIONS):
+        yield from _iter_parquet(path, chunk_size, columns, skip_rows)
+        return
+    # Baris 0 adalah header; baris data yang sudah di-score dilewati tanpa di-parse ke DataFrame
+    skiprows = (lambda i: 0 < i <= skip_rows) if skip_rows else None
+    yield from pd.read_csv(path, chunksize=chunk_size, usecols=lambda col: col in columns,
+                           dtype=dtype, skiprows=skiprows)
+
+
+def _iter_parquet(path, chunk_size, columns, skip_rows):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Input Parquet membutuhkan pyarrow (pip install pyarrow)")
+    parquet = pq.ParquetFile(path)
+    names = [name for name in parquet.schema_arrow.names if name in columns]
+    # Row group yang seluruhnya sudah di-score tidak dibaca sama sekali
+    first_group, offset = 0, skip_rows
+    while first_group < parquet.num_row_groups and offset >= parquet.metadata.row_group(first_group).num_rows:
+        offset -= parquet.metadata.row_group(first_group).num_rows
+        first_group += 1
+    row_groups = list(range(first_group, parquet.num_row_groups))
+    if not row_groups:
+        return
+    for batch in parquet.iter_batches(batch_size=chunk_size, row_groups=row_groups, columns=names):
+        chunk = batch.to_pandas()
+        if offset:
+            dropped = min(offset, len(chunk))
+            chunk, offset = chunk.iloc[dropped:], offset - dropped
+        if len(chunk):
+            yield chunk.reset_index(drop=True)
+
+
+def _input_signature(path):
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def read_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_checkpoint(path, state):
+    """Tulis checkpoint secara atomik (file sementara lalu rename)"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _validate_resume(checkpoint, state):
+    for key in ('input', 'model', 'trained_at', 'id_column'):
+        if checkpoint.get(key) != state[key]:
+            raise SystemExit(f"Checkpoint tidak cocok dengan run ini ({key} berbeda); "
+                             f"jalankan dengan --overwrite untuk mulai dari awal")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scoring churn offline dari file CSV/Parquet dengan model terlatih")
+    parser.add_argument('--model', required=True, help="File artefak model (.joblib) dari /api/train-model")
+    parser.add_argument('--input', required=True, help="File input CSV atau Parquet (.parquet)")
+    parser.add_argument('--output', required=True, help="File output CSV hasil scoring")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Jumlah baris per chunk")
+    parser.add_argument('--workers', type=int, default=SCORE_WORKERS,
+                        help="Jumlah worker process (0 = scoring di process yang sama)")
+    parser.add_argument('--id-column', default=None, help="Kolom ID yang ikut ditulis ke output (mis. customerID)")
+    parser.add_argument('--resume', action='store_true', help="Lanjutkan dari checkpoint run sebelumnya")
+    parser.add_argument('--overwrite', action='store_true', help="Mulai dari awal walaupun ada checkpoint")
+    args = parser.parse_args(argv)
+
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size harus lebih besar dari 0")
+
+    artifact = scoring.load_artifact(args.model)
+    checkpoint_path = f'{args.output}.checkpoint.json'
+    state = {
+        "input": _input_signature(args.input),
+        "model": os.path.abspath(args.model),
+        "trained_at": artifact['trained_at'],
+        "id_column": args.id_column,
+        "chunk_size": args.chunk_size,
+        "rows_done": 0,
+        "rows_scored": 0,
+        "output_bytes": 0,
+        "completed": False
+    }
+
+    checkpoint = read_checkpoint(checkpoint_path)
+    if checkpoint and not (args.resume or args.overwrite):
+        raise SystemExit(f"Checkpoint {checkpoint_path} ditemukan: jalankan dengan --resume untuk melanjutkan "
+                         f"atau --overwrite untuk mulai dari awal")
+    if args.resume and checkpoint:
+        _validate_resume(checkpoint, state)
+        if checkpoint.get('completed'):
+            print(f"Scoring sudah selesai sebelumnya ({checkpoint['rows_done']:,d} baris)")
+            return 0
+        for key in ('rows_done', 'rows_scored', 'output_bytes'):
+            state[key] = checkpoint[key]
+
+    columns = set(artifact['feature_columns'])
+    if args.id_column:
+        columns.add(args.id_column)
+    # Kolom yang di-label encode dibaca sebagai string (sama seperti saat preprocessing)
+    dtype = {col: str for col in scoring.encoded_columns(artifact['schema']) if col in columns}
+    if args.id_column:
+        dtype[args.id_column] = str
+
+    # Output dipotong ke posisi checkpoint terakhir (chunk yang belum tercatat ditulis ulang)
+    if state['output_bytes']:
+        out = open(args.output, 'r+b')
+        out.truncate(state['output_bytes'])
+        out.seek(state['output_bytes'])
+        print(f"Melanjutkan dari baris {state['rows_done']:,d}", flush=True)
+    else:
+        out = open(args.output, 'wb')
+        out.write(output_header(artifact, args.id_column))
+        state['output_bytes'] = out.tell()
+
+    rows_at_start = state['rows_done']
+    start = time.perf_counter()
+
+    def commit(result):
+        payload, n_rows, n_scored = result
+        out.write(payload)
+        out.flush()
+        os.fsync(out.fileno())
+        state['rows_done'] += n_rows
+        state['rows_scored'] += n_scored
+        state['output_bytes'] = out.tell()
+        write_checkpoint(checkpoint_path, state)
+        elapsed = time.perf_counter() - start
+        rate = (state['rows_done'] - rows_at_start) / elapsed if elapsed > 0 else 0.0
+        print(f"  {state['rows_done']:>12,d} baris  {rate:>12,.0f} baris/detik", flush=True)
+
+    chunks = iter_chunks(args.input, args.chunk_size, columns, state['rows_done'], dtype)
+    pool = None
+    try:
+        if args.workers > 0:
+            # spawn: worker memuat artefak sendiri, chunk dikirim ke worker tanpa state process induk
+            pool = ProcessPoolExecutor(max_workers=args.workers,
+                                       mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker, initargs=(args.model,))
+            # Jumlah chunk yang sedang diproses dibatasi supaya memory tetap konstan;
+            # hasil ditulis sesuai urutan input
+            pending = deque()
+            next_row = state['rows_done']
+            for chunk in chunks:
+                pending.append(pool.submit(score_chunk, next_row, chunk, args.id_column))
+                next_row += len(chunk)
+                if len(pending) >= args.workers * 2:
+                    commit(pending.popleft().result())
+            while pending:
+                commit(pending.popleft().result())
+        else:
+            _init_worker(args.model)
+            for chunk in chunks:
+                commit(score_chunk(state['rows_done'], chunk, args.id_column))
+    except KeyboardInterrupt:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = None
+        print(f"\nDihentikan setelah {state['rows_done']:,d} baris; jalankan ulang dengan --resume untuk melanjutkan",
+              file=sys.stderr)
+        return 130
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        out.close()
+
+    state['completed'] = True
+    write_checkpoint(checkpoint_path, state)
+    elapsed = time.perf_counter() - start
+    processed = state['rows_done'] - rows_at_start
+    print(f"Selesai: {state['rows_done']:,d} baris ({state['rows_scored']:,d} ter-score, "
+          f"{state['rows_done'] - state['rows_scored']:,d} tidak bisa di-score) -> {args.output}")
+    print(f"Run ini: {processed:,d} baris dalam {elapsed:.2f}s ({processed / elapsed if elapsed > 0 else 0:,.0f} baris/detik)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Scoring - Schema preprocessing dan artefak model untuk scoring di luar API
+Library yang digunakan:
+- pandas: Untuk menerapkan ulang langkah preprocessing pada data baru
+- numpy: Untuk operasi numerik
+- joblib: Untuk menyimpan dan memuat artefak model (model, scaler, kolom fitur, schema)
+
+Setiap langkah /api/preprocess dan /api/drop-columns dicatat sebagai schema per dataset (nilai
+pengisi missing value, kelas label encoding, kolom yang di-drop). Saat model dilatih, model,
+scaler, kolom fitur dan schema disimpan ke satu file artefak sehingga data mentah baru bisa
+di-preprocess dan di-score dengan cara yang sama (lihat score_batch.py).
+
+Baris yang tidak bisa di-score (kategori yang tidak dikenal saat training, nilai kosong yang
+tidak diisi schema) tidak dibuang: prediksinya dikosongkan supaya urutan baris tetap sama.
+"""
+from datetime import datetime, timezone
+import os
+import threading
+import numpy as np
+from lazy import lazy_module
+
+pd = lazy_module('pandas')
+joblib = lazy_module('joblib', 'model')
+
+ARTIFACT_FORMAT = 1
+
+# Langkah preprocessing per dataset sejak upload terakhir: filename -> [step, ...]
+_schemas = {}
+_schema_lock = threading.Lock()
+
+
+def record_step(filename, step):
+    """Catat satu langkah preprocessing (dict dengan key "type") untuk dataset"""
+    with _schema_lock:
+        _schemas.setdefault(filename, []).append(step)
+
+
+def reset_schema(filename):
+    """Dataset di-upload ulang: schema mulai dari data mentah lagi"""
+    with _schema_lock:
+        _schemas.pop(filename, None)
+
+
+def get_schema(filename):
+    with _schema_lock:
+        return list(_schemas.get(filename, []))
+
+
+def encoded_columns(schema):
+    """Kolom yang di-label encode (dibaca sebagai string supaya cocok dengan kelas saat training)"""
+    columns = set()
+    for step in schema:
+        if step["type"] == "label_encode":
+            columns.update(step["classes"])
+    return sorted(columns)
+
+
+def apply_schema(df, schema):
+    """Terapkan schema ke data baru, return (DataFrame, mask baris yang masih valid)"""
+    df = df.copy()
+    valid = pd.Series(True, index=df.index)
+    for step in schema:
+        kind = step["type"]
+        if kind == "fillna":
+            for col, value in step["values"].items():
+                if col in df.columns:
+                    df[col] = df[col].fillna(value)
+        elif kind == "dropna":
+            # Saat training baris ini dibuang; di sini baris dipertahankan tetapi tidak di-score
+            columns = [col for col in step["columns"] if col in df.columns]
+            valid &= df[columns].notna().all(axis=1)
+        elif kind == "label_encode":
+            for col, classes in step["classes"].items():
+                if col in df.columns:
+                    # Kategori yang tidak dikenal menjadi NaN (baris tidak di-score)
+                    df[col] = df[col].astype(str).map({value: code for code, value in enumerate(classes)})
+        elif kind == "drop_columns":
+            df = df.drop(columns=[col for col in step["columns"] if col in df.columns])
+    return df, valid
+
+
+def build_artifact(model_info, schema, dataset, dataset_version):
+    """Artefak yang cukup untuk scoring tanpa Flask: model, scaler, kolom fitur dan schema"""
+    return {
+        "format": ARTIFACT_FORMAT,
+        "model": model_info['model'],
+        "scaler": model_info.get('scaler'),
+        "feature_columns": list(model_info['feature_columns']),
+        "target_column": model_info['target_column'],
+        "classes": model_info['model'].classes_.tolist(),
+        "schema": schema,
+        "dataset": dataset,
+        "dataset_version": dataset_version,
+        "model_version": model_info['version'],
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec='seconds')
+    }
+
+
+def artifact_path(model_folder, filename):
+    return os.path.join(model_folder, f'{os.path.splitext(filename)[0]}.joblib')
+
+
+def save_artifact(path, artifact):
+    """Tulis artefak secara atomik (file sementara lalu rename)"""
+    tmp_path = f'{path}.tmp'
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_artifact(path):
+    artifact = joblib.load(path)
+    if not isinstance(artifact, dict) or artifact.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} bukan artefak model PREDICTEL (format {ARTIFACT_FORMAT})")
+    return artifact
+
+
+def score_frame(artifact, df):
+    """Prediksi dan probabilitas per kelas untuk setiap baris df (kosong untuk baris yang tidak valid)"""
+    frame, valid = apply_schema(df, artifact["schema"])
+    feature_columns = artifact["feature_columns"]
+    missing = [col for col in feature_columns if col not in frame.columns]
+    if missing:
+        raise ValueError(f"Kolom fitur tidak ditemukan di input: {', '.join(missing)}")
+
+    X = frame[feature_columns].apply(pd.to_numeric, errors='coerce')
+    valid &= X.notna().all(axis=1)
+    mask = valid.to_numpy()
+
+    classes = artifact["classes"]
+    predictions = np.full(len(df), np.nan)
+    probabilities = np.full((len(df), len(classes)), np.nan)
+    if mask.any():
+        # Scaler di-fit dengan nama kolom, jadi transform juga menerima DataFrame
+        X_valid = X[mask].astype(float)
+        if artifact["scaler"] is not None:
+            X_valid = artifact["scaler"].transform(X_valid)
+        else:
+            X_valid = X_valid.to_numpy()
+        model = artifact["model"]
+        predictions[mask] = model.predict(X_valid)
+        probabilities[mask] = model.predict_proba(X_valid)
+
+    result = pd.DataFrame(index=df.index)
+    # Target training selalu integer; baris yang tidak di-score menjadi <NA> (sel kosong di CSV)
+    result['prediction'] = pd.array(predictions, dtype='Float64').astype('Int64')
+    for idx, cls in enumerate(classes):
+        result[f'probability_{cls}'] = probabilities[:, idx]
+    return result, int(mask.sum())
@@ -0,0 +1,185 @@
+"""
+Shared Matrix - Matriks numpy di shared memory untuk worker process (zero-copy)
+Library yang digunakan:
+- multiprocessing.shared_memory: Segmen shared memory (POSIX /dev/shm)
+- numpy: Untuk view ndarray di atas buffer shared memory / memory-mapped file
+
+Matriks siap-model (mis. fitur hasil scaling untuk sweep k) disalin sekali ke shared memory per
+(filename, versi dataset, ...); task ke worker hanya membawa `SharedMatrix` (nama segmen, shape,
+dtype) sehingga worker meng-attach matriks tanpa pickling/copy. Jika shared memory tidak tersedia,
+matriks ditulis ke memory-mapped file di direktori temp.
+
+Segmen dilepas (unlink) saat versi dataset berganti, saat total ukuran melewati SHARED_MAX_BYTES
+(segmen yang tidak sedang dipakai, paling lama lebih dulu), dan saat process Flask berhenti.
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+import atexit
+import os
+import tempfile
+import threading
+import uuid
+import numpy as np
+from utils import on_dataset_change
+
+SHARED_MAX_BYTES = int(os.environ.get('SHARED_MAX_BYTES', 1024 * 1024 * 1024))
+# Jumlah segmen yang tetap ter-attach di satu worker (segmen lama di-close)
+WORKER_ATTACH_LIMIT = 8
+
+
+@dataclass(frozen=True)
+class SharedMatrix:
+    """Handle matriks bersama yang murah di-pickle (dikirim ke worker sebagai pengganti array)"""
+    name: str
+    shape: tuple
+    dtype: str
+    kind: str = 'shm'  # 'shm' (shared memory) atau 'memmap' (name = path file)
+
+    @property
+    def nbytes(self):
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+
+class _Segment:
+    def __init__(self, handle, shm=None):
+        self.handle = handle
+        self.shm = shm
+        self.users = 0
+
+    def release(self):
+        if self.handle.kind == 'shm':
+            self.shm.close()
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        else:
+            try:
+                os.remove(self.handle.name)
+            except FileNotFoundError:
+                pass
+
+
+_segments = OrderedDict()
+_lock = threading.Lock()
+_total_bytes = 0
+
+# Segmen yang ter-attach di process ini (dipakai worker), {nama: (shm, array)}
+_attached = OrderedDict()
+
+
+def _create(array):
+    """Salin array sekali ke shared memory (fallback: memory-mapped file)"""
+    array = np.ascontiguousarray(array)
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        handle = SharedMatrix(shm.name, array.shape, array.dtype.str)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        return _Segment(handle, shm)
+    except OSError:
+        path = os.path.join(tempfile.gettempdir(), f'predictel-{uuid.uuid4().hex}.npy')
+        mapped = np.lib.format.open_memmap(path, mode='w+', dtype=array.dtype, shape=array.shape)
+        mapped[...] = array
+        mapped.flush()
+        del mapped
+        return _Segment(SharedMatrix(path, array.shape, array.dtype.str, kind='memmap'))
+
+
+def _evict_locked():
+    """Lepas segmen tidak terpakai (paling lama dulu) sampai total ukuran di bawah batas"""
+    global _total_bytes
+    for key in list(_segments):
+        if _total_bytes <= SHARED_MAX_BYTES:
+            break
+        segment = _segments[key]
+        if segment.users == 0:
+            del _segments[key]
+            _total_bytes -= segment.handle.nbytes
+            segment.release()
+
+
+@contextmanager
+def shared(key, array):
+    """Handle matriks di shared memory untuk dipakai selama blok with
+
+    key (mis. (filename, versi, kolom)) membuat segmen dipakai ulang oleh request berikutnya;
+    key=None membuat segmen sementara yang langsung dilepas setelah blok selesai.
+    """
+    global _total_bytes
+    with _lock:
+        segment = _segments.get(key) if key is not None else None
+        if segment is None:
+            segment = _create(array)
+            if key is not None:
+                _segments[key] = segment
+                _total_bytes += segment.handle.nbytes
+        else:
+            _segments.move_to_end(key)
+        segment.users += 1
+    try:
+        yield segment.handle
+    finally:
+        with _lock:
+            segment.users -= 1
+            if key is None:
+                segment.release()
+            else:
+                _evict_locked()
+
+
+def release(predicate):
+    """Lepas semua segmen yang key-nya memenuhi predicate(key), return jumlah segmen"""
+    global _total_bytes
+    with _lock:
+        keys = [key for key in _segments if predicate(key)]
+        for key in keys:
+            segment = _segments.pop(key)
+            _total_bytes -= segment.handle.nbytes
+            segment.release()
+        return len(keys)
+
+
+def stats():
+    with _lock:
+        return {"segments": len(_segments), "total_bytes": _total_bytes, "max_bytes": SHARED_MAX_BYTES}
+
+
+def attach(handle):
+    """ndarray read-only di atas segmen bersama (dipakai di worker, mapping di-cache per process)"""
+    entry = _attached.get(handle.name)
+    if entry is None:
+        if handle.kind == 'shm':
+            # Worker spawn memakai resource tracker yang sama dengan process Flask,
+            # jadi segmen hanya di-unlink oleh pemiliknya (release)
+            shm = shared_memory.SharedMemory(name=handle.name)
+            array = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=shm.buf)
+        else:
+            shm, array = None, np.load(handle.name, mmap_mode='r')
+        array.flags.writeable = False
+        entry = _attached[handle.name] = (shm, array)
+        while len(_attached) > WORKER_ATTACH_LIMIT:
+            _, (old_shm, _) = _attached.popitem(last=False)
+            if old_shm is not None:
+                try:
+                    old_shm.close()
+                except BufferError:
+                    pass  # masih ada view yang dipakai, mapping dilepas saat view di-garbage-collect
+    else:
+        _attached.move_to_end(handle.name)
+    return entry[1]
+
+
+def as_array(X):
+    """Terima ndarray atau SharedMatrix (task yang bisa jalan inline maupun di worker)"""
+    return attach(X) if isinstance(X, SharedMatrix) else X
+
+
+@on_dataset_change
+def _release_dataset(filename, change):
+    """Segmen dari versi dataset lama dilepas"""
+    release(lambda key: isinstance(key, tuple) and key[0] == filename)
+
+
+atexit.register(release, lambda key: True)
@@ -1,21 +1,183 @@
 """
 Utility functions untuk semua modul
+
+Dataset disimpan sebagai snapshot (versi, DataFrame) yang diganti secara atomik; DataFrame yang
+sudah tersimpan tidak pernah diubah in-place. Setiap dataset punya reader/writer lock: route
+read-only (`@reads_dataset`) berjalan paralel, route yang mengganti dataset (`@writes_dataset`)
+diserialisasi dan menunggu reader yang sedang berjalan selesai.
 """
-import pandas as pd
+from contextlib import contextmanager
+from functools import wraps
 import os
+import threading
+from flask import request
+from lazy import lazy_module
+from metrics import stage, cache_lookup
+
+pd = lazy_module('pandas')
+
+# Snapshot dataset di memory: filename -> (versi, DataFrame). Versi naik setiap kali dataframe
+# diganti (upload/preprocess/drop-columns); tuple diganti utuh sehingga versi dan data selalu cocok
+datasets = {}
+_swap_lock = threading.Lock()
+_load_lock = threading.Lock()
+_dataset_locks = {}
+
+# Nama kolom target yang dikenali (untuk hue/warna otomatis)
+POSSIBLE_TARGETS = ['Churn', 'churn', 'HeartDisease', 'heart_disease', 'target', 'Target']
+
+_dataset_change_listeners = []
+
+
+class RWLock:
+    """Reader/writer lock: banyak reader paralel, satu writer eksklusif
+
+    Writer yang menunggu diprioritaskan (reader baru ikut menunggu) supaya mutasi tidak kelaparan.
+    Writer boleh masuk ulang (re-entrant) dan boleh mengambil read lock selama memegang write lock.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        me = threading.get_ident()
+        with self._cond:
+            owner = self._writer == me
+            if not owner:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+                self._readers += 1
+        try:
+            yield
+        finally:
+            if not owner:
+                with self._cond:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+            else:
+                self._writers_waiting += 1
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+                self._writers_waiting -= 1
+                self._writer = me
+                self._write_depth = 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._write_depth -= 1
+                if not self._write_depth:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+def dataset_lock(filename):
+    """Reader/writer lock untuk satu dataset (dibuat saat pertama dipakai)"""
+    with _swap_lock:
+        lock = _dataset_locks.get(filename)
+        if lock is None:
+            lock = _dataset_locks[filename] = RWLock()
+        return lock
+
+
+def _request_filename():
+    """Filename dataset dari body JSON atau form/file multipart request"""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and data.get('filename'):
+        return data['filename']
+    if request.form.get('filename'):
+        return request.form['filename']
+    file = request.files.get('file')
+    return file.filename if file is not None and file.filename else None
+
+
+def _locked_route(mode):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            filename = _request_filename()
+            if not filename:
+                return view(*args, **kwargs)
+            lock = dataset_lock(filename)
+            with lock.read() if mode == 'read' else lock.write():
+                return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Route read-only: berjalan paralel dengan reader lain pada dataset yang sama
+reads_dataset = _locked_route('read')
+# Route yang mengganti dataset (read-modify-write): eksklusif per dataset
+writes_dataset = _locked_route('write')
+
+
+def get_dataframe(filename, upload_folder, copy=True):
+    """Get or load dataframe from memory
+
+    copy=False mengembalikan dataframe yang tersimpan langsung (tanpa deep copy),
+    hanya untuk pemakaian read-only.
+    """
+    return get_snapshot(filename, upload_folder, copy)[0]
+
+def get_snapshot(filename, upload_folder, copy=False):
+    """(DataFrame, versi) dari snapshot yang sama, dipakai untuk key cache per versi"""
+    snapshot = datasets.get(filename)
+    cache_lookup('dataset', snapshot is not None)
+    with stage('get_dataframe'):
+        if snapshot is None:
+            # Load dari disk sekali walaupun beberapa request datang bersamaan
+            with _load_lock:
+                if filename not in datasets:
+                    filepath = os.path.join(upload_folder, filename)
+                    if not os.path.exists(filepath):
+                        raise FileNotFoundError(f"File {filename} not found")
+                    set_dataframe(filename, pd.read_csv(filepath))
+            snapshot = datasets[filename]
+        version, df = snapshot
+        return (df.copy() if copy else df), version
+
+def set_dataframe(filename, df, change=None):
+    """Simpan dataframe ke memory sebagai versi baru dan beri tahu semua cache
+
+    change menjelaskan perubahan untuk cache yang bisa update incremental,
+    mis. {"type": "drop_columns", "columns": [...]}. Default {"type": "replace"}.
+    """
+    with _swap_lock:
+        previous_version = datasets.get(filename, (0, None))[0]
+        datasets[filename] = (previous_version + 1, df)
+    change = dict(change or {"type": "replace"}, previous_version=previous_version,
+                  version=previous_version + 1)
+    for listener in _dataset_change_listeners:
+        listener(filename, change)
+
+def get_dataset_version(filename):
+    """Versi dataset saat ini (0 jika belum pernah di-load)"""
+    return datasets.get(filename, (0, None))[0]
+
+def on_dataset_change(listener):
+    """Daftarkan callback listener(filename, change) yang dipanggil saat dataset berganti versi"""
+    _dataset_change_listeners.append(listener)
+    return listener
 
-# Store loaded dataframes in memory (simple approach)
-dataframes = {}
-
-def get_dataframe(filename, upload_folder):
-    """Get or load dataframe from memory"""
-    if filename not in dataframes:
-        filepath = os.path.join(upload_folder, filename)
-        if os.path.exists(filepath):
-            dataframes[filename] = pd.read_csv(filepath)
-        else:
-            raise FileNotFoundError(f"File {filename} not found")
-    return dataframes[filename].copy()
+def detect_target_column(df):
+    """Cari kolom target yang dikenali di dataframe (None jika tidak ada)"""
+    for t in POSSIBLE_TARGETS:
+        if t in df.columns:
+            return t
+    return None
 
 def clean_dict(d):
     """Convert pandas NaN to None for JSON serialization"""
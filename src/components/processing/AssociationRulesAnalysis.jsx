@@ -359,6 +359,12 @@ function AssociationRulesAnalysis() {
                       <th className="px-4 py-3 text-left text-xs font-bold text-white uppercase">
                         Lift
                       </th>
+                      <th className="px-4 py-3 text-left text-xs font-bold text-white uppercase">
+                        Leverage
+                      </th>
+                      <th className="px-4 py-3 text-left text-xs font-bold text-white uppercase">
+                        Conviction
+                      </th>
                     </tr>
                   </thead>
                   <tbody className="bg-white divide-y divide-gray-200">
@@ -382,6 +388,12 @@ function AssociationRulesAnalysis() {
                         <td className="px-4 py-3 text-sm text-gray-700">
                           {rule.lift.toFixed(3)}
                         </td>
+                        <td className="px-4 py-3 text-sm text-gray-700">
+                          {rule.leverage !== undefined ? rule.leverage.toFixed(4) : "-"}
+                        </td>
+                        <td className="px-4 py-3 text-sm text-gray-700">
+                          {rule.conviction === null ? "∞" : rule.conviction !== undefined ? rule.conviction.toFixed(3) : "-"}
+                        </td>
                       </tr>
                     ))}
                   </tbody>
@@ -23,6 +23,9 @@ function ClusteringAnalysis() {
   const [minSamples, setMinSamples] = useState(5);
 
   const [numericColumns, setNumericColumns] = useState([]);
+  // K-Prototypes bisa memakai kolom kategorikal, metode lain hanya kolom numerik
+  const columnOptions =
+    method === "kprototypes" ? analysisResult?.columns || [] : numericColumns;
 
   useEffect(() => {
     if (analysisResult) {
@@ -53,7 +56,7 @@ function ClusteringAnalysis() {
         columns: selectedColumns,
       };
 
-      if (method === "kmeans") {
+      if (method === "kmeans" || method === "kprototypes") {
         options.n_clusters = nClusters;
       } else if (method === "dbscan") {
         options.eps = eps;
@@ -183,11 +186,24 @@ function ClusteringAnalysis() {
               />
               <span className="text-sm font-medium text-gray-700">DBSCAN</span>
             </label>
+            <label className="flex items-center gap-2 cursor-pointer">
+              <input
+                type="radio"
+                name="method"
+                value="kprototypes"
+                checked={method === "kprototypes"}
+                onChange={(e) => setMethod(e.target.value)}
+                className="w-4 h-4 text-purple-600"
+              />
+              <span className="text-sm font-medium text-gray-700">
+                K-Prototypes (numerik + kategorikal)
+              </span>
+            </label>
           </div>
         </div>
 
         {/* K-Means Parameters */}
-        {method === "kmeans" && (
+        {(method === "kmeans" || method === "kprototypes") && (
           <div>
             <label className="block text-sm font-medium text-gray-700 mb-2">
               Jumlah Cluster (n_clusters)
@@ -248,16 +264,18 @@ function ClusteringAnalysis() {
         {/* Column Selection */}
         <div>
           <label className="block text-sm font-medium text-gray-700 mb-2">
-            Pilih Kolom Numerik (Minimal 2)
+            {method === "kprototypes"
+              ? "Pilih Kolom (Minimal 2)"
+              : "Pilih Kolom Numerik (Minimal 2)"}
           </label>
           <div className="space-y-2 max-h-48 overflow-y-auto border-2 border-gray-200 rounded-xl p-4">
-            {numericColumns.length === 0 ? (
+            {columnOptions.length === 0 ? (
               <p className="text-sm text-gray-500">
                 Tidak ada kolom numerik tersedia. Silakan lakukan analisis data
                 terlebih dahulu.
               </p>
             ) : (
-              numericColumns.map((col) => (
+              columnOptions.map((col) => (
                 <label
                   key={col}
                   className="flex items-center gap-3 p-2 hover:bg-purple-50 rounded-lg cursor-pointer"
@@ -331,12 +349,12 @@ function ClusteringAnalysis() {
             </div>
             <div className="bg-gradient-to-br from-pink-50 to-rose-50 rounded-xl p-4 border border-pink-200">
               <p className="text-sm text-gray-600 mb-1">
-                {clusteringResult.method === "K-Means"
+                {clusteringResult.method !== "DBSCAN"
                   ? "Jumlah Cluster"
                   : "Cluster Ditemukan"}
               </p>
               <p className="text-xl font-bold text-pink-600">
-                {clusteringResult.method === "K-Means"
+                {clusteringResult.method !== "DBSCAN"
                   ? clusteringResult.n_clusters
                   : clusteringResult.n_clusters_found}
               </p>
@@ -24,13 +24,13 @@ export async function uploadCsv(file) {
 /**
  * Analisis data dengan berbagai statistik
  */
-export async function analyzeData(filename) {
+export async function analyzeData(filename, options = {}) {
   const res = await fetch("/api/analyze", {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
     },
-    body: JSON.stringify({ filename }),
+    body: JSON.stringify({ filename, ...options }),
   });
 
   let data;
@@ -129,6 +129,33 @@ export async function visualizeData(
   return data.data;
 }
 
+/**
+ * Generate banyak chart sekaligus dalam satu request
+ * charts: [{ plot_type, columns, hue_column }]
+ */
+export async function visualizeDashboard(filename, charts = []) {
+  const res = await fetch("/api/dashboard", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({ filename, charts }),
+  });
+
+  let data;
+  try {
+    data = await res.json();
+  } catch (e) {
+    throw new Error("Failed to parse server response");
+  }
+
+  if (!res.ok || data.error) {
+    throw new Error(data?.error || "Failed to generate dashboard");
+  }
+
+  return data.data;
+}
+
 /**
  * Generate interactive visualization dengan Plotly
  */
@@ -317,6 +344,32 @@ export async function performClustering(filename, options = {}) {
   return data.data;
 }
 
+/**
+ * Evaluate a range of k for K-Means (inertia, silhouette, recommended k)
+ */
+export async function sweepClusters(filename, options = {}) {
+  const res = await fetch("/api/clustering/k-sweep", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({ filename, ...options }),
+  });
+
+  let data;
+  try {
+    data = await res.json();
+  } catch (e) {
+    throw new Error("Failed to parse server response");
+  }
+
+  if (!res.ok || data.error) {
+    throw new Error(data?.error || "Failed to sweep clusters");
+  }
+
+  return data.data;
+}
+
 /**
  * Perform association rules analysis (Apriori)
  */
@@ -341,4 +394,79 @@ export async function performAssociationRules(filename, options = {}) {
   }
 
   return data.data;
-}
\ No newline at end of file
+}
+/**
+ * Fetch one page of dataset rows with server-side filter, sort and column projection
+ */
+export async function fetchRows(filename, options = {}) {
+  const res = await fetch("/api/rows", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({ filename, ...options }),
+  });
+
+  let data;
+  try {
+    data = await res.json();
+  } catch (e) {
+    throw new Error("Failed to parse server response");
+  }
+
+  if (!res.ok || data.error) {
+    throw new Error(data?.error || "Failed to fetch rows");
+  }
+
+  return data.data;
+}
+
+/**
+ * Run a declarative aggregate query (filters, group_by, aggregates, order_by, limit)
+ */
+export async function runQuery(filename, spec = {}) {
+  const res = await fetch("/api/query", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({ filename, ...spec }),
+  });
+
+  let data;
+  try {
+    data = await res.json();
+  } catch (e) {
+    throw new Error("Failed to parse server response");
+  }
+
+  if (!res.ok || data.error) {
+    throw new Error(data?.error || "Failed to run query");
+  }
+
+  return data.data;
+}
+
+/**
+ * Poll a background refine job (sampling: refine); returns the full-data result once done, otherwise null
+ */
+export async function fetchRefined(jobId) {
+  const res = await fetch(`/api/refine/${jobId}`);
+
+  let data;
+  try {
+    data = await res.json();
+  } catch (e) {
+    throw new Error("Failed to parse server response");
+  }
+
+  if (res.status === 202) {
+    return null;
+  }
+
+  if (!res.ok || data.error) {
+    throw new Error(data?.error || "Failed to fetch refined result");
+  }
+
+  return data.data;
+}